@@ -1,19 +1,33 @@
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, render_template, request, jsonify, session, Response, g
 from flask_session import Session as FlaskSession
 import uuid
+import json
 import os
 from datetime import datetime, timedelta
-from job_scraper import JobScraper
+from job_scraper import JobScraper, parse_source_urls
 from session_manager import SessionManager
 from models import Session as DBSession, JobListing
-import threading
+from driver_pool import DriverPool
+from scrape_scheduler import ScrapeScheduler
+from recrawl_scheduler import RecrawlScheduler
+from result_cache import ResultCache
+from http_client import close_http_session
+from log_setup import configure_logging
+import metrics
+import atexit
+import logging
+import time
+
+# Leveled logs through a background queue; LOG_FORMAT=json for one JSON object per line
+configure_logging(os.environ.get('LOG_LEVEL', 'INFO'), os.environ.get('LOG_FORMAT', 'text'))
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
 # Configure session
 app.config['SECRET_KEY'] = 'your-secret-key-here-change-this'
 app.config['SESSION_TYPE'] = 'filesystem'
-app.config['SESSION_FILE_DIR'] = './data/sessions'
+app.config['SESSION_FILE_DIR'] = os.environ.get('SESSION_FILE_DIR', './data/sessions')
 app.config['SESSION_PERMANENT'] = False
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=24)
 
@@ -21,18 +35,108 @@ app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=24)
 FlaskSession(app)
 
 # Create sessions directory
-os.makedirs('./data/sessions', exist_ok=True)
+os.makedirs(app.config['SESSION_FILE_DIR'], exist_ok=True)
 
-# Global variables for scraping status
-scraping_status = {
-    'is_scraping': False,
-    'message': 'Ready',
-    'progress': 0
-}
 
 # Initialize components
 session_manager = SessionManager(DBSession)
-job_scraper = JobScraper(session_manager)  # Pass session_manager to JobScraper
+job_scraper = JobScraper(
+    session_manager,  # Pass session_manager to JobScraper
+    max_workers=int(os.environ.get('SCRAPE_WORKERS', 3)),
+    source_timeout=int(os.environ.get('SOURCE_TIMEOUT', 120)),
+    # Recent results shared by every session searching the same keyword
+    result_cache=ResultCache(
+        ttl=int(os.environ.get('RESULT_CACHE_TTL', 900)),
+        max_entries=int(os.environ.get('RESULT_CACHE_SIZE', 256))
+    ),
+    # e.g. point every source at mock_sites.py for load testing
+    base_urls=parse_source_urls(os.environ.get('SOURCE_BASE_URLS')),
+    # Skip images, fonts, analytics and ads in Chrome
+    block_resources=os.environ.get('BLOCK_RESOURCES', '1') != '0'
+)
+
+# Warm Chrome drivers shared by all background scrape threads
+driver_pool = DriverPool(
+    job_scraper.setup_selenium,
+    size=int(os.environ.get('DRIVER_POOL_SIZE', 3)),
+    idle_timeout=int(os.environ.get('DRIVER_IDLE_TIMEOUT', 300))
+)
+job_scraper.driver_pool = driver_pool
+atexit.register(driver_pool.close)
+
+# Per-session scrape jobs, at most SCRAPE_CONCURRENCY running at once
+scrape_scheduler = ScrapeScheduler(
+    job_scraper,
+    max_concurrent=int(os.environ.get('SCRAPE_CONCURRENCY', 2)),
+    history_size=int(os.environ.get('SCRAPE_HISTORY', 100))
+)
+atexit.register(scrape_scheduler.shutdown)
+
+# Tracked searches re-crawled in the background; RECRAWL_POLL_SECONDS=0 disables it
+recrawl_scheduler = RecrawlScheduler(
+    job_scraper,
+    session_manager,
+    poll_interval=int(os.environ.get('RECRAWL_POLL_SECONDS', 60))
+)
+if recrawl_scheduler.poll_interval > 0:
+    recrawl_scheduler.start()
+    atexit.register(recrawl_scheduler.shutdown)
+
+MAX_BATCH_KEYWORDS = int(os.environ.get('MAX_BATCH_KEYWORDS', 50))
+atexit.register(close_http_session)
+
+
+def int_field(data, name, default, minimum, maximum=None):
+    """A whole-number field of a JSON body clamped to [minimum, maximum]; ValueError if it isn't one"""
+    value = data.get(name, default)
+    try:
+        if isinstance(value, bool) or int(value) != float(value):
+            raise ValueError
+        value = int(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f'{name} must be a whole number') from None
+    value = max(value, minimum)
+    return value if maximum is None else min(value, maximum)
+
+
+BOOLEAN_STRINGS = {'true': True, '1': True, 'yes': True, 'false': False, '0': False, 'no': False}
+
+
+def bool_field(data, name, default=False):
+    """A true/false field of a JSON body; also takes 0/1 and "true"/"false" strings, ValueError otherwise"""
+    value = data.get(name, default)
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in BOOLEAN_STRINGS:
+        return BOOLEAN_STRINGS[value.strip().lower()]
+    raise ValueError(f'{name} must be true or false')
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_time(response):
+    started = g.get('request_started')
+    if started is not None:
+        metrics.REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            endpoint=request.url_rule.rule if request.url_rule else 'unmatched',
+            method=request.method,
+            status=response.status_code
+        )
+    return response
+
+
+@app.teardown_appcontext
+def remove_db_session(exception=None):
+    """Release the request thread's scoped database session"""
+    DBSession.remove()
+
 
 @app.route('/')
 def index():
@@ -47,14 +151,14 @@ def index():
 
 @app.route('/api/scrape', methods=['POST'])
 def start_scraping():
-    global scraping_status
-
-    if scraping_status['is_scraping']:
-        return jsonify({'error': 'Scraping already in progress'}), 400
-
     data = request.json
     keyword = data.get('keyword', '')
     sources = data.get('sources', [])
+    try:
+        max_results = int_field(data, 'max_results', 30, 1, 500)
+        force_refresh = bool_field(data, 'force_refresh')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     if not keyword:
         return jsonify({'error': 'Keyword is required'}), 400
@@ -68,52 +172,162 @@ def start_scraping():
 
     session_id = session['session_id']
 
-    # Start scraping in background thread
-    thread = threading.Thread(
-        target=scrape_background,
-        args=(keyword, sources, session_id)
-    )
-    thread.daemon = True
-    thread.start()
+    # Queue the scrape; it runs as soon as a worker is free
+    try:
+        job = scrape_scheduler.submit(session_id, keyword, sources, max_results, force_refresh)
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 400
 
-    return jsonify({'message': 'Scraping started', 'session_id': session_id})
+    return jsonify({'message': 'Scraping started', 'session_id': session_id, 'job_id': job.job_id})
 
-def scrape_background(keyword, sources, session_id):
-    global scraping_status
 
+@app.route('/api/scrape/batch', methods=['POST'])
+def start_batch_scraping():
+    """Queue one job that scrapes many keywords; track it like /api/scrape jobs"""
+    data = request.json or {}
+    keywords = data.get('keywords', [])
+    if isinstance(keywords, str):
+        keywords = keywords.replace('\n', ',').split(',')
+    keywords = list(dict.fromkeys(' '.join(str(k).split()) for k in keywords if str(k).strip()))
+    sources = data.get('sources', [])
     try:
-        scraping_status = {
-            'is_scraping': True,
-            'message': 'Starting scrape...',
-            'progress': 0
-        }
+        max_results = int_field(data, 'max_results', 30, 1, 500)
+        force_refresh = bool_field(data, 'force_refresh')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-        # Clear previous results for this session
-        session_manager.clear_session_jobs(session_id)
+    if not keywords:
+        return jsonify({'error': 'At least one keyword is required'}), 400
+
+    if len(keywords) > MAX_BATCH_KEYWORDS:
+        return jsonify({'error': f'At most {MAX_BATCH_KEYWORDS} keywords per batch'}), 400
+
+    if not sources:
+        return jsonify({'error': 'At least one source is required'}), 400
+
+    if 'session_id' not in session:
+        session['session_id'] = str(uuid.uuid4())
+
+    session_id = session['session_id']
 
-        scraping_status['message'] = 'Scraping jobs...'
-        scraping_status['progress'] = 20
+    try:
+        job = scrape_scheduler.submit(session_id, None, sources, max_results, force_refresh, keywords=keywords)
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({'message': 'Batch scraping started', 'session_id': session_id, 'job_id': job.job_id,
+                    'keywords': keywords})
+
+
+@app.route('/api/tracked', methods=['GET'])
+def list_tracked_searches():
+    return jsonify(recrawl_scheduler.list(include_inactive=request.args.get('all') == '1'))
 
-        # Scrape jobs
-        total_jobs = job_scraper.scrape_all(keyword, sources, session_id=session_id)
 
-        scraping_status = {
-            'is_scraping': False,
-            'message': f'Successfully found {total_jobs} jobs',
-            'progress': 100
-        }
+@app.route('/api/tracked', methods=['POST'])
+def track_search():
+    """Re-crawl a keyword on each given source every interval_minutes"""
+    data = request.json or {}
+    keyword = ' '.join(str(data.get('keyword', '')).split())
+    sources = data.get('sources', [])
+    try:
+        max_results = int_field(data, 'max_results', 200, 1, 500)
+        interval_minutes = int_field(data, 'interval_minutes', 60, 5)
+        full_crawl_every = int_field(data, 'full_crawl_every', 6, 1)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-    except Exception as e:
-        scraping_status = {
-            'is_scraping': False,
-            'message': f'Error: {str(e)}',
-            'progress': 0
-        }
+    if not keyword:
+        return jsonify({'error': 'Keyword is required'}), 400
+
+    if not sources or any(source not in JobScraper.SOURCE_NAMES for source in sources):
+        return jsonify({'error': 'Sources must be one or more of ' + ', '.join(JobScraper.SOURCE_NAMES)}), 400
+
+    tracked = [recrawl_scheduler.track(keyword, source, max_results, interval_minutes, full_crawl_every)
+               for source in sources]
+    return jsonify({'message': 'Search tracked', 'tracked': tracked})
+
+
+@app.route('/api/tracked/<int:tracked_id>', methods=['DELETE'])
+def untrack_search(tracked_id):
+    if not recrawl_scheduler.untrack(tracked_id):
+        return jsonify({'error': 'Tracked search not found'}), 404
+    return jsonify({'message': 'Search no longer tracked'})
+
+
+@app.route('/api/tracked/<int:tracked_id>/jobs')
+def tracked_search_jobs(tracked_id):
+    """Active jobs stored for a tracked search, newest first; same pagination as /api/jobs"""
+    tracked = recrawl_scheduler.get(tracked_id)
+    if tracked is None:
+        return jsonify({'error': 'Tracked search not found'}), 404
+
+    page = session_manager.get_session_jobs_page(
+        tracked['session_id'], tracked['source'],
+        limit=min(max(request.args.get('limit', 50, type=int), 1), 200),
+        cursor=request.args.get('cursor'),
+        collapse=request.args.get('dedupe', '1') != '0'
+    )
+    return jsonify(page)
 
 
 @app.route('/api/status')
 def get_status():
-    return jsonify(scraping_status)
+    """Status of the current session's most recent scrape job"""
+    job = scrape_scheduler.latest_for_session(session.get('session_id'))
+    if job is None:
+        return jsonify({'is_scraping': False, 'message': 'Ready', 'progress': 0})
+    return jsonify(job.to_dict())
+
+
+@app.route('/api/scrape/<job_id>')
+def get_scrape_job(job_id):
+    job = scrape_scheduler.get(job_id)
+    if job is None or job.session_id != session.get('session_id'):
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/api/scrape/<job_id>/events')
+def scrape_job_events(job_id):
+    """Server-Sent Events stream of a job's progress and per-source results"""
+    job = scrape_scheduler.get(job_id)
+    if job is None or job.session_id != session.get('session_id'):
+        return jsonify({'error': 'Job not found'}), 404
+
+    # EventSource reconnects send the id of the last event they saw
+    try:
+        start = max(int(request.headers.get('Last-Event-ID', -1)) + 1, 0)
+    except ValueError:
+        start = 0
+
+    def stream():
+        index = start
+        while True:
+            events, finished = job.events_since(index)
+            if not events and not finished:
+                yield ': keep-alive\n\n'
+            for event, data in events:
+                yield f"id: {index}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+                index += 1
+            if finished and index >= len(job.events):
+                return
+
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+@app.route('/api/scrape/<job_id>/cancel', methods=['POST'])
+def cancel_scrape_job(job_id):
+    job = scrape_scheduler.get(job_id)
+    if job is None or job.session_id != session.get('session_id'):
+        return jsonify({'error': 'Job not found'}), 404
+
+    if not scrape_scheduler.cancel(job_id):
+        return jsonify({'error': 'Job already finished'}), 400
+    return jsonify(job.to_dict())
 
 
 @app.route('/api/jobs')
@@ -121,6 +335,8 @@ def get_jobs():
     # Get session ID
     session_id = session.get('session_id')
     if not session_id:
+        if request.args.get('limit') or request.args.get('q'):
+            return jsonify({'jobs': [], 'total': 0, 'next_cursor': None})
         return jsonify([])
 
     # Get filter parameters
@@ -128,9 +344,33 @@ def get_jobs():
     company = request.args.get('company', '')
     source = request.args.get('source', '')
     sort_by = request.args.get('sort', 'newest')
+    # Show one posting per cross-source duplicate cluster unless dedupe=0
+    collapse = request.args.get('dedupe', '1') != '0'
+
+    # Ranked full-text search within the session's results
+    q = request.args.get('q', '').strip()
+    if q:
+        page = session_manager.search_session_jobs(
+            session_id, q, source, city, company,
+            limit=min(max(request.args.get('limit', 50, type=int), 1), 200),
+            cursor=request.args.get('cursor'),
+            collapse=collapse
+        )
+        return jsonify(page)
+
+    # Paginated response when a limit is given: {'jobs', 'total', 'next_cursor'}
+    limit = request.args.get('limit', type=int)
+    if limit:
+        page = session_manager.get_session_jobs_page(
+            session_id, source, city, company, sort_by,
+            limit=min(max(limit, 1), 200),
+            cursor=request.args.get('cursor'),
+            collapse=collapse
+        )
+        return jsonify(page)
 
     # Get jobs for this session
-    jobs = session_manager.get_session_jobs(session_id, source, city, company, sort_by)
+    jobs = session_manager.get_session_jobs(session_id, source, city, company, sort_by, collapse)
 
     return jsonify(jobs)
 
@@ -142,19 +382,22 @@ def get_filters():
     if not session_id:
         return jsonify({'cities': [], 'companies': []})
 
-    # Get unique cities and companies for this session
-    jobs = session_manager.get_session_jobs(session_id)
+    # Unique cities and companies for this session, via cached DISTINCT queries
+    return jsonify(session_manager.get_session_filters(session_id))
 
-    cities = list(set(job['city'] for job in jobs if job['city']))
-    companies = list(set(job['company'] for job in jobs if job['company']))
 
-    cities.sort()
-    companies.sort()
+@app.route('/api/metrics')
+def get_metrics():
+    """Stage timings, counters and pool/queue state in the Prometheus text format"""
+    for state, value in driver_pool.stats().items():
+        metrics.DRIVER_POOL.set(value, state=state)
+    for state, value in scrape_scheduler.stats().items():
+        metrics.SCHEDULER.set(value, state=state)
+    if job_scraper.result_cache is not None:
+        for kind, value in job_scraper.result_cache.stats().items():
+            metrics.RESULT_CACHE.set(value, kind=kind)
 
-    return jsonify({
-        'cities': cities,
-        'companies': companies
-    })
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
 
 
 @app.route('/api/clear-session', methods=['POST'])
@@ -175,11 +418,9 @@ def session_info():
         session['session_id'] = str(uuid.uuid4())
         session_id = session['session_id']
 
-    jobs = session_manager.get_session_jobs(session_id)
-
     return jsonify({
         'session_id': session_id,
-        'job_count': len(jobs)
+        'job_count': session_manager.count_session_jobs(session_id)
     })
 
 
@@ -193,7 +434,7 @@ def cleanup_old_sessions():
     # Run cleanup once per day
     if datetime.now() - app.last_cleanup > timedelta(days=1):
         cleaned = session_manager.cleanup_old_sessions(days=7)
-        print(f"Cleaned up {cleaned} old sessions")
+        logger.info("Cleaned up %d old sessions", cleaned)
         app.last_cleanup = datetime.now()
 
 
@@ -0,0 +1,134 @@
+# bench_parsers.py
+"""Offline benchmark of the snapshot parsers against saved HTML fixtures.
+
+Runs every fixture listed in fixtures/expected.json through its source's
+parser (no network, no browser) and reports parse time per page and per
+card, peak memory, and whether the extracted jobs match the expected ones.
+
+    python bench_parsers.py                        # run everything
+    python bench_parsers.py --source jobvision -n 200
+    python bench_parsers.py --save baseline.json   # record timings
+    python bench_parsers.py --baseline baseline.json --tolerance 1.5
+
+Exits non-zero if any fixture extracts the wrong jobs or, with --baseline,
+if a fixture got slower than tolerance x its recorded page time.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+from job_parsers import PARSERS
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+FIELDS = ['title', 'company', 'location', 'link', 'date', 'source']
+
+
+def load_fixtures(source=None):
+    """(name, spec, html) for each fixture in expected.json, optionally for one source"""
+    with open(os.path.join(FIXTURES_DIR, 'expected.json'), encoding='utf-8') as f:
+        expected = json.load(f)
+
+    fixtures = []
+    for name, spec in expected.items():
+        if source and spec['source'] != source:
+            continue
+        with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+            fixtures.append((name, spec, f.read()))
+    return fixtures
+
+
+def check_jobs(jobs, expected):
+    """List of human-readable differences between parsed and expected jobs"""
+    problems = []
+    if len(jobs) != len(expected):
+        problems.append(f'expected {len(expected)} jobs, got {len(jobs)}')
+
+    for index, (job, want) in enumerate(zip(jobs, expected)):
+        for field in FIELDS:
+            if job.get(field) != want.get(field):
+                problems.append(f'job {index} {field}: expected {want.get(field)!r}, got {job.get(field)!r}')
+    return problems
+
+
+def bench_fixture(spec, html, iterations):
+    parser = PARSERS[spec['source']]
+
+    def parse():
+        return parser(html, max_results=1000, base_url=spec['base_url'])
+
+    jobs = parse()  # Warm-up, and the result checked for correctness
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        parse()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    parse()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    page_ms = statistics.median(timings) * 1000
+    timings.sort()
+    return jobs, {
+        'cards': len(jobs),
+        'html_kb': round(len(html.encode('utf-8')) / 1024, 1),
+        'page_ms': round(page_ms, 3),
+        'p95_ms': round(timings[int(0.95 * (len(timings) - 1))] * 1000, 3),
+        'card_ms': round(page_ms / len(jobs), 3) if jobs else None,
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark job parsers on saved HTML fixtures')
+    parser.add_argument('--source', choices=sorted(PARSERS), help='only run fixtures for this source')
+    parser.add_argument('-n', '--iterations', type=int, default=50, help='timed parses per fixture')
+    parser.add_argument('--save', metavar='FILE', help='write results as JSON')
+    parser.add_argument('--baseline', metavar='FILE', help='compare page times with a saved run')
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help='fail if page time exceeds baseline x tolerance (default 1.5)')
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = {}
+    failed = False
+
+    print(f"{'fixture':<36}{'cards':>6}{'KB':>8}{'page ms':>10}{'p95 ms':>9}{'card ms':>9}{'peak KB':>9}  result")
+    for name, spec, html in load_fixtures(args.source):
+        jobs, result = bench_fixture(spec, html, max(args.iterations, 1))
+        problems = check_jobs(jobs, spec['jobs'])
+
+        previous = baseline.get(name)
+        if previous and result['page_ms'] > previous['page_ms'] * args.tolerance:
+            problems.append(f"slower: {result['page_ms']} ms vs baseline {previous['page_ms']} ms")
+
+        result['ok'] = not problems
+        results[name] = result
+        failed = failed or bool(problems)
+
+        card_ms = '-' if result['card_ms'] is None else result['card_ms']
+        print(f"{name:<36}{result['cards']:>6}{result['html_kb']:>8}{result['page_ms']:>10}"
+              f"{result['p95_ms']:>9}{card_ms:>9}{result['peak_kb']:>9}  {'ok' if not problems else 'FAIL'}")
+        for problem in problems[:10]:
+            print(f"    {problem}")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved results to {args.save}")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
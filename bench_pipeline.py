@@ -0,0 +1,119 @@
+# bench_pipeline.py
+"""End-to-end throughput benchmark against the local mock sites.
+
+Starts mock_sites.py in-process, points every source at it and drives the
+real Flask app (scheduler -> scraper -> Chrome/HTTP -> database) with
+concurrent simulated users, each submitting searches and waiting for them
+to finish. Reports jobs saved per second and search latency percentiles.
+
+    python bench_pipeline.py --users 4 --searches 3 --latency 0.05
+    python bench_pipeline.py --http-only   # no Chrome: server-rendered pages over HTTP
+
+Runs against a throwaway SQLite database unless --database is given.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from mock_sites import MockConfig, MockSites, SOURCES
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+def run_user(app, user, args, results):
+    client = app.test_client()
+    for search in range(args.searches):
+        start = time.monotonic()
+        response = client.post('/api/scrape', json={
+            'keyword': f'{args.keyword}{user}x{search}',
+            'sources': args.sources,
+            'max_results': args.max_results,
+            'force_refresh': True,
+        })
+        if response.status_code != 200:
+            results.append({'status': f'rejected ({response.status_code})', 'latency': 0, 'jobs': 0})
+            continue
+
+        job_id = response.get_json()['job_id']
+        while True:
+            job = client.get(f'/api/scrape/{job_id}').get_json()
+            if job['status'] not in ('queued', 'running'):
+                break
+            time.sleep(0.05)
+
+        results.append({'status': job['status'], 'latency': time.monotonic() - start, 'jobs': job['total_jobs']})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scrape pipeline against mock job sites')
+    parser.add_argument('--users', type=int, default=4, help='concurrent simulated users')
+    parser.add_argument('--searches', type=int, default=2, help='searches per user, run one after another')
+    parser.add_argument('--sources', nargs='+', default=SOURCES, choices=SOURCES)
+    parser.add_argument('--keyword', default='python')
+    parser.add_argument('--max-results', type=int, default=60)
+    parser.add_argument('--total-jobs', type=int, default=120, help='listings the mock sites have per keyword')
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--render-delay', type=float, default=0.3)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--http-only', action='store_true',
+                        help='server-render every mock site and fetch all sources over HTTP (no Chrome needed)')
+    parser.add_argument('--database', help='DATABASE_URL to use instead of a temporary SQLite file')
+    args = parser.parse_args()
+
+    config = MockConfig(total_jobs=args.total_jobs, latency=args.latency, jitter=args.jitter,
+                        render_delay=args.render_delay, error_rate=args.error_rate,
+                        server_render=args.http_only)
+    sites = MockSites(config, port=0).start()
+
+    # app.py and models.py read their configuration at import time
+    tmpdir = tempfile.mkdtemp(prefix='bench_pipeline_')
+    os.environ['SOURCE_BASE_URLS'] = sites.env_value()
+    os.environ['DATABASE_URL'] = args.database or f'sqlite:///{os.path.join(tmpdir, "jobs.db")}'
+    import app as webapp
+
+    if args.http_only:
+        webapp.job_scraper.fetch_strategies = {source: 'http' for source in SOURCES}
+
+    print(f"Mock sites: {sites.env_value()}")
+    print(f"{args.users} user(s) x {args.searches} search(es), sources: {', '.join(args.sources)}, "
+          f"max results {args.max_results}, concurrency {webapp.scrape_scheduler.max_concurrent}")
+
+    results = []
+    threads = [threading.Thread(target=run_user, args=(webapp.app, user, args, results))
+               for user in range(args.users)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    sites.stop()
+
+    done = [result for result in results if result['status'] == 'done']
+    latencies = [result['latency'] for result in done]
+    total_jobs = sum(result['jobs'] for result in done)
+
+    print(f"\nSearches: {len(done)} done, {len(results) - len(done)} not done "
+          f"({', '.join(sorted({r['status'] for r in results if r['status'] != 'done'})) or 'none'})")
+    print(f"Wall time: {elapsed:.2f}s")
+    print(f"Jobs saved: {total_jobs} ({total_jobs / elapsed:.1f} jobs/sec)")
+    if latencies:
+        print(f"Search latency: p50 {statistics.median(latencies):.2f}s, "
+              f"p95 {percentile(latencies, 0.95):.2f}s, max {max(latencies):.2f}s")
+    print(f"Mock site requests: {config.requests} ({config.errors} injected errors)")
+    print(f"Page readiness: {webapp.job_scraper.readiness.summary()}")
+
+    return 0 if len(done) == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,39 @@
+# conftest.py
+import os
+import tempfile
+
+import pytest
+
+# models.py reads DATABASE_URL at import time, so point it at a throwaway
+# SQLite file before any test module imports it.
+TEST_DATA_DIR = tempfile.mkdtemp(prefix="jobs_test_")
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{os.path.join(TEST_DATA_DIR, "jobs.db")}')
+# Likewise app.py creates its Flask session store at import; keep it out of ./data/sessions
+os.environ.setdefault('SESSION_FILE_DIR', os.path.join(TEST_DATA_DIR, 'sessions'))
+
+# test_scraper.py is a manual script that scrapes the live sites at import
+collect_ignore = ['test_scraper.py']
+
+
+@pytest.fixture
+def db():
+    """The scoped DB session, with every table emptied before and after the test"""
+    from models import Base, Session, engine
+
+    def wipe():
+        Session.remove()
+        with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+
+    wipe()
+    yield Session
+    wipe()
+
+
+@pytest.fixture
+def manager(db):
+    """A SessionManager on the emptied test database"""
+    from session_manager import SessionManager
+
+    return SessionManager(db)
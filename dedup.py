@@ -0,0 +1,221 @@
+# dedup.py
+"""Cross-source near-duplicate detection with indexed blocking keys.
+
+Two postings are duplicates when they come from different sites, share a
+company name and have the same title words (see is_duplicate). Similar
+text alone isn't enough: "Senior" vs "Junior Python Developer" at one
+company, or one title at Tapsi and at Tapsell, are different jobs. Each
+job's title forms, combined with each of its company names, are hashed
+into dedup keys stored in job_dedup_keys, so a new job only looks at the
+most recent jobs sharing one of its keys (indexed lookups) instead of every
+stored job, and every pair is_duplicate accepts shares a key.
+"""
+import hashlib
+import re
+
+from sqlalchemy import func, select
+
+from models import JobListing, JobDedupKey
+from persian_text import normalize_persian
+
+_PUNCTUATION = re.compile(r'[^\w\s]')
+_COMPANY_PARTS = re.compile(r'[|()\[\]/،,]| - ')
+
+# Words sites add around the same title or company name
+TITLE_FILLER = {'استخدام', 'فوری', 'نیازمند', 'جذب'}
+COMPANY_FILLER = {'شرکت', 'سهامی', 'خاص', 'عام', 'گروه', 'co', 'company', 'ltd', 'inc', 'llc', 'group'}
+UNKNOWN = normalize_persian('نامشخص')
+
+
+def _words(text):
+    return _PUNCTUATION.sub(' ', normalize_persian(text)).split()
+
+
+def title_key(title):
+    """Title words minus filler; empty if the title is unknown"""
+    words = [word for word in _words(title) if word not in TITLE_FILLER]
+    return tuple(words) if words != [UNKNOWN] else ()
+
+
+def company_keys(company):
+    """Spaceless forms of each name in e.g. "شرکت اسنپ | Snapp (اسنپ)"; empty if unknown"""
+    keys = set()
+    for part in _COMPANY_PARTS.split(normalize_persian(company)):
+        key = ''.join(word for word in _words(part) if word not in COMPANY_FILLER)
+        if len(key) > 1 and key != UNKNOWN:
+            keys.add(key)
+    return keys
+
+
+def is_duplicate(a, b):
+    """Whether two job dicts (title, company, source) are one position posted on two sites
+
+    The sources must differ, the company names must share a name, and the
+    titles must have the same words (in any order) or the same letters once
+    spaces are dropped ("back end" / "backend").
+    """
+    if not a['source'] or not b['source'] or a['source'] == b['source']:
+        return False
+    if not company_keys(a['company']) & company_keys(b['company']):
+        return False
+    title_a, title_b = title_key(a['title']), title_key(b['title'])
+    return bool(title_a) and (sorted(title_a) == sorted(title_b) or ''.join(title_a) == ''.join(title_b))
+
+
+def dedup_keys(title, company):
+    """Signed 64-bit keys (fit an SQLite INTEGER) shared by every duplicate of a posting"""
+    words = title_key(title)
+    if not words:
+        return []
+    forms = {'words:' + ' '.join(sorted(words)), 'letters:' + ''.join(words)}
+    return sorted(
+        int.from_bytes(hashlib.blake2b(f'{form}|{name}'.encode(), digest_size=8).digest(), 'big', signed=True)
+        for form in forms for name in company_keys(company)
+    )
+
+
+class NearDuplicateDetector:
+    """Assigns JobListing.cluster_id so one position posted on several sites shares one id
+
+    A cluster's id is the id of its first job, its representative. A job
+    joins a cluster only if it is a duplicate of that representative and
+    the cluster has no job from its source yet, so clusters never grow by
+    chaining through postings that each look a little like the last.
+    """
+
+    def __init__(self, max_candidates=50, chunk_size=500):
+        self.max_candidates = max_candidates  # Most recent jobs considered per dedup key, and per job
+        self.chunk_size = chunk_size
+
+    def assign_clusters(self, db, job_ids):
+        """Index the given jobs and place each in a cluster; caller commits
+
+        Jobs are placed in id order. Returns the number of jobs whose
+        cluster_id changed.
+        """
+        job_ids = list(job_ids)
+        if not job_ids:
+            return 0
+
+        jobs = self._load(db, job_ids)
+
+        # Re-index: titles of updated jobs may have changed
+        job_keys = {}
+        for chunk in self._chunks(list(jobs)):
+            db.query(JobDedupKey).filter(JobDedupKey.job_id.in_(chunk)).delete(synchronize_session=False)
+        for job_id, job in jobs.items():
+            keys = dedup_keys(job['title'], job['company'])
+            if keys:
+                job_keys[job_id] = keys
+        db.bulk_insert_mappings(JobDedupKey, [
+            {'job_id': job_id, 'dedup_key': key}
+            for job_id, keys in job_keys.items() for key in keys
+        ])
+        db.flush()
+
+        sessions = {}
+        for job_id in sorted(jobs):
+            sessions.setdefault(jobs[job_id]['session_id'], []).append(job_id)
+        return sum(self._assign_session(db, session_id, batch, jobs, job_keys)
+                   for session_id, batch in sessions.items())
+
+    def _assign_session(self, db, session_id, batch, jobs, job_keys):
+        """Cluster one session's batch of jobs against the session's stored jobs"""
+        candidates = self._candidates(db, session_id, batch, job_keys)
+
+        # Candidate jobs, the representatives of their clusters, and which
+        # source each cluster already has a job from
+        others = {other for found in candidates.values() for other in found}
+        jobs.update(self._load(db, others - set(jobs)))
+        cluster_ids = {jobs[other]['cluster_id'] for other in others} | set(batch)
+        cluster_ids |= {jobs[job_id]['cluster_id'] for job_id in batch}
+        cluster_ids.discard(None)
+        jobs.update(self._load(db, cluster_ids - set(jobs)))
+
+        members = {}
+        for chunk in self._chunks(list(cluster_ids)):
+            for job_id, source, cluster_id in db.query(
+                    JobListing.id, JobListing.source, JobListing.cluster_id
+            ).filter(JobListing.cluster_id.in_(chunk), JobListing.session_id == session_id):
+                members.setdefault(cluster_id, {})[job_id] = source
+
+        pending = set(batch)
+        stale = {}
+        for job_id in batch:
+            job = jobs[job_id]
+            pending.discard(job_id)
+            if set(members.get(job_id, {})) - {job_id}:
+                # Still the representative of other jobs
+                cluster_id = job_id
+            else:
+                members.get(job['cluster_id'], {}).pop(job_id, None)
+                cluster_id = None
+                for other in candidates.get(job_id, ()):
+                    # Unclustered jobs compare against this one once they are placed
+                    other_cluster = jobs[other]['cluster_id']
+                    if other in pending or other_cluster is None or other_cluster == cluster_id:
+                        continue
+                    representative = jobs.get(other_cluster)
+                    if (representative is not None and representative['cluster_id'] == other_cluster
+                            and job['source'] not in members.get(other_cluster, {}).values()
+                            and is_duplicate(job, representative)
+                            and (cluster_id is None or other_cluster < cluster_id)):
+                        cluster_id = other_cluster
+                if cluster_id is None:
+                    cluster_id = job_id
+
+            members.setdefault(cluster_id, {})[job_id] = job['source']
+            if job['cluster_id'] != cluster_id:
+                stale.setdefault(cluster_id if cluster_id != job_id else None, []).append(job_id)
+                job['cluster_id'] = cluster_id
+
+        # Jobs that start their own cluster take their id in one statement per chunk
+        alone = stale.pop(None, [])
+        for chunk in self._chunks(alone):
+            db.query(JobListing).filter(JobListing.id.in_(chunk)).update(
+                {JobListing.cluster_id: JobListing.id}, synchronize_session=False)
+        for cluster_id, stale_ids in stale.items():
+            for chunk in self._chunks(stale_ids):
+                db.query(JobListing).filter(JobListing.id.in_(chunk)).update(
+                    {JobListing.cluster_id: cluster_id}, synchronize_session=False)
+        return len(alone) + sum(len(stale_ids) for stale_ids in stale.values())
+
+    def _candidates(self, db, session_id, batch, job_keys):
+        """Newest jobs of the session sharing a dedup key with each batch job, newest first"""
+        key_members = {}
+        all_keys = list({key for job_id in batch for key in job_keys.get(job_id, ())})
+        for chunk in self._chunks(all_keys):
+            ranked = select(
+                JobDedupKey.dedup_key, JobDedupKey.job_id,
+                func.row_number().over(partition_by=JobDedupKey.dedup_key,
+                                       order_by=JobDedupKey.job_id.desc()).label('rank')
+            ).join(JobListing, JobListing.id == JobDedupKey.job_id).where(
+                JobDedupKey.dedup_key.in_(chunk), JobListing.session_id == session_id
+            ).subquery()
+            for key, job_id in db.execute(
+                    select(ranked.c.dedup_key, ranked.c.job_id).where(ranked.c.rank <= self.max_candidates)):
+                key_members.setdefault(key, set()).add(job_id)
+
+        candidates = {}
+        for job_id in batch:
+            found = set()
+            for key in job_keys.get(job_id, ()):
+                found |= key_members.get(key, set())
+            found.discard(job_id)
+            candidates[job_id] = sorted(found, reverse=True)[:self.max_candidates]
+        return candidates
+
+    def _load(self, db, job_ids):
+        jobs = {}
+        for chunk in self._chunks(list(job_ids)):
+            for job_id, title, company, source, session_id, cluster_id in db.query(
+                    JobListing.id, JobListing.title, JobListing.company, JobListing.source,
+                    JobListing.session_id, JobListing.cluster_id
+            ).filter(JobListing.id.in_(chunk)):
+                jobs[job_id] = {'title': title, 'company': company, 'source': source,
+                                'session_id': session_id, 'cluster_id': cluster_id}
+        return jobs
+
+    def _chunks(self, items):
+        for start in range(0, len(items), self.chunk_size):
+            yield items[start:start + self.chunk_size]
@@ -0,0 +1,220 @@
+# driver_pool.py
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class DriverPool:
+    """Thread-safe pool of warm headless Chrome drivers.
+
+    Drivers are created lazily by ``factory`` up to ``size`` at a time.
+    A checked-in driver is reset (cookies, storage, extra tabs) so the next
+    scrape starts from a clean state, and a driver that has sat idle longer
+    than ``idle_timeout`` seconds or fails its health check is quit and
+    replaced instead of being handed out again. A background reaper prunes
+    idle drivers every ``reap_interval`` seconds (default half the idle
+    timeout) so unused Chrome processes don't stay resident between searches.
+    """
+
+    def __init__(self, factory, size=3, idle_timeout=300, acquire_timeout=60, reap_interval=None):
+        self.factory = factory
+        self.size = max(1, int(size))
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self.reap_interval = reap_interval or (idle_timeout / 2 if idle_timeout else None)
+
+        self._idle = []  # list of (driver, last_used) pairs, most recent last
+        self._created = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._reaper = None
+        self._reaper_stop = threading.Event()
+
+    def acquire(self, timeout=None):
+        """Check out a healthy driver, creating one if the pool has room"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            stale = []
+            driver = None
+            create = False
+
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Driver pool is closed")
+
+                    stale.extend(self._pop_expired())
+
+                    if self._idle:
+                        driver, _ = self._idle.pop()
+                        break
+
+                    if self._created < self.size:
+                        self._created += 1
+                        create = True
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"No Chrome driver available after {timeout}s")
+                    self._condition.wait(remaining)
+
+            for old_driver in stale:
+                self._quit(old_driver)
+
+            if create:
+                try:
+                    return self.factory()
+                except Exception:
+                    self._forget()
+                    raise
+
+            if self._is_healthy(driver):
+                return driver
+
+            logger.warning("Discarding unhealthy Chrome driver")
+            self._quit(driver)
+            self._forget()
+
+    def release(self, driver, discard=False):
+        """Return a driver to the pool, or quit it if it can't be reused"""
+        if driver is None:
+            return
+
+        if not discard and not self._closed:
+            try:
+                self._reset(driver)
+            except Exception as e:
+                logger.warning("Error resetting Chrome driver: %s", e)
+                discard = True
+
+        with self._condition:
+            if discard or self._closed:
+                self._created -= 1
+            else:
+                self._idle.append((driver, time.monotonic()))
+                self._start_reaper()
+            self._condition.notify()
+
+        if discard or self._closed:
+            self._quit(driver)
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """Context manager around acquire/release"""
+        driver = self.acquire(timeout)
+        failed = False
+        try:
+            yield driver
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.release(driver, discard=failed and not self._is_healthy(driver))
+
+    def prune(self):
+        """Quit drivers that have been idle longer than idle_timeout"""
+        with self._condition:
+            stale = self._pop_expired()
+        for driver in stale:
+            self._quit(driver)
+        return len(stale)
+
+    def stats(self):
+        """Current pool occupancy"""
+        with self._condition:
+            return {
+                'size': self.size,
+                'created': self._created,
+                'idle': len(self._idle),
+                'in_use': self._created - len(self._idle),
+            }
+
+    def close(self):
+        """Quit every idle driver and refuse further checkouts"""
+        with self._condition:
+            self._closed = True
+            drivers = [driver for driver, _ in self._idle]
+            self._created -= len(drivers)
+            self._idle = []
+            self._condition.notify_all()
+        self._reaper_stop.set()
+
+        for driver in drivers:
+            self._quit(driver)
+
+    def _pop_expired(self):
+        """Remove idle drivers past idle_timeout; caller holds the lock"""
+        if not self.idle_timeout:
+            return []
+
+        now = time.monotonic()
+        fresh, stale = [], []
+        for driver, last_used in self._idle:
+            if now - last_used > self.idle_timeout:
+                stale.append(driver)
+            else:
+                fresh.append((driver, last_used))
+
+        self._idle = fresh
+        self._created -= len(stale)
+        return stale
+
+    def _start_reaper(self):
+        """Start the idle reaper on first check-in; caller holds the lock"""
+        if self._reaper is None and self.reap_interval:
+            self._reaper = threading.Thread(target=self._reap, name='driver-pool-reaper', daemon=True)
+            self._reaper.start()
+
+    def _reap(self):
+        while not self._reaper_stop.wait(self.reap_interval):
+            pruned = self.prune()
+            if pruned:
+                logger.info("Quit %d idle Chrome driver(s)", pruned)
+
+    def _forget(self):
+        with self._condition:
+            self._created -= 1
+            self._condition.notify()
+
+    @staticmethod
+    def _is_healthy(driver):
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    @staticmethod
+    def _reset(driver):
+        """Close extra tabs and wipe cookies and storage of every site the driver visited"""
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+
+        try:
+            # WebDriver's own calls below only reach the current page's origin
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': '*', 'storageTypes': 'all'})
+        except Exception as e:
+            # e.g. a remote or non-Chromium driver without DevTools access
+            logger.debug("DevTools unavailable, clearing the current origin only: %s", e)
+        driver.delete_all_cookies()
+        try:
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except Exception:
+            pass  # about:blank and some error pages have no storage
+        driver.get("about:blank")
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning("Error quitting Chrome driver: %s", e)
@@ -0,0 +1,68 @@
+# http_client.py
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session(pool_size=20):
+    """Shared keep-alive requests.Session with a pooled, retrying adapter.
+
+    requests.Session is safe to share for plain GETs; one instance lets every
+    scrape thread reuse the same TCP/TLS connections per host.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retries = Retry(total=2, backoff_factor=0.3,
+                                status_forcelist=[429, 502, 503, 504],
+                                allowed_methods=['GET'])
+                adapter = HTTPAdapter(pool_connections=10, pool_maxsize=pool_size, max_retries=retries)
+
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers.update({
+                    'User-Agent': USER_AGENT,
+                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                    'Accept-Language': 'fa-IR,fa;q=0.9,en;q=0.8',
+                })
+                _session = session
+    return _session
+
+
+def fetch_html(url, timeout=15):
+    """GET a page and return its HTML, or None if the request failed"""
+    try:
+        response = get_http_session().get(url, timeout=timeout)
+    except requests.RequestException as e:
+        logger.warning("HTTP fetch failed for %s: %s", url, e)
+        return None
+
+    if response.status_code != 200:
+        logger.warning("HTTP fetch for %s returned %s", url, response.status_code)
+        return None
+
+    # Iranian sites sometimes omit the charset header; requests would guess latin-1
+    if not response.encoding or response.encoding.lower() == 'iso-8859-1':
+        response.encoding = 'utf-8'
+    return response.text
+
+
+def close_http_session():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
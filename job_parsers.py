@@ -0,0 +1,215 @@
+# job_parsers.py
+"""Offline extraction of job cards from a page_source snapshot.
+
+Each parser mirrors the selectors of the matching live Selenium extractor
+in source_adapters.py, but runs against one HTML string with BeautifulSoup/lxml
+so a page of cards costs a single WebDriver round trip instead of several
+per card. Selectors are compiled once (soupsieve ships with BeautifulSoup)
+instead of being re-parsed for every card: each SourceAdapter passes its
+own compiled selectors, and SELECTORS are the defaults.
+"""
+from urllib.parse import urljoin
+
+import soupsieve
+from bs4 import BeautifulSoup
+
+# Relative-date phrases used by Jobvision and IranTalent cards
+DATE_WORDS = ['روز پیش', 'ساعت پیش', 'هفته پیش', 'ماه پیش', 'دیروز', 'امروز']
+
+
+# Card and field selectors by source; the live Selenium extractors in
+# source_adapters.py use the same strings
+SELECTORS = {
+    'jobinja': {
+        'listing': 'ul.c-jobListView__list',  # Results container, present even when empty
+        'card': 'li.c-jobListView__item',
+        'title': 'h2.c-jobListView__title',
+        'title_link': 'a.c-jobListView__titleLink',
+        'date': 'span.c-jobListView__passedDays',
+        'company': 'ul.o-listView__itemComplementInfo > li:first-child > span',
+        'location': 'ul.o-listView__itemComplementInfo > li:nth-child(2) > span',
+    },
+    'jobvision': {
+        'listing': 'div.job-list',
+        'card': 'job-card',
+        'link': 'a[href*="/jobs/"]',
+        'title': '.job-card-title',
+        'company': 'a[href*="/companies/"]',
+        'location_box': 'div.d-flex.flex-wrap.align-items-center.text-secondary.line-height-24',
+        'location': 'span.text-secondary.pointer-events-none.ng-star-inserted',
+        'date': 'span[style*="color: #8E9CB2"]',
+    },
+    'irantalent': {
+        'listing': 'div.positions-list',
+        'card': 'a[href*="/job/"]',
+        'title': 'p.position-title, .position-title',
+        'company': 'p.color-light-black',
+        'job_info': 'div.job-info',
+        'info_span': 'span.color-gray',
+    },
+}
+
+
+def compile_selectors(selectors):
+    """Field name -> compiled soupsieve pattern, the ``css`` argument of the parsers"""
+    return {name: soupsieve.compile(selector) for name, selector in selectors.items()}
+
+
+COMPILED = {source: compile_selectors(selectors) for source, selectors in SELECTORS.items()}
+
+
+def make_soup(html):
+    return BeautifulSoup(html, 'lxml')
+
+
+def element_text(element):
+    """Whitespace-collapsed text, close to what Selenium's .text returns"""
+    if element is None:
+        return ''
+    return ' '.join(element.get_text(' ').split())
+
+
+def has_listing(html, selector):
+    """True if the HTML holds a rendered results container (selector), even an empty one"""
+    return soupsieve.select_one(selector, make_soup(html)) is not None
+
+
+def _is_date(text):
+    return any(word in text for word in DATE_WORDS)
+
+
+def _first_date(elements):
+    return next((text for text in map(element_text, elements) if _is_date(text)), "")
+
+
+def parse_jobinja(html, max_results=30, base_url="https://jobinja.ir", css=None):
+    """Parse Jobinja listing cards from page HTML (css: compiled selectors, default SELECTORS['jobinja'])"""
+    css = css or COMPILED['jobinja']
+    soup = make_soup(html)
+    jobs = []
+
+    for card in css['card'].select(soup, limit=max_results):
+        title_elem = css['title'].select_one(card)
+        title_link = css['title_link'].select_one(title_elem) if title_elem else None
+        if title_link is None:
+            continue
+
+        date = element_text(css['date'].select_one(title_elem))
+        date = date.replace('(', '').replace(')', '').strip()
+
+        company = element_text(css['company'].select_one(card))
+        location = element_text(css['location'].select_one(card))
+
+        jobs.append({
+            'title': element_text(title_link),
+            'company': company or "نامشخص",
+            'location': location or "unknown",
+            'link': urljoin(base_url, title_link.get('href', '')),
+            'date': date,
+            'source': 'jobinja'
+        })
+
+    return jobs
+
+
+def parse_jobvision(html, max_results=30, base_url="https://jobvision.ir", css=None):
+    """Parse Jobvision <job-card> elements from page HTML (css as in parse_jobinja)"""
+    css = css or COMPILED['jobvision']
+    soup = make_soup(html)
+    jobs = []
+
+    for card in css['card'].select(soup, limit=max_results):
+        job_link = css['link'].select_one(card)
+        href = job_link.get('href') if job_link else None
+        if not href or '/jobs/' not in href:
+            continue
+
+        title = element_text(css['title'].select_one(card))
+        if not title:
+            continue
+
+        company = element_text(css['company'].select_one(card))
+
+        location = "unknown"
+        location_box = css['location_box'].select_one(card)
+        location_span = css['location'].select_one(location_box) if location_box else None
+        if location_span is not None:
+            # Keep just the city, e.g. "اصفهان ، مارنان" -> "اصفهان"
+            location = element_text(location_span).split('،')[0].strip()
+
+        # Gray spans first, then any span, as the live extractor does
+        date = _first_date(css['date'].select(card)) or _first_date(card.find_all('span'))
+
+        jobs.append({
+            'title': title,
+            'company': company or "نامشخص",
+            'location': location,
+            'link': urljoin(base_url, href),
+            'date': date,
+            'source': 'jobvision'
+        })
+
+    return jobs
+
+
+def _irantalent_card(anchor):
+    """Climb at most 5 levels to the element wrapping one IranTalent posting"""
+    card = anchor
+    for _ in range(5):
+        parent = card.parent
+        if parent is None or parent.name == '[document]':
+            break
+        classes = ' '.join(parent.get('class', []))
+        card = parent
+        if 'card' in classes or 'position' in classes:
+            break
+    return card
+
+
+def parse_irantalent(html, max_results=30, base_url="https://www.irantalent.com", css=None):
+    """Parse IranTalent job links and their enclosing cards from page HTML (css as in parse_jobinja)"""
+    css = css or COMPILED['irantalent']
+    soup = make_soup(html)
+    jobs = []
+
+    for anchor in css['card'].select(soup, limit=max_results):
+        href = anchor.get('href')
+        if not href or '/job/' not in href:
+            continue
+
+        card = _irantalent_card(anchor)
+
+        title = element_text(css['title'].select_one(card))
+        if not title:
+            continue
+
+        company = element_text(css['company'].select_one(card))
+
+        location = "تهران"
+        date = ""
+        job_info = css['job_info'].select_one(card)
+        if job_info is not None:
+            spans = [element_text(span) for span in css['info_span'].select(job_info)]
+            if spans:
+                location = spans[0]
+            # The date is usually the last span with "روز پیش" or similar
+            date = next((text for text in reversed(spans) if _is_date(text)), "")
+
+        jobs.append({
+            'title': title,
+            'company': company or "نامشخص",
+            'location': location,
+            'link': urljoin(base_url, href),
+            'salary': "",
+            'date': date,
+            'source': 'irantalent'
+        })
+
+    return jobs
+
+
+PARSERS = {
+    'jobinja': parse_jobinja,
+    'jobvision': parse_jobvision,
+    'irantalent': parse_irantalent,
+}
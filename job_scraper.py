@@ -1,24 +1,112 @@
+import logging
+import threading
 import time
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
-import requests
 from session_manager import SessionManager
-from models import Session as DBSession, JobListing
+from models import Session as DBSession
+from driver_pool import DriverPool
+from page_readiness import PageReadiness
+from resource_blocking import ResourceBlocker
+from http_client import fetch_html
+from metrics import STAGE_SECONDS, SOURCE_RESULTS, JOBS_SCRAPED
+from log_setup import bound_to_context, log_context
+from result_cache import normalize_keyword
+from source_adapters import ADAPTERS
+
+logger = logging.getLogger(__name__)
+
+# Absolute link of every loaded card (the card itself or its first link)
+_CARD_LINKS_SCRIPT = """
+return Array.from(document.querySelectorAll(arguments[0])).map(function (card) {
+    var link = card.matches('a[href]') ? card : card.querySelector('a[href]');
+    return link ? link.href : null;
+});
+"""
+
+
+def parse_source_urls(value):
+    """'jobinja=http://host:port,jobvision=...' (SOURCE_BASE_URLS) -> {source: url}"""
+    urls = {}
+    for item in (value or '').split(','):
+        source, _, url = item.partition('=')
+        if source.strip() and url.strip():
+            urls[source.strip()] = url.strip().rstrip('/')
+    return urls
 
 
 class JobScraper:
-    def __init__(self, session_manager=None):
-        """Initialize JobScraper with optional session_manager"""
+    # Display names used in progress output, keyed by source id (see source_adapters.py)
+    SOURCE_NAMES = {name: adapter.display_name for name, adapter in ADAPTERS.items()}
+
+    # Delta crawls stop once this many consecutive listings are already stored
+    # (a few known links can be pinned/promoted postings above new ones)
+    KNOWN_LINK_STREAK = 3
+
+    def __init__(self, session_manager=None, driver_pool=None, max_workers=3, source_timeout=120,
+                 readiness_profiles=None, extraction_mode='snapshot', fetch_strategies=None,
+                 max_pages=20, page_concurrency=3, max_scrolls=20, result_cache=None, base_urls=None,
+                 adapters=None, block_resources=True, resource_rules=None):
+        """Initialize JobScraper with optional session_manager and shared driver_pool
+
+        max_workers bounds how many sources scrape_all runs at once in parallel
+        mode, and source_timeout is each source's wall-clock deadline in seconds.
+        readiness_profiles overrides the per-source page readiness tuning.
+        extraction_mode is 'snapshot' (parse one page_source offline) or 'live'
+        (query each card through WebDriver). fetch_strategies maps a source to
+        'http' (plain GET first, Chrome only as a fallback) or 'browser'.
+        max_pages/page_concurrency bound page-number crawls and max_scrolls
+        bounds infinite-scroll loading. result_cache (a ResultCache) lets
+        repeated searches reuse recent results; None disables caching.
+        base_urls overrides the root URL of individual sources. adapters
+        (SourceAdapter instances) replaces the registered set of sources.
+        block_resources keeps Chrome from loading images, fonts, analytics
+        and ads; resource_rules adjusts the blocked URL patterns per source
+        (see ResourceBlocker).
+        """
+        self.adapters = {adapter.name: adapter for adapter in adapters} if adapters else dict(ADAPTERS)
+        self.SOURCE_NAMES = {name: adapter.display_name for name, adapter in self.adapters.items()}
+
+        self.max_workers = max_workers
+        self.source_timeout = source_timeout
+        # Readiness waits for each adapter's own job card selector, with the adapter's tuning
+        profiles = dict(readiness_profiles or {})
+        for name, adapter in self.adapters.items():
+            card = {'selector': adapter.selectors['card']} if 'card' in adapter.selectors else {}
+            profiles[name] = {**card, **(adapter.readiness or {}), **profiles.get(name, {})}
+        self.readiness = PageReadiness(profiles)
+        self.extraction_mode = extraction_mode
+        self.fetch_strategies = {
+            **{name: adapter.fetch for name, adapter in self.adapters.items()},
+            **(fetch_strategies or {})
+        }
+        self.max_pages = max_pages
+        self.page_concurrency = page_concurrency
+        self.max_scrolls = max_scrolls
+        self.result_cache = result_cache
+        self.base_urls = {
+            **{name: adapter.base_url for name, adapter in self.adapters.items()},
+            **(base_urls or {})
+        }
+        self.resource_blocker = ResourceBlocker(self.adapters, resource_rules) if block_resources else None
+        # Caps requests in flight per host across every scrape sharing this scraper
+        self._host_slots = {name: threading.BoundedSemaphore(adapter.max_concurrency)
+                            for name, adapter in self.adapters.items()}
+
         if session_manager is None:
             # Create a new SessionManager with DBSession
             self.session_manager = SessionManager(DBSession)
         else:
             self.session_manager = session_manager
 
+        if driver_pool is None:
+            # Private pool; the Flask app passes one shared by all scrape threads
+            self.driver_pool = DriverPool(self.setup_selenium)
+        else:
+            self.driver_pool = driver_pool
+
     def setup_selenium(self):
         """Setup Chrome driver with headless options"""
         chrome_options = Options()
@@ -29,8 +117,13 @@ class JobScraper:
         chrome_options.add_argument('--window-size=1920,1080')
         chrome_options.add_argument(
             '--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
+        if self.resource_blocker is not None:
+            self.resource_blocker.configure_options(chrome_options)
 
-        driver = webdriver.Chrome(options=chrome_options)
+        with STAGE_SECONDS.time(stage='driver_launch', source='all'):
+            driver = webdriver.Chrome(options=chrome_options)
+        # Don't let a stalled site hold a pooled driver for Chrome's 300s default
+        driver.set_page_load_timeout(60)
         return driver
 
     # def scrape_all(self, keyword, sources, session_id):
@@ -68,444 +161,442 @@ class JobScraper:
     #     print(f"\nTotal jobs found and saved: {total_jobs}")
     #     return total_jobs
 
-    def scrape_jobinja(self, keyword, max_results=30):
-        """Scrape jobs from Jobinja with date extraction"""
-        jobs = []
-        base_url = "https://jobinja.ir"
-
-        try:
-            driver = self.setup_selenium()
-
-            search_url = f"{base_url}/jobs?filters%5Bkeywords%5D%5B%5D={keyword}&page=1"
-            driver.get(search_url)
-
-            wait = WebDriverWait(driver, 20)
-            wait.until(EC.presence_of_element_located((By.CLASS_NAME, "c-jobListView__title")))
-
-            time.sleep(3)
-
-            job_cards = driver.find_elements(By.CSS_SELECTOR, "li.c-jobListView__item")
-            print(f"Found {len(job_cards)} job cards on Jobinja")
-
-            for card in job_cards[:max_results]:
-                try:
-                    # Extract title and date together
-                    title_elem = card.find_element(By.CSS_SELECTOR, "h2.c-jobListView__title")
-                    title_link = title_elem.find_element(By.CSS_SELECTOR, "a.c-jobListView__titleLink")
-                    title = title_link.text.strip()
-                    link = title_link.get_attribute("href")
+    def scrape_jobinja(self, keyword, max_results=30, known_links=None):
+        """Shorthand for scrape_source('jobinja', ...)"""
+        return self.scrape_source('jobinja', keyword, max_results, known_links)
 
-                    # Extract date from the span
-                    date = ""
-                    try:
-                        date_span = title_elem.find_element(By.CSS_SELECTOR, "span.c-jobListView__passedDays")
-                        date_text = date_span.text.strip()
-                        # Remove parentheses
-                        date = date_text.replace('(', '').replace(')', '').strip()
-                    except:
-                        pass
-
-                    # # Extract company
-                    # company = "نامشخص"
-                    # try:
-                    #     company_elem = card.find_element(By.CSS_SELECTOR, "span.c-jobListView__company")
-                    #     company = company_elem.text.strip()
-                    # except:
-                    #     pass
-                    #
-                    # # Extract location
-                    # location = "تهران"
-                    # try:
-                    #     location_elem = card.find_element(By.CSS_SELECTOR, "span.c-jobListView__locationText")
-                    #     location = location_elem.text.strip()
-                    # except:
-                    #     pass
-
-                    # Extract company (first <li> > <span> inside the <ul>)
-                    company = "نامشخص"
-                    try:
-                        # Selector: Targets the <span> in the first <li> of the <ul>
-                        company_elem = card.find_element(By.CSS_SELECTOR,
-                                                         "ul.o-listView__itemComplementInfo > li:first-child > span")
-                        company = company_elem.text.strip()  # Strips extra spaces; result: "تجارت الکترونیک پارسیان | Parsian E-commerce"
-                    except:
-                        pass  # Or log an error: print("Company not found")
-
-                    # Extract location/city (second <li> > <span> inside the <ul>)
-                    location = "unknown"
-                    try:
-                        # Selector: Targets the <span> in the second <li> of the <ul>
-                        location_elem = card.find_element(By.CSS_SELECTOR,
-                                                          "ul.o-listView__itemComplementInfo > li:nth-child(2) > span")
-                        location = location_elem.text.strip()  # Strips extra spaces; result: "تهران، تهران"
-                    except:
-                        pass  # Or log an error: print("Location not found")
-
-                    job_data = {
-                        'title': title,
-                        'company': company,
-                        'location': location,
-                        'link': link,
-                        'date': date,
-                        'source': 'jobinja'
-                    }
-
-                    jobs.append(job_data)
-                    print(f"Found: {title} at {company} - {date}")
-
-                except Exception as e:
-                    print(f"Error extracting job from card: {e}")
-                    continue
-
-            driver.quit()
-
-        except Exception as e:
-            print(f"Error scraping Jobinja: {e}")
-            import traceback
-            traceback.print_exc()
+    def scrape_jobvision(self, keyword, max_results=30, known_links=None):
+        """Shorthand for scrape_source('jobvision', ...)"""
+        return self.scrape_source('jobvision', keyword, max_results, known_links)
 
-        return jobs
+    def scrape_irantalent(self, keyword, max_results=30, known_links=None):
+        """Shorthand for scrape_source('irantalent', ...)"""
+        return self.scrape_source('irantalent', keyword, max_results, known_links)
 
-    def scrape_jobvision(self, keyword, max_results=30):
-        """Fixed Jobvision scraper with proper date extraction"""
-        jobs = []
-        base_url = "https://jobvision.ir"
+    def _scrape_page(self, source, search_url, max_results, known_links=None):
+        """Scrape one listing URL: over HTTP when the source allows it, else in Chrome
 
-        try:
-            search_url = f"{base_url}/jobs/keyword/{keyword}"
-            print(f"Scraping Jobvision: {search_url}")
+        Infinite-scroll sources are scrolled until max_results cards are
+        loaded. Errors are logged and yield [].
+        """
+        adapter = self.adapters[source]
+        name = adapter.display_name
+        base_url = self.base_urls[source]
+        logger.info("Scraping %s: %s", name, search_url)
 
-            driver = self.setup_selenium()
-            driver.get(search_url)
-
-            print("Waiting for page to load...")
+        driver = None
+        with self._host_slots[source]:
             try:
-                wait = WebDriverWait(driver, 20)
-                wait.until(
-                    EC.presence_of_element_located((By.TAG_NAME, "job-card"))
-                )
-                print("Job cards detected!")
-            except:
-                print("Timeout waiting for job cards")
-
-            time.sleep(3)
-            driver.execute_script("window.scrollTo(0, 1000);")
-            time.sleep(2)
-
-            job_elements = driver.find_elements(By.TAG_NAME, "job-card")
-            print(f"Found {len(job_elements)} job elements")
-
-            for element in job_elements[:max_results]:
-                try:
-                    # Find the job link within the job-card
-                    job_link = element.find_element(By.CSS_SELECTOR, 'a[href*="/jobs/"]')
-                    href = job_link.get_attribute('href')
-                    if not href or '/jobs/' not in href:
-                        continue
-
-                    # Make sure we have full URL
-                    if not href.startswith('http'):
-                        href = base_url + href
-
-                    card = element
-
-                    title = "نامشخص"
-                    company = "نامشخص"
-                    date = ""
-
-                    try:
-                        title_elem = card.find_element(By.CSS_SELECTOR, '.job-card-title')
-                        title = title_elem.text.strip()
-                    except:
-                        pass
-
-                    try:
-                        company_elem = card.find_element(By.CSS_SELECTOR, 'a[href*="/companies/"]')
-                        company = company_elem.text.strip()
-                    except:
-                        pass
-
-                    # Extract location and date
-                    location = "unknown"
-                    try:
-                        # Target the container <div> with stable classes
-                        location_div = card.find_element(By.CSS_SELECTOR,
-                                                         'div.d-flex.flex-wrap.align-items-center.text-secondary.line-height-24')
-
-                        # Get the first <span> inside it (which contains the location text)
-                        location_span = location_div.find_element(By.CSS_SELECTOR,
-                                                                  'span.text-secondary.pointer-events-none.ng-star-inserted')
-
-                        # Extract and clean the text (e.g., "اصفهان ، مارنان")
-                        full_location = location_span.text.strip()
-
-                        # Split by Persian comma to get just the city (first part), e.g., "اصفهان"
-                        if '،' in full_location:
-                            location = full_location.split('،')[0].strip()
-                        else:
-                            location = full_location  # Fallback if no comma
-                    except Exception as e:
-                        # Optional: Log the error for debugging (e.g., if structure changes)
-                        print(f"Error extracting location: {e}")
-                        pass
-
-                    try:
-                        # Look for date in spans with gray color
-                        date_elements = card.find_elements(By.CSS_SELECTOR, 'span[style*="color: #8E9CB2"]')
-                        for elem in date_elements:
-                            text = elem.text.strip()
-                            if any(word in text for word in
-                                   ['روز پیش', 'ساعت پیش', 'هفته پیش', 'ماه پیش', 'دیروز', 'امروز']):
-                                date = text
-                                break
-
-                        # Alternative: look in all spans if not found
-                        if not date:
-                            all_spans = card.find_elements(By.TAG_NAME, "span")
-                            for span in all_spans:
-                                text = span.text.strip()
-                                if any(word in text for word in
-                                       ['روز پیش', 'ساعت پیش', 'هفته پیش', 'ماه پیش', 'دیروز', 'امروز']):
-                                    date = text
-                                    break
-                    except:
-                        pass
-
-                    if title != "نامشخص":
-                        job_data = {
-                            'title': title,
-                            'company': company,
-                            'location': location,
-                            'link': href,
-                            'date': date,
-                            'source': 'jobvision'
-                        }
-                        jobs.append(job_data)
-                        print(f"Found: {title} at {company} - {date}")
-
-                except Exception as e:
-                    print(f"Error extracting job: {e}")
-                    continue
-
-            driver.quit()
-
-        except Exception as e:
-            print(f"Jobvision scraper error: {e}")
-            import traceback
-            traceback.print_exc()
-
-        return jobs
-
-    def scrape_irantalent(self, keyword, max_results=30):
-        """Fixed IranTalent scraper with proper date extraction"""
+                if self.fetch_strategies.get(source) == 'http':
+                    http_jobs = self._scrape_http(source, search_url, max_results, base_url)
+                    if http_jobs is not None:
+                        return http_jobs
+
+                with STAGE_SECONDS.time(stage='driver_acquire', source=source):
+                    driver = self.driver_pool.acquire()
+                if self.resource_blocker is not None:
+                    self.resource_blocker.apply(driver, source)
+                with STAGE_SECONDS.time(stage='page_load', source=source):
+                    driver.get(search_url)
+
+                self.readiness.wait(driver, source)
+                if adapter.pagination == 'scroll':
+                    self._scroll_for_more(driver, source, max_results, known_links)
+
+                if self.extraction_mode == 'snapshot':
+                    with STAGE_SECONDS.time(stage='extraction', source=source):
+                        jobs = adapter.parse(driver.page_source, max_results, base_url)
+                    logger.info("Parsed %d jobs from %s page snapshot", len(jobs), name)
+                    return jobs
+
+                with STAGE_SECONDS.time(stage='extraction', source=source):
+                    return adapter.extract_live(driver, max_results, base_url)
+            except Exception as e:
+                logger.exception("Error scraping %s: %s", name, e)
+                return []
+            finally:
+                self.driver_pool.release(driver)
+
+    def _crawl_pages(self, source, scrape_page, max_results, known_links=None):
+        """Collect jobs from numbered pages, fetching several pages at a time
+
+        Page 1 is fetched alone; its size tells how many more pages are needed,
+        and those are fetched in parallel batches of at most page_concurrency.
+        The crawl stops at max_results, at max_pages, or at the first page
+        that adds no new links. In a delta crawl (known_links given) pages are
+        fetched one by one and the crawl also stops at the first page that
+        reaches already-stored listings.
+        """
         jobs = []
-        base_url = "https://www.irantalent.com"
-
-        try:
-            # Check if keyword contains multiple words
-            if ' ' in keyword.strip():
-                # Multiple words - use search format with dashes
-                keyword_formatted = keyword.strip().replace(' ', '-')
-                search_url = f"{base_url}/jobs/search?keyword={keyword_formatted}&language=persian"
-            else:
-                # Single word - use simple format
-                search_url = f"{base_url}/jobs/{keyword}"
-
-            print(f"Scraping IranTalent: {search_url}")
-
-            driver = self.setup_selenium()
-            driver.get(search_url)
-
-            print("Waiting for page to load...")
-            try:
-                wait = WebDriverWait(driver, 20)
-                wait.until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, 'a[href*="/job/"]'))
-                )
-                print("Job elements detected!")
-            except:
-                print("Timeout waiting for job elements")
-
-            time.sleep(3)
-            driver.execute_script("window.scrollTo(0, 1000);")
-            time.sleep(2)
-
-            job_elements = driver.find_elements(By.CSS_SELECTOR, 'a[href*="/job/"]')
-            print(f"Found {len(job_elements)} job elements")
-
-            for element in job_elements[:max_results]:
-                try:
-                    href = element.get_attribute('href')
-                    if not href or '/job/' not in href:
-                        continue
-
-                    card = element
-                    for _ in range(5):
-                        parent = card.find_element(By.XPATH, '..')
-                        if 'card' in parent.get_attribute('class') or 'position' in parent.get_attribute('class'):
-                            card = parent
+        seen = set()
+
+        def merge(page_jobs):
+            new_jobs = [job for job in page_jobs if job.get('link') not in seen]
+            for job in new_jobs:
+                seen.add(job.get('link'))
+            jobs.extend(new_jobs)
+            return len(new_jobs)
+
+        def reached_known(page_jobs):
+            return known_links is not None and self._reached_known(
+                [job.get('link') for job in page_jobs], known_links)
+
+        first_page = scrape_page(1)
+        per_page = merge(first_page)
+        next_page = 2
+        concurrency = 1 if known_links is not None else min(self.page_concurrency,
+                                                              self.adapters[source].max_concurrency)
+
+        if per_page and len(jobs) < max_results and self.max_pages > 1 and not reached_known(first_page):
+            with ThreadPoolExecutor(max_workers=concurrency,
+                                    thread_name_prefix=f'{source}-pages') as executor:
+                while len(jobs) < max_results and next_page <= self.max_pages:
+                    pages_needed = -(-(max_results - len(jobs)) // per_page)
+                    last_page = min(next_page + min(pages_needed, concurrency), self.max_pages + 1)
+                    batch = range(next_page, last_page)
+                    next_page = last_page
+
+                    # Merge in page order so an empty page ends the crawl deterministically
+                    exhausted = False
+                    for page_jobs in executor.map(bound_to_context(scrape_page), batch):
+                        if not merge(page_jobs) or reached_known(page_jobs):
+                            exhausted = True
                             break
-                        card = parent
-
-                    title = "نامشخص"
-                    company = "نامشخص"
-                    location = "تهران"
-                    salary = ""
-                    date = ""
-
-                    try:
-                        title_elem = card.find_element(By.CSS_SELECTOR, 'p.position-title, .position-title')
-                        title = title_elem.text.strip()
-                    except:
-                        pass
-
-                    try:
-                        company_elem = card.find_element(By.CSS_SELECTOR, 'p.color-light-black')
-                        company = company_elem.text.strip()
-                    except:
-                        pass
-
-                    # Extract location and date from job-info div
-                    try:
-                        job_info = card.find_element(By.CSS_SELECTOR, 'div.job-info')
-                        spans = job_info.find_elements(By.CSS_SELECTOR, 'span.color-gray')
-
-                        if len(spans) >= 1:
-                            location = spans[0].text.strip()
-
-                        # The date is usually the last span with "روز پیش" or similar
-                        for span in reversed(spans):
-                            text = span.text.strip()
-                            if any(word in text for word in
-                                   ['روز پیش', 'ساعت پیش', 'هفته پیش', 'ماه پیش', 'دیروز', 'امروز']):
-                                date = text
-                                break
-                    except:
-                        pass
-
-                    if title != "نامشخص":
-                        job_data = {
-                            'title': title,
-                            'company': company,
-                            'location': location,
-                            'link': href,
-                            'salary': salary,
-                            'date': date,
-                            'source': 'irantalent'
-                        }
-                        jobs.append(job_data)
-                        print(f"Found: {title} at {company} - {date}")
-
-                except Exception as e:
-                    print(f"Error extracting job: {e}")
-                    continue
-
-            driver.quit()
-
-        except Exception as e:
-            print(f"IranTalent scraper error: {e}")
-            import traceback
-            traceback.print_exc()
-
+                    if exhausted:
+                        break
+
+        logger.info("Crawled %d page(s) of %s, %d jobs", next_page - 1, self.SOURCE_NAMES[source], len(jobs))
+        return jobs[:max_results]
+
+    def _scroll_for_more(self, driver, source, max_results, known_links=None):
+        """Scroll an infinite-scroll listing until it holds max_results cards or stops growing
+
+        In a delta crawl (known_links given) scrolling also stops once the
+        loaded cards reach listings already stored.
+        """
+        selector = self.readiness.profile(source)['selector']
+        count = driver.execute_script("return document.querySelectorAll(arguments[0]).length", selector)
+
+        scrolls = 0
+        while count < max_results and scrolls < self.max_scrolls:
+            if known_links is not None and self._reached_known(
+                    driver.execute_script(_CARD_LINKS_SCRIPT, selector), known_links):
+                logger.info("Reached stored listings on %s after %d card(s)", self.SOURCE_NAMES[source], count)
+                break
+
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            new_count = self.readiness.wait_for_more(driver, source, count)
+            scrolls += 1
+            if new_count <= count:
+                break
+            count = new_count
+
+        if scrolls:
+            logger.info("Scrolled %d time(s) on %s, %d cards loaded", scrolls, self.SOURCE_NAMES[source], count)
+        return count
+
+    def _reached_known(self, links, known_links):
+        """True if links contain KNOWN_LINK_STREAK consecutive stored links (or end in one)"""
+        streak = 0
+        for link in links:
+            streak = streak + 1 if link in known_links else 0
+            if streak >= self.KNOWN_LINK_STREAK:
+                return True
+        # A short page that ends in stored links has nothing new after them either
+        return 0 < len(links) < self.KNOWN_LINK_STREAK and streak == len(links)
+
+    def _scrape_http(self, source, url, max_results, base_url):
+        """Fetch a listing page without a browser
+
+        Returns None when the page can't be used as-is (request failed, or no
+        cards and no results container in the raw HTML, i.e. the listing is
+        rendered by JavaScript) so the caller falls back to Selenium. A
+        rendered listing without cards (no matches, or past the last page)
+        returns [].
+        """
+        adapter = self.adapters[source]
+        with STAGE_SECONDS.time(stage='http_fetch', source=source):
+            html = fetch_html(url, timeout=adapter.http_timeout)
+        if html is None:
+            return None
+
+        with STAGE_SECONDS.time(stage='extraction', source=source):
+            jobs = adapter.parse(html, max_results, base_url)
+        if not jobs:
+            if adapter.is_rendered_listing(html):
+                logger.info("No listings on %s page", self.SOURCE_NAMES[source])
+                return []
+            logger.info("No cards in %s HTML, falling back to Chrome", self.SOURCE_NAMES[source])
+            return None
+
+        logger.info("Parsed %d jobs from %s over HTTP", len(jobs), self.SOURCE_NAMES[source])
         return jobs
 
     def clear_session_jobs(self, session_id):
         """Clear all jobs for a specific session"""
-        db = DBSession()
-        try:
-            # Delete in batches to avoid locking issues
-            jobs_to_delete = db.query(JobListing).filter_by(session_id=session_id).all()
-            count = len(jobs_to_delete)
-
-            for job in jobs_to_delete:
-                db.delete(job)
-
-            db.commit()
-            print(f"Cleared {count} jobs for session {session_id}")
-        except Exception as e:
-            db.rollback()
-            print(f"Error clearing session jobs: {e}")
-        finally:
-            db.close()
+        session_manager = self.session_manager or SessionManager(DBSession)
+        return session_manager.clear_session_jobs(session_id)
 
     def save_jobs(self, jobs, search_keyword, session_id=None):
-        """Save jobs to database using SQLAlchemy"""
-        if session_id and self.session_manager:
-            return self.session_manager.save_session_jobs(session_id, jobs, search_keyword)
-        else:
-            # Fallback to regular save without session
-            db = DBSession()
-            saved_count = 0
-
-            try:
-                for job in jobs:
-                    try:
-                        city_value = job.get('city') or job.get('location') or 'نامشخص'
-
-                        existing = db.query(JobListing).filter_by(link=job.get('link', '')).first()
-
-                        if not existing:
-                            job_listing = JobListing(
-                                title=job.get('title', 'نامشخص'),
-                                company=job.get('company', 'نامشخص'),
-                                city=city_value,
-                                link=job.get('link', ''),
-                                source=job.get('source', ''),
-                                search_keyword=search_keyword
-                            )
-                            db.add(job_listing)
-                            saved_count += 1
+        """Save jobs to database in one bulk upsert, optionally tied to a session"""
+        session_manager = self.session_manager or SessionManager(DBSession)
+        return session_manager.save_session_jobs(session_id, jobs, search_keyword)
+
+    def scrape_all(self, keyword, sources, max_results_per_site=30, session_id=None,
+                   parallel=True, max_workers=None, source_timeout=None, cancel_event=None,
+                   on_source_done=None, force_refresh=False):
+        """Scrape all selected sources
+
+        In parallel mode the sources run concurrently and results are merged as
+        each one finishes; otherwise they run one at a time. Either way a
+        source that misses its deadline is reported as failed and its late
+        results are dropped. Setting cancel_event stops
+        the scrape at the next source boundary without saving anything.
+        on_source_done(source, jobs) is called as soon as each source finishes,
+        with jobs=None when that source failed or timed out. Sources with a
+        fresh entry in result_cache are served from it unless force_refresh.
+        """
+        search_started = time.perf_counter()
 
-                    except Exception as e:
-                        print(f"Error saving job: {e}")
-                        continue
-
-                db.commit()
-            finally:
-                db.close()
-
-            return saved_count
-
-    def scrape_all(self, keyword, sources, max_results_per_site=30, session_id=None):
-        """Scrape all selected sources"""
         # Clear previous results for this session if session_id provided
         if session_id and self.session_manager:
             self.session_manager.clear_session_jobs(session_id)
 
+        sources = [source for source in self.SOURCE_NAMES if source in sources]
         all_jobs = []
 
-        if 'jobinja' in sources:
-            print("Scraping Jobinja...")
-            try:
-                jobinja_jobs = self.scrape_jobinja(keyword, max_results_per_site)
-                all_jobs.extend(jobinja_jobs)
-                print(f"✅ Found {len(jobinja_jobs)} jobs on Jobinja")
-            except Exception as e:
-                print(f"❌ Error scraping Jobinja: {e}")
+        # Another session may have run the same search recently
+        cached = []
+        if self.result_cache is not None and not force_refresh:
+            for source in sources:
+                jobs = self.result_cache.get(source, keyword, max_results_per_site)
+                if jobs is not None:
+                    logger.info("Using %d cached jobs for %s", len(jobs), self.SOURCE_NAMES[source],
+                                extra={'source': source})
+                    cached.append((source, jobs))
+
+        cached_sources = {source for source, _ in cached}
+        to_scrape = [source for source in sources if source not in cached_sources]
+
+        if not to_scrape:
+            scraped = iter(())
+        elif parallel and len(to_scrape) > 1:
+            scraped = ((source, jobs) for (_, source), jobs in self._scrape_parallel(
+                [(keyword, source) for source in to_scrape], max_results_per_site,
+                max_workers or self.max_workers, source_timeout or self.source_timeout, cancel_event))
+        else:
+            scraped = self._scrape_sequential(keyword, to_scrape, max_results_per_site,
+                                              source_timeout or self.source_timeout, cancel_event)
 
-        if 'jobvision' in sources:
-            print("Scraping Jobvision...")
-            try:
-                jobvision_jobs = self.scrape_jobvision(keyword, max_results_per_site)
-                all_jobs.extend(jobvision_jobs)
-                print(f"✅ Found {len(jobvision_jobs)} jobs on Jobvision")
-            except Exception as e:
-                print(f"❌ Error scraping Jobvision: {e}")
+        for source, jobs in chain(cached, scraped):
+            self._record_result(source, keyword, max_results_per_site, jobs, source in cached_sources)
+            if on_source_done is not None:
+                on_source_done(source, jobs)
+            if jobs:
+                all_jobs.extend(jobs)
 
-        if 'irantalent' in sources:
-            print("Scraping IranTalent...")
-            try:
-                irantalent_jobs = self.scrape_irantalent(keyword, max_results_per_site)
-                all_jobs.extend(irantalent_jobs)
-                print(f"✅ Found {len(irantalent_jobs)} jobs on IranTalent")
-            except Exception as e:
-                print(f"❌ Error scraping IranTalent: {e}")
+        if cancel_event is not None and cancel_event.is_set():
+            logger.info("Scrape cancelled, results discarded")
+            STAGE_SECONDS.observe(time.perf_counter() - search_started, stage='search', source='all')
+            return 0
 
         # Save to database
         if all_jobs:
             saved = self.save_jobs(all_jobs, keyword, session_id)
-            print(f"💾 Total jobs found: {len(all_jobs)}, Successfully saved: {saved}")
+            logger.info("Total jobs found: %d, successfully saved: %d", len(all_jobs), saved)
         else:
-            print("⚠️ No jobs found from any source")
+            logger.warning("No jobs found from any source")
 
+        STAGE_SECONDS.observe(time.perf_counter() - search_started, stage='search', source='all')
         return len(all_jobs)
+
+    def scrape_batch(self, keywords, sources, max_results_per_site=30, session_id=None, max_workers=None,
+                     source_timeout=None, cancel_event=None, on_search_done=None, force_refresh=False):
+        """Scrape many keywords across the selected sources in one run
+
+        Every (keyword, source) search runs on one thread pool, so the batch
+        shares the driver pool and pooled HTTP connections instead of paying
+        browser start-up per keyword. Links found under several keywords are
+        kept once (first keyword wins) and everything is written with a single
+        bulk upsert at the end. on_search_done(keyword, source, jobs) is called
+        as each search finishes, with jobs=None on failure. Returns a summary
+        dict; nothing is saved if cancel_event is set.
+        """
+        batch_started = time.perf_counter()
+
+        if session_id and self.session_manager:
+            self.session_manager.clear_session_jobs(session_id)
+
+        # Case/whitespace variants of a keyword are the same search
+        unique_keywords = {}
+        for keyword in keywords:
+            keyword = ' '.join(str(keyword).split())
+            if keyword:
+                unique_keywords.setdefault(normalize_keyword(keyword), keyword)
+        keywords = list(unique_keywords.values())
+        sources = [source for source in self.SOURCE_NAMES if source in sources]
+
+        cached = []
+        to_scrape = []
+        for keyword in keywords:
+            for source in sources:
+                jobs = None
+                if self.result_cache is not None and not force_refresh:
+                    jobs = self.result_cache.get(source, keyword, max_results_per_site)
+                if jobs is not None:
+                    cached.append(((keyword, source), jobs))
+                else:
+                    to_scrape.append((keyword, source))
+        cached_tasks = {task for task, _ in cached}
+
+        scraped = iter(())
+        if to_scrape:
+            scraped = self._scrape_parallel(to_scrape, max_results_per_site, max_workers or self.max_workers,
+                                            source_timeout or self.source_timeout, cancel_event)
+
+        jobs_by_link = {}
+        found = 0
+        failed = []
+        for (keyword, source), jobs in chain(cached, scraped):
+            self._record_result(source, keyword, max_results_per_site, jobs, (keyword, source) in cached_tasks)
+            if on_search_done is not None:
+                on_search_done(keyword, source, jobs)
+            if jobs is None:
+                failed.append({'keyword': keyword, 'source': source})
+                continue
+
+            found += len(jobs)
+            for job in jobs:
+                link = job.get('link')
+                if link and link not in jobs_by_link:
+                    jobs_by_link[link] = {**job, 'search_keyword': keyword}
+
+        summary = {
+            'keywords': len(keywords),
+            'searches': len(keywords) * len(sources),
+            'failed': failed,
+            'jobs_found': found,
+            'unique_jobs': len(jobs_by_link),
+            'saved': 0,
+        }
+
+        if cancel_event is not None and cancel_event.is_set():
+            logger.info("Batch cancelled, results discarded")
+        elif jobs_by_link:
+            summary['saved'] = self.save_jobs(list(jobs_by_link.values()), keywords[0], session_id)
+
+        elapsed = time.perf_counter() - batch_started
+        summary['elapsed'] = round(elapsed, 2)
+        summary['jobs_per_minute'] = round(summary['saved'] * 60 / elapsed, 1) if elapsed else 0.0
+        STAGE_SECONDS.observe(elapsed, stage='batch', source='all')
+        logger.info("Batch finished", extra={'fields': summary})
+        return summary
+
+    def _record_result(self, source, keyword, max_results, jobs, from_cache):
+        """Count a finished search and cache fresh non-empty results"""
+        if from_cache:
+            SOURCE_RESULTS.inc(source=source, outcome='cached')
+            return
+
+        SOURCE_RESULTS.inc(source=source, outcome='ok' if jobs else 'empty' if jobs is not None else 'failed')
+        JOBS_SCRAPED.inc(len(jobs or []), source=source)
+        # Scrapers return [] on errors, so only non-empty results are cached
+        if jobs and self.result_cache is not None:
+            self.result_cache.put(source, keyword, max_results, jobs)
+
+    def scrape_source(self, source, keyword, max_results=30, known_links=None):
+        """Scrape one source for one keyword; known_links makes it a delta crawl
+
+        Sources paginated by page number are crawled page by page (see
+        _crawl_pages); the others are one listing URL, scrolled if needed.
+        """
+        adapter = self.adapters[source]
+        base_url = self.base_urls[source]
+        with log_context(source=source), STAGE_SECONDS.time(stage='scrape', source=source):
+            logger.info("Scraping %s...", adapter.display_name)
+            if adapter.pagination == 'pages':
+                def scrape_page(page):
+                    return self._scrape_page(source, adapter.search_url(base_url, keyword, page), max_results)
+
+                return self._crawl_pages(source, scrape_page, max_results, known_links)
+
+            return self._scrape_page(source, adapter.search_url(base_url, keyword), max_results, known_links)
+
+    def _source_timeout(self, source, default):
+        return self.adapters[source].source_timeout or default
+
+    def _scrape_sequential(self, keyword, sources, max_results, source_timeout, cancel_event=None):
+        """Yield (source, jobs) for each source, one after another; jobs is None on failure
+
+        Each source runs on its own worker thread under the same deadline as
+        in parallel mode, so a source that hangs is abandoned and the next
+        one still starts.
+        """
+        for source in sources:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            for (_, source), jobs in self._scrape_parallel([(keyword, source)], max_results, 1, source_timeout,
+                                                          cancel_event):
+                yield source, jobs
+
+    def _scrape_parallel(self, tasks, max_results, max_workers, source_timeout, cancel_event=None):
+        """Yield ((keyword, source), jobs) as each search finishes on a thread pool; jobs is None on failure"""
+        started = {}
+
+        def run(task):
+            started[task] = time.monotonic()
+            keyword, source = task
+            return self.scrape_source(source, keyword, max_results)
+
+        executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='scrape')
+        # Source threads log under the caller's job id
+        run = bound_to_context(run)
+        futures = {executor.submit(run, task): task for task in tasks}
+        pending = set(futures)
+
+        try:
+            while pending:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+
+                # Deadlines count from when a source starts, not while it is queued
+                now = time.monotonic()
+                timeouts = []
+                for future in list(pending):
+                    task = futures[future]
+                    if task not in started:
+                        timeouts.append(0.5)
+                        continue
+
+                    remaining = started[task] + self._source_timeout(task[1], source_timeout) - now
+                    if remaining <= 0 and not future.done():
+                        pending.discard(future)
+                        source = task[1]
+                        logger.error("Error scraping %s: timed out after %ss", self.SOURCE_NAMES[source],
+                                     self._source_timeout(source, source_timeout), extra={'source': source})
+                        yield task, None
+                    else:
+                        timeouts.append(max(remaining, 0))
+
+                if not pending:
+                    break
+                if cancel_event is not None:
+                    timeouts.append(0.5)  # Wake up to notice a cancellation
+
+                done, pending = wait(pending, timeout=min(timeouts), return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = futures[future]
+                    source = task[1]
+                    name = self.SOURCE_NAMES[source]
+                    try:
+                        jobs = future.result()
+                    except Exception as e:
+                        logger.error("Error scraping %s: %s", name, e, extra={'source': source})
+                        yield task, None
+                        continue
+
+                    logger.info("Found %d jobs on %s", len(jobs), name, extra={'source': source})
+                    yield task, jobs
+        finally:
+            # Timed-out scrapes keep their thread until they return their driver
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,146 @@
+# log_setup.py
+"""Leveled, structured logging that never blocks scrape threads on I/O.
+
+configure_logging() routes every logger through a QueueHandler; a single
+QueueListener thread does the formatting and writing. The scrape job id
+and source are carried in context variables (see log_context) and stamped
+on each record in the thread that logged it, so lines from parallel
+sources can be told apart.
+
+Modules log with logging.getLogger(__name__) and pass structured fields
+with extra={'fields': {...}}.
+"""
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+
+_job_id = contextvars.ContextVar('job_id', default=None)
+_source = contextvars.ContextVar('source', default=None)
+
+_listener = None
+
+
+@contextmanager
+def log_context(job_id=None, source=None):
+    """Tag log records from this thread (and bound_to_context callables) with a job id and/or source"""
+    tokens = []
+    if job_id is not None:
+        tokens.append((_job_id, _job_id.set(job_id)))
+    if source is not None:
+        tokens.append((_source, _source.set(source)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def bound_to_context(fn):
+    """Wrap fn to run in a copy of the caller's log context, e.g. on a thread pool"""
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        # Each call gets its own copy so concurrent calls don't share a Context
+        return context.copy().run(fn, *args, **kwargs)
+
+    return run
+
+
+class ContextFilter(logging.Filter):
+    """Copy the current job id and source onto the record unless passed in extra"""
+
+    def filter(self, record):
+        if not getattr(record, 'job_id', None):
+            record.job_id = _job_id.get()
+        if not getattr(record, 'source', None):
+            record.source = _source.get()
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    """time level logger [job=... source=...] message key=value ..."""
+
+    def format(self, record):
+        context = ' '.join(f'{key}={value}' for key, value in (
+            ('job', record.job_id), ('source', record.source)) if value)
+        fields = ' '.join(f'{key}={value}' for key, value in getattr(record, 'fields', {}).items())
+        line = (f"{datetime.fromtimestamp(record.created).strftime('%Y-%m-%d %H:%M:%S')} "
+                f"{record.levelname:<7} {record.name}"
+                f"{f' [{context}]' if context else ''} {record.getMessage()}"
+                f"{f' {fields}' if fields else ''}")
+        if record.exc_text:
+            line += '\n' + record.exc_text
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'job_id': record.job_id,
+            'source': record.source,
+            **getattr(record, 'fields', {}),
+        }
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _ContextQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        """Merge args into the message and render the traceback before the record crosses threads"""
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+def configure_logging(level='INFO', fmt='text', stream=None):
+    """Send all logging through a background queue listener; safe to call more than once"""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+
+    log_queue = queue.SimpleQueue()
+    handler = _ContextQueueHandler(log_queue)
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    # Selenium and urllib3 are chatty at DEBUG
+    for noisy in ('selenium', 'urllib3'):
+        logging.getLogger(noisy).setLevel(max(root.level, logging.INFO))
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,158 @@
+# metrics.py
+"""Process-wide counters and histograms in the Prometheus text format.
+
+A deliberately small, dependency-free subset of prometheus_client: labelled
+Counter, Gauge and Histogram metrics registered in REGISTRY, rendered by
+REGISTRY.render() for the /api/metrics endpoint. Every update takes a
+short lock, so metrics are safe to touch from scrape threads.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; spans a fast HTTP parse up to a source hitting its deadline
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._samples(key, value))
+        return lines
+
+    def _samples(self, key, value):
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry['counts'][index] += 1
+                    break
+            entry['sum'] += value
+            entry['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block, even if it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self, key, entry):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, entry['counts']):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f'{self.name}_sum{labels} {_format_value(entry["sum"])}')
+        lines.append(f'{self.name}_count{labels} {entry["count"]}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# Scrape pipeline. Stages: driver_launch, driver_acquire, http_fetch, page_load,
+# readiness_wait, scroll_wait, extraction, scrape (whole source), search, save, dedup, recrawl.
+# Stages that aren't tied to one source use source="all".
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'jobscraper_stage_seconds', 'Time spent in each scrape stage', ['stage', 'source']))
+SOURCE_RESULTS = REGISTRY.register(Counter(
+    'jobscraper_source_results_total', 'Source scrapes by outcome (ok, empty, failed, cached)',
+    ['source', 'outcome']))
+JOBS_SCRAPED = REGISTRY.register(Counter(
+    'jobscraper_jobs_scraped_total', 'Job listings returned by each source', ['source']))
+JOBS_SAVED = REGISTRY.register(Counter(
+    'jobscraper_jobs_saved_total', 'Job rows written to the database', ['operation']))
+
+# Flask endpoints, labelled by URL rule rather than raw path to bound cardinality
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'jobscraper_http_request_seconds', 'Flask request handling time', ['endpoint', 'method', 'status']))
+
+# Point-in-time state, refreshed when /api/metrics is scraped
+DRIVER_POOL = REGISTRY.register(Gauge(
+    'jobscraper_driver_pool_drivers', 'Chrome drivers in the pool by state', ['state']))
+SCHEDULER = REGISTRY.register(Gauge(
+    'jobscraper_scheduler_jobs', 'Scrape jobs in the scheduler by state', ['state']))
+RESULT_CACHE = REGISTRY.register(Gauge(
+    'jobscraper_result_cache', 'Result cache entries and lookups', ['kind']))
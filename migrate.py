@@ -0,0 +1,37 @@
+# migrate.py
+"""Bring an existing data/jobs.db up to the current schema
+
+The migration_*.py scripts must run in this order: later steps read columns
+earlier ones add, the jobs table rebuild copies whatever columns exist, and
+re-clustering needs session-scoped links and the dedup key table. Every step
+checks what is already there, so running this again is safe; the last step
+re-clusters every job, so it takes longer on a large database.
+"""
+from migration_add_date import add_date_column
+from migration_add_session_index import add_session_index
+from migration_add_posted_at import add_posted_at_columns
+from migration_add_listing_indexes import add_listing_indexes
+from migration_add_cluster_id import add_cluster_id
+from migration_session_scoped_links import drop_global_link_unique
+from migration_recluster_jobs import recluster_jobs
+
+MIGRATIONS = [
+    ('migration_add_date', add_date_column),
+    ('migration_add_session_index', add_session_index),
+    ('migration_add_posted_at', add_posted_at_columns),
+    ('migration_add_listing_indexes', add_listing_indexes),
+    ('migration_add_cluster_id', add_cluster_id),
+    ('migration_session_scoped_links', drop_global_link_unique),
+    ('migration_recluster_jobs', recluster_jobs),
+]
+
+
+def migrate():
+    for name, migration in MIGRATIONS:
+        print(f"Running {name}")
+        migration()
+    print("Database is up to date")
+
+
+if __name__ == "__main__":
+    migrate()
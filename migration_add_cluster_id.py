@@ -0,0 +1,41 @@
+# migration_add_cluster_id.py
+from models import engine, Session as DBSession
+from dedup import NearDuplicateDetector
+from sqlalchemy import text
+
+
+def add_cluster_id(batch_size=500):
+    """Add the cluster_id column and index existing jobs for duplicate detection"""
+    with engine.connect() as conn:
+        # Check if column exists
+        result = conn.execute(text("PRAGMA table_info(jobs)"))
+        columns = [row[1] for row in result]
+
+        if 'cluster_id' not in columns:
+            conn.execute(text("ALTER TABLE jobs ADD COLUMN cluster_id INTEGER"))
+            print("Added cluster_id column to jobs table")
+
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_jobs_session_cluster ON jobs (session_id, cluster_id, id)"
+        ))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_jobs_cluster ON jobs (cluster_id)"))
+        conn.commit()
+
+        job_ids = [row[0] for row in conn.execute(text(
+            "SELECT id FROM jobs WHERE cluster_id IS NULL ORDER BY id"
+        ))]
+
+    # Batches go through the dedup key index, so the backfill stays linear in the table size
+    detector = NearDuplicateDetector(chunk_size=batch_size)
+    db = DBSession()
+    try:
+        for start in range(0, len(job_ids), batch_size):
+            detector.assign_clusters(db, job_ids[start:start + batch_size])
+            db.commit()
+        print(f"Assigned duplicate clusters for {len(job_ids)} jobs")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    add_cluster_id()
@@ -0,0 +1,22 @@
+# migration_add_listing_indexes.py
+from models import engine
+from sqlalchemy import text
+
+
+def add_listing_indexes():
+    """Add composite indexes used by paginated /api/jobs to existing database"""
+    with engine.connect() as conn:
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_jobs_session_active_posted "
+            "ON jobs (session_id, is_active, posted_at, id)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_jobs_session_active_source_posted "
+            "ON jobs (session_id, is_active, source, posted_at, id)"
+        ))
+        conn.commit()
+        print("Ensured composite listing indexes on jobs table")
+
+
+if __name__ == "__main__":
+    add_listing_indexes()
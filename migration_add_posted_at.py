@@ -0,0 +1,51 @@
+# migration_add_posted_at.py
+from models import engine, Session as DBSession
+from session_manager import SessionManager
+from sqlalchemy import text
+from datetime import datetime
+
+
+def add_posted_at_columns(batch_size=1000):
+    """Add posted_at/age_days columns and backfill them from date_posted"""
+    with engine.connect() as conn:
+        # Check if columns exist
+        result = conn.execute(text("PRAGMA table_info(jobs)"))
+        columns = [row[1] for row in result]
+
+        if 'posted_at' not in columns:
+            conn.execute(text("ALTER TABLE jobs ADD COLUMN posted_at DATETIME"))
+            print("Added posted_at column to jobs table")
+        if 'age_days' not in columns:
+            conn.execute(text("ALTER TABLE jobs ADD COLUMN age_days FLOAT"))
+            print("Added age_days column to jobs table")
+
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_jobs_posted_at ON jobs (posted_at)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_jobs_age_days ON jobs (age_days)"))
+        conn.commit()
+
+        # Posting age is relative to when the row was scraped, i.e. created_at
+        manager = SessionManager(DBSession)
+        rows = conn.execute(text(
+            "SELECT id, date_posted, created_at FROM jobs "
+            "WHERE posted_at IS NULL AND date_posted IS NOT NULL"
+        )).fetchall()
+
+        updates = []
+        for job_id, date_posted, created_at in rows:
+            if isinstance(created_at, str):
+                created_at = datetime.fromisoformat(created_at)
+            posted_at, age_days = manager.posted_at_from_text(date_posted, created_at)
+            if posted_at is not None:
+                updates.append({'id': job_id, 'posted_at': posted_at, 'age_days': age_days})
+
+        for start in range(0, len(updates), batch_size):
+            conn.execute(
+                text("UPDATE jobs SET posted_at = :posted_at, age_days = :age_days WHERE id = :id"),
+                updates[start:start + batch_size]
+            )
+        conn.commit()
+        print(f"Backfilled posted_at for {len(updates)} of {len(rows)} jobs")
+
+
+if __name__ == "__main__":
+    add_posted_at_columns()
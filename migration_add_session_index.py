@@ -0,0 +1,24 @@
+# migration_add_session_index.py
+from models import engine
+from sqlalchemy import text
+
+
+def add_session_index():
+    """Add index on user_sessions.last_accessed to existing database"""
+    with engine.connect() as conn:
+        # Check if index exists
+        result = conn.execute(text("PRAGMA index_list(user_sessions)"))
+        indexes = [row[1] for row in result]
+
+        if 'ix_user_sessions_last_accessed' not in indexes:
+            conn.execute(text(
+                "CREATE INDEX ix_user_sessions_last_accessed ON user_sessions (last_accessed)"
+            ))
+            conn.commit()
+            print("Added ix_user_sessions_last_accessed index")
+        else:
+            print("ix_user_sessions_last_accessed index already exists")
+
+
+if __name__ == "__main__":
+    add_session_index()
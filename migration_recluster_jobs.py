@@ -0,0 +1,37 @@
+# migration_recluster_jobs.py
+from models import engine, Session as DBSession
+from dedup import NearDuplicateDetector
+from sqlalchemy import inspect, text
+
+
+def recluster_jobs(batch_size=500):
+    """Rebuild every duplicate cluster with the current matching rules
+
+    Clusters built before matches were limited to the same company, title
+    and session, and to different sources, can hold unrelated jobs, so
+    cluster ids are cleared and jobs are placed again, oldest first. Placing
+    every job also rebuilds its dedup keys, so the keys of the old
+    job_lsh_buckets table (now job_dedup_keys) are dropped rather than copied.
+    """
+    with engine.begin() as conn:
+        if inspect(conn).has_table('job_lsh_buckets'):
+            conn.execute(text("DROP TABLE job_lsh_buckets"))
+            print("Dropped job_lsh_buckets; dedup keys are rebuilt in job_dedup_keys")
+        conn.execute(text("UPDATE jobs SET cluster_id = NULL"))
+        job_ids = [row[0] for row in conn.execute(text("SELECT id FROM jobs ORDER BY id"))]
+    print(f"Cleared duplicate clusters of {len(job_ids)} jobs")
+
+    detector = NearDuplicateDetector(chunk_size=batch_size)
+    db = DBSession()
+    try:
+        for start in range(0, len(job_ids), batch_size):
+            detector.assign_clusters(db, job_ids[start:start + batch_size])
+            db.commit()
+        duplicates = db.execute(text("SELECT COUNT(*) FROM jobs WHERE cluster_id != id")).scalar()
+        print(f"Re-clustered {len(job_ids)} jobs; {duplicates} are duplicates of an earlier posting")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    recluster_jobs()
@@ -0,0 +1,72 @@
+# migration_session_scoped_links.py
+from models import engine, FTS_SCHEMA, FTS_TRIGGERS, JobListing
+from sqlalchemy import inspect, text
+
+
+def _link_only(columns):
+    return list(columns) == ['link']
+
+
+def drop_global_link_unique():
+    """Let each session keep its own row for a link; (session_id, link) stays unique
+
+    SQLite can't drop a table constraint, so there the jobs table is rebuilt
+    from the current model with ids (and so jobs_fts rowids) preserved.
+    """
+    if engine.dialect.name != 'sqlite':
+        inspector = inspect(engine)
+        with engine.begin() as conn:
+            for constraint in inspector.get_unique_constraints('jobs'):
+                if _link_only(constraint['column_names']):
+                    conn.execute(text(f"ALTER TABLE jobs DROP CONSTRAINT {constraint['name']}"))
+                    print(f"Dropped unique constraint {constraint['name']}")
+            for index in inspector.get_indexes('jobs'):
+                if index['unique'] and _link_only(index['column_names']):
+                    conn.execute(text(f"DROP INDEX {index['name']}"))
+                    print(f"Dropped unique index {index['name']}")
+        return
+
+    with engine.begin() as conn:
+        indexes = conn.execute(text("PRAGMA index_list(jobs)")).fetchall()
+        # (seq, name, unique, origin, partial); origin 'u' is a UNIQUE table constraint
+        link_unique = []
+        for _, name, unique, origin, _ in indexes:
+            index_columns = [row[2] for row in conn.execute(text(f"PRAGMA index_info('{name}')"))]
+            if unique and _link_only(index_columns):
+                link_unique.append((name, origin))
+        if not link_unique:
+            print("jobs.link is already unique per session only")
+            return
+
+        if all(origin == 'c' for _, origin in link_unique):
+            for name, _ in link_unique:
+                conn.execute(text(f'DROP INDEX "{name}"'))
+            print("Dropped the global unique index on jobs.link")
+            return
+
+        columns = [row[1] for row in conn.execute(text("PRAGMA table_info(jobs)"))]
+        columns = [column.name for column in JobListing.__table__.columns if column.name in columns]
+
+        # Triggers and named indexes would follow the renamed table
+        for trigger in FTS_TRIGGERS:
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+        for _, name, _, origin, _ in indexes:
+            if origin == 'c':
+                conn.execute(text(f'DROP INDEX "{name}"'))
+
+        conn.execute(text("ALTER TABLE jobs RENAME TO jobs_old"))
+        JobListing.__table__.create(conn)
+        column_list = ', '.join(columns)
+        conn.execute(text(f"INSERT INTO jobs ({column_list}) SELECT {column_list} FROM jobs_old"))
+        conn.execute(text("DROP TABLE jobs_old"))
+
+        fts = conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs_fts'")).first()
+        if fts:
+            for statement in FTS_SCHEMA[1:]:
+                conn.exec_driver_sql(statement)
+        count = conn.execute(text("SELECT COUNT(*) FROM jobs")).scalar()
+        print(f"Rebuilt jobs table ({count} jobs) with links unique per session")
+
+
+if __name__ == "__main__":
+    drop_global_link_unique()
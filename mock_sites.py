@@ -0,0 +1,316 @@
+# mock_sites.py
+"""Local stand-ins for Jobinja, Jobvision and IranTalent.
+
+Serves listing pages with the same markup the parsers expect, so the whole
+scrape pipeline can be exercised and load-tested without touching the real
+sites. Each source gets its own port (base port, +1, +2):
+
+- Jobinja: server-rendered, page-number pagination (?page=N)
+- Jobvision / IranTalent: an empty shell whose cards are fetched and
+  rendered by JavaScript, with more loaded on scroll (infinite scroll)
+
+Every response can be delayed (--latency, --jitter), JavaScript rendering
+can be slowed (--render-delay) and a fraction of requests can fail
+(--error-rate). Job data is deterministic per keyword, and the same
+position appears on several sources so duplicate detection gets exercised.
+
+    python mock_sites.py --port 8500 --latency 0.1 --error-rate 0.02
+    SOURCE_BASE_URLS=jobinja=http://127.0.0.1:8500,jobvision=http://127.0.0.1:8501,\
+irantalent=http://127.0.0.1:8502 python app.py
+"""
+import argparse
+import html
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+SOURCES = ['jobinja', 'jobvision', 'irantalent']
+
+TITLES = ['برنامه‌نویس {kw}', 'کارشناس ارشد {kw}', 'Senior {kw} Developer', 'کارآموز {kw}',
+          'مدیر فنی ({kw})', 'توسعه‌دهنده {kw}', 'کارشناس پشتیبانی {kw}', 'تحلیلگر {kw}']
+COMPANIES = ['دیجی‌کالا', 'اسنپ', 'کافه بازار', 'تپسی', 'علی‌بابا', 'سپیدار سیستم', 'همکاران سیستم',
+             'ایرانسل', 'آسان پرداخت', 'فناپ', 'دیوار', 'زرین پال', 'ابر آروان', 'سرآمد']
+CITIES = ['تهران', 'اصفهان', 'شیراز', 'مشهد', 'تبریز', 'کرج']
+DATES = ['امروز', 'دیروز', '۲ روز پیش', '۵ روز پیش', '۱ هفته پیش', '۳ روز پیش', '۲ هفته پیش']
+
+
+class MockConfig:
+    """Behaviour shared by all mock sites"""
+
+    def __init__(self, total_jobs=120, page_size=20, latency=0.0, jitter=0.0, render_delay=0.3,
+                 error_rate=0.0, error_status=503, server_render=False, seed=None):
+        self.total_jobs = total_jobs
+        self.page_size = page_size
+        self.latency = latency
+        self.jitter = jitter
+        self.render_delay = render_delay
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.server_render = server_render
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.errors = 0
+
+    def next_request(self):
+        """Count a request; returns (delay in seconds, whether it should fail)"""
+        with self._lock:
+            self.requests += 1
+            fail = self.random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+            return self.latency + self.random.uniform(0, self.jitter), fail
+
+
+def mock_job(source, keyword, index):
+    """Deterministic job; the same index on two sources is the same position"""
+    rng = random.Random(f'{keyword}:{index}')
+    return {
+        'source': source,
+        'id': 1000 + index,
+        'title': rng.choice(TITLES).format(kw=keyword),
+        'company': rng.choice(COMPANIES),
+        'city': rng.choice(CITIES),
+        'date': rng.choice(DATES),
+    }
+
+
+def jobinja_card(job):
+    e = html.escape
+    slug = quote(job['title'].replace(' ', '-'))
+    return f'''<li class="o-listView__item o-listView__item--hasIndicator c-jobListView__item">
+ <div class="o-listView__itemWrap c-jobListView__itemWrap u-clearFix"><div class="o-listView__itemInfo">
+  <h2 class="o-listView__itemTitle c-jobListView__title">
+   <a class="c-jobListView__titleLink" href="/companies/co-{job['id']}/jobs/J{job['id']}/{slug}">{e(job['title'])}</a>
+   <span class="c-jobListView__passedDays">({job['date']})</span>
+  </h2>
+  <ul class="o-listView__itemComplementInfo c-jobListView__meta">
+   <li class="c-jobListView__metaItem"><span>{e(job['company'])}</span></li>
+   <li class="c-jobListView__metaItem"><span>{job['city']} ، {job['city']}</span></li>
+  </ul>
+ </div></div>
+</li>'''
+
+
+def jobvision_card(job):
+    e = html.escape
+    return f'''<job-card class="col-12 row mx-auto ng-star-inserted"><div class="job-card">
+ <a href="/jobs/{job['id']}/{quote(job['title'].replace(' ', '-'))}"><div class="job-card-title">{e(job['title'])}</div></a>
+ <a href="/companies/{job['id']}/co">{e(job['company'])}</a>
+ <div class="d-flex flex-wrap align-items-center text-secondary line-height-24">
+  <span class="text-secondary pointer-events-none ng-star-inserted">{job['city']} ، مرکز</span>
+ </div>
+ <span style="color: #8E9CB2">{job['date']}</span>
+</div></job-card>'''
+
+
+def irantalent_card(job):
+    e = html.escape
+    return f'''<div class="position-card card">
+ <a href="/fa/job/{job['id']}/{quote(job['title'].replace(' ', '-'))}">
+  <p class="position-title">{e(job['title'])}</p>
+  <p class="color-light-black">{e(job['company'])}</p>
+  <div class="job-info"><span class="color-gray">{job['city']}</span><span class="color-gray">{job['date']}</span></div>
+ </a>
+</div>'''
+
+
+CARD_RENDERERS = {
+    'jobinja': jobinja_card,
+    'jobvision': jobvision_card,
+    'irantalent': irantalent_card,
+}
+
+PAGE_TEMPLATE = '''<!DOCTYPE html>
+<html lang="fa" dir="rtl"><head><meta charset="utf-8"><title>{title}</title>
+<style>job-card, .c-jobListView__item, .position-card {{display: block; min-height: 120px; margin: 8px;}}</style>
+</head><body>
+<header><nav><a href="/">خانه</a></nav></header>
+<main>{body}</main>
+{script}
+</body></html>
+'''
+
+# Loads cards from /api/cards after render_delay, then more each time the page is scrolled to the bottom
+INFINITE_SCROLL_SCRIPT = '''<script>
+(function () {{
+    var keyword = {keyword}, offset = 0, loading = false, done = false;
+    function load() {{
+        if (loading || done) return;
+        loading = true;
+        setTimeout(function () {{
+            fetch('/api/cards?keyword=' + encodeURIComponent(keyword) + '&offset=' + offset)
+                .then(function (response) {{ return response.json(); }})
+                .then(function (data) {{
+                    document.getElementById('list').insertAdjacentHTML('beforeend', data.html);
+                    offset += data.count;
+                    done = !data.more;
+                    loading = false;
+                }})
+                .catch(function () {{ loading = false; }});
+        }}, {delay});
+    }}
+    window.addEventListener('scroll', function () {{
+        if (window.innerHeight + window.scrollY >= document.body.scrollHeight - 200) load();
+    }});
+    load();
+}})();
+</script>'''
+
+
+class MockSiteHandler(BaseHTTPRequestHandler):
+    source = None
+    config = None
+
+    def do_GET(self):
+        delay, fail = self.config.next_request()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            return self._send(self.config.error_status, 'text/plain', 'Injected error')
+
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        keyword = self._keyword(url.path, query)
+
+        if url.path == '/api/cards':
+            offset = int(query.get('offset', ['0'])[0])
+            return self._send(200, 'application/json', json.dumps(self._cards(keyword, offset)))
+
+        if keyword is None:
+            return self._send(200, 'text/html; charset=utf-8',
+                              PAGE_TEMPLATE.format(title='Job', body='<p>آگهی شغلی</p>', script=''))
+
+        return self._send(200, 'text/html; charset=utf-8', self._listing(keyword, query))
+
+    def _keyword(self, path, query):
+        """Search keyword from this source's URL scheme, or None for other pages"""
+        if self.source == 'jobinja' and path == '/jobs':
+            return query.get('filters[keywords][]', [''])[0]
+        if self.source == 'jobvision' and path.startswith('/jobs/keyword/'):
+            return unquote(path[len('/jobs/keyword/'):])
+        if self.source == 'irantalent':
+            if path == '/jobs/search':
+                return query.get('keyword', [''])[0].replace('-', ' ')
+            if path.startswith('/jobs/'):
+                return unquote(path[len('/jobs/'):])
+        if path == '/api/cards':
+            return query.get('keyword', [''])[0]
+        return None
+
+    def _cards(self, keyword, offset):
+        end = min(offset + self.config.page_size, self.config.total_jobs)
+        render = CARD_RENDERERS[self.source]
+        return {
+            'html': '\n'.join(render(mock_job(self.source, keyword, i)) for i in range(offset, end)),
+            'count': max(end - offset, 0),
+            'more': end < self.config.total_jobs,
+        }
+
+    def _listing(self, keyword, query):
+        render = CARD_RENDERERS[self.source]
+
+        if self.source == 'jobinja':
+            page = max(int(query.get('page', ['1'])[0] or 1), 1)
+            start = (page - 1) * self.config.page_size
+            end = min(start + self.config.page_size, self.config.total_jobs)
+            cards = ''.join(render(mock_job(self.source, keyword, i)) for i in range(start, end))
+            body = f'<ul class="o-listView__list c-jobListView__list">{cards}</ul>'
+            script = ''
+        elif self.config.server_render:
+            cards = ''.join(render(mock_job(self.source, keyword, i)) for i in range(self.config.total_jobs))
+            # Same results container as the real server-rendered pages
+            container = 'job-list' if self.source == 'jobvision' else 'positions-list'
+            body = f'<div class="{container}">{cards}</div>'
+            script = ''
+        else:
+            body = '<div id="list"></div>'
+            script = INFINITE_SCROLL_SCRIPT.format(keyword=json.dumps(keyword),
+                                                   delay=int(self.config.render_delay * 1000))
+
+        return PAGE_TEMPLATE.format(title=html.escape(keyword), body=body, script=script)
+
+    def _send(self, status, content_type, text):
+        payload = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # Quiet under load
+
+
+class MockSites:
+    """Runs one mock server per source on consecutive ports in background threads"""
+
+    def __init__(self, config=None, host='127.0.0.1', port=8500):
+        self.config = config or MockConfig()
+        self.host = host
+        self.port = port
+        self._servers = []
+
+    @property
+    def base_urls(self):
+        """Source -> root URL, in the shape JobScraper(base_urls=...) takes"""
+        return {source: f'http://{self.host}:{server.server_address[1]}'
+                for source, server in zip(SOURCES, self._servers)}
+
+    def start(self):
+        for offset, source in enumerate(SOURCES):
+            handler = type(f'{source.title()}Handler', (MockSiteHandler,),
+                           {'source': source, 'config': self.config})
+            port = self.port + offset if self.port else 0  # Port 0: any free port
+            server = ThreadingHTTPServer((self.host, port), handler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name=f'mock-{source}', daemon=True).start()
+            self._servers.append(server)
+        return self
+
+    def stop(self):
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        self._servers = []
+
+    def env_value(self):
+        """SOURCE_BASE_URLS value pointing app.py at these servers"""
+        return ','.join(f'{source}={url}' for source, url in self.base_urls.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve mock Jobinja/Jobvision/IranTalent listing pages')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8500, help='Jobinja port; Jobvision and IranTalent use +1, +2')
+    parser.add_argument('--total-jobs', type=int, default=120, help='listings per keyword and source')
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random delay up to this many seconds')
+    parser.add_argument('--render-delay', type=float, default=0.3,
+                        help='seconds before JavaScript-rendered cards appear')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests that fail')
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--server-render', action='store_true',
+                        help='render Jobvision/IranTalent cards in the HTML instead of with JavaScript')
+    args = parser.parse_args()
+
+    config = MockConfig(total_jobs=args.total_jobs, page_size=args.page_size, latency=args.latency,
+                        jitter=args.jitter, render_delay=args.render_delay, error_rate=args.error_rate,
+                        error_status=args.error_status, server_render=args.server_render)
+    sites = MockSites(config, args.host, args.port).start()
+    print(f"Mock sites running; start the app with:\nSOURCE_BASE_URLS={sites.env_value()}")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        sites.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,52 @@
 # models.py
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Text, UniqueConstraint
+import os
+from sqlalchemy import create_engine, event, Column, Integer, BigInteger, String, DateTime, Boolean, Text, Float, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, scoped_session
 from datetime import datetime
+from persian_text import normalize_persian
 
 Base = declarative_base()
 
-# Database setup
-engine = create_engine('sqlite:///data/jobs.db', echo=False)
-Session = sessionmaker(bind=engine)
+# Database setup; point DATABASE_URL at a server database to move off SQLite
+DATABASE_URL = os.environ.get('DATABASE_URL', 'sqlite:///data/jobs.db')
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+
+
+def _engine_options(url):
+    if url.startswith('sqlite'):
+        # Connections are shared across scrape and request threads via the pool
+        return {'connect_args': {'check_same_thread': False, 'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000}}
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_pre_ping': True,
+        'pool_recycle': 1800,
+    }
+
+
+engine = create_engine(DATABASE_URL, echo=False, **_engine_options(DATABASE_URL))
+
+
+if engine.dialect.name == 'sqlite':
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """WAL lets readers run alongside the single writer instead of blocking on it"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+        cursor.execute('PRAGMA cache_size=-20000')  # ~20 MB page cache per connection
+        cursor.execute('PRAGMA mmap_size=268435456')  # 256 MB
+        cursor.execute('PRAGMA temp_store=MEMORY')
+        cursor.close()
+
+        # Used by the jobs_fts triggers, so every connection that writes jobs needs it
+        dbapi_connection.create_function('persian_normalize', 1, normalize_persian, deterministic=True)
+
+
+# Thread-local sessions: each request or scrape thread gets its own
+Session = scoped_session(sessionmaker(bind=engine))
 
 
 class JobListing(Base):
@@ -18,27 +56,120 @@ class JobListing(Base):
     title = Column(String(200))
     company = Column(String(200))
     city = Column(String(100))
-    link = Column(String(500), unique=True)
+    link = Column(String(500))  # Unique per session; see _session_link_uc
     source = Column(String(50))
     search_keyword = Column(String(100))
     date_posted = Column(String(100))  # Add this field for the Persian date text
+    posted_at = Column(DateTime, index=True)  # Absolute posting time derived from date_posted; NULL if unknown
+    age_days = Column(Float, index=True)  # Age in days of the posting when it was saved
     created_at = Column(DateTime, default=datetime.now)
     is_active = Column(Boolean, default=True)
     session_id = Column(String(100), index=True)  # Add session support
+    cluster_id = Column(Integer)  # Shared by near-duplicate postings across sources; see dedup.py
 
     __table_args__ = (
         UniqueConstraint('session_id', 'link', name='_session_link_uc'),
+        # Keyset pagination of a session's listing, with and without a source filter
+        Index('ix_jobs_session_active_posted', 'session_id', 'is_active', 'posted_at', 'id'),
+        Index('ix_jobs_session_active_source_posted', 'session_id', 'is_active', 'source', 'posted_at', 'id'),
+        # Collapsing duplicates within a session, and merging clusters
+        Index('ix_jobs_session_cluster', 'session_id', 'cluster_id', 'id'),
+        Index('ix_jobs_cluster', 'cluster_id'),
     )
 
 
+class JobDedupKey(Base):
+    """One dedup.py blocking key of a job; jobs sharing a key are duplicate candidates"""
+    __tablename__ = 'job_dedup_keys'
+
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, index=True)
+    dedup_key = Column(BigInteger, index=True)
+
+
 class UserSession(Base):
     __tablename__ = 'user_sessions'
 
     session_id = Column(String(100), primary_key=True)
     created_at = Column(DateTime, default=datetime.now)
-    last_accessed = Column(DateTime, default=datetime.now)
+    last_accessed = Column(DateTime, default=datetime.now, index=True)  # Scanned by session expiry
     search_count = Column(Integer, default=0)
 
 
+class TrackedSearch(Base):
+    """A keyword/source pair re-crawled on an interval by recrawl_scheduler.py"""
+    __tablename__ = 'tracked_searches'
+
+    id = Column(Integer, primary_key=True)
+    session_id = Column(String(100))  # Jobs from every crawl are saved under this session
+    keyword = Column(String(100))
+    source = Column(String(50))
+    max_results = Column(Integer, default=200)
+    interval_minutes = Column(Integer, default=60)
+    full_crawl_every = Column(Integer, default=6)  # Every Nth run crawls everything to find removed listings
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=datetime.now)
+    runs = Column(Integer, default=0)
+    last_run_at = Column(DateTime)
+    next_run_at = Column(DateTime, index=True)
+    last_new = Column(Integer, default=0)
+    last_deactivated = Column(Integer, default=0)
+    last_error = Column(Text)
+
+    __table_args__ = (
+        UniqueConstraint('session_id', 'keyword', 'source', name='_tracked_search_uc'),
+    )
+
+
+# SQLite FTS5 index over normalized title/company/city, kept in sync by triggers.
+# session_id is stored unindexed so a search can be limited to one session
+# inside the FTS query.
+FTS_SCHEMA = [
+    """CREATE VIRTUAL TABLE jobs_fts USING fts5(
+        title, company, city, session_id UNINDEXED, tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER jobs_fts_insert AFTER INSERT ON jobs BEGIN
+        INSERT INTO jobs_fts(rowid, title, company, city, session_id) VALUES (
+            new.id, persian_normalize(new.title), persian_normalize(new.company), persian_normalize(new.city),
+            new.session_id);
+    END""",
+    """CREATE TRIGGER jobs_fts_delete AFTER DELETE ON jobs BEGIN
+        DELETE FROM jobs_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER jobs_fts_update AFTER UPDATE OF title, company, city, session_id ON jobs BEGIN
+        DELETE FROM jobs_fts WHERE rowid = old.id;
+        INSERT INTO jobs_fts(rowid, title, company, city, session_id) VALUES (
+            new.id, persian_normalize(new.title), persian_normalize(new.company), persian_normalize(new.city),
+            new.session_id);
+    END""",
+]
+FTS_TRIGGERS = ('jobs_fts_insert', 'jobs_fts_delete', 'jobs_fts_update')
+
+
+def create_fts_index():
+    """Create the jobs_fts table and triggers if missing or outdated, indexing existing rows"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    with engine.begin() as conn:
+        columns = [row[1] for row in conn.exec_driver_sql("PRAGMA table_info(jobs_fts)")]
+        if 'session_id' in columns:
+            return
+        if columns:
+            # Built before searches were limited to a session; rebuild it
+            for trigger in FTS_TRIGGERS:
+                conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+            conn.exec_driver_sql("DROP TABLE jobs_fts")
+
+        for statement in FTS_SCHEMA:
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql(
+            "INSERT INTO jobs_fts(rowid, title, company, city, session_id) "
+            "SELECT id, persian_normalize(title), persian_normalize(company), persian_normalize(city), session_id "
+            "FROM jobs"
+        )
+
+
 # Create tables
-Base.metadata.create_all(engine)
\ No newline at end of file
+Base.metadata.create_all(engine)
+create_fts_index()
\ No newline at end of file
@@ -0,0 +1,154 @@
+# page_readiness.py
+import logging
+import threading
+import time
+from collections import deque
+
+from selenium.common.exceptions import WebDriverException
+
+from metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+# Tuning used for a source without a profile, and under every profile.
+# `selector` matches one job card (JobScraper sets it from each adapter's card
+# selector), `settle` is how long the card count must stay unchanged,
+# `network_idle` is how long the page must go without a new resource request,
+# `scroll` triggers lazy-loaded cards and `scroll_settle` is the settle window
+# used after each infinite-scroll step. Per-site tuning lives on the source
+# adapters (SourceAdapter.readiness).
+DEFAULT_PROFILE = {
+    'selector': 'body',
+    'timeout': 20,
+    'poll': 0.25,
+    'settle': 1.0,
+    'network_idle': 1.5,
+    'scroll': False,
+}
+
+# One round trip returns everything a poll needs
+_PROBE_SCRIPT = """
+return [
+    document.querySelectorAll(arguments[0]).length,
+    document.readyState,
+    performance.getEntriesByType('resource').length
+];
+"""
+
+
+class PageReadiness:
+    """Wait until a listing page has rendered its cards, then get out of the way.
+
+    A page counts as ready as soon as its card count has been stable for the
+    profile's ``settle`` window, or the document has loaded and no new
+    resources have been requested for ``network_idle`` seconds. Every wait is
+    recorded so the actual cost per source can be inspected with ``summary``.
+    """
+
+    def __init__(self, profiles=None, history_size=200):
+        # Every profile is complete: unset keys, the selector included, come from DEFAULT_PROFILE
+        self.profiles = {source: {**DEFAULT_PROFILE, **tuning} for source, tuning in (profiles or {}).items()}
+
+        self.history = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+
+    def profile(self, source):
+        return self.profiles.get(source, DEFAULT_PROFILE)
+
+    def wait(self, driver, source):
+        """Block until the page for `source` is ready; returns the timing record"""
+        profile = self.profile(source)
+        start = time.monotonic()
+
+        ready, reason, cards = self._wait_stable(driver, profile, profile['timeout'])
+
+        if ready and profile['scroll'] and cards:
+            # Cards below the fold load on scroll; wait for the count to settle again
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            _, _, cards = self._wait_stable(driver, profile, profile['settle'] * 4, initial=cards)
+
+        record = {
+            'source': source,
+            'ready': ready,
+            'reason': reason,
+            'cards': cards,
+            'elapsed': round(time.monotonic() - start, 3),
+        }
+        with self._lock:
+            self.history.append(record)
+        STAGE_SECONDS.observe(record['elapsed'], stage='readiness_wait', source=source)
+
+        logger.info("Page ready for %s in %ss (%s, %d cards)", source, record['elapsed'], reason, cards)
+        return record
+
+    def wait_for_more(self, driver, source, previous):
+        """After a scroll, wait until the card count settles; returns the new count"""
+        profile = self.profile(source)
+        start = time.monotonic()
+
+        ready, reason, cards = self._wait_stable(driver, profile, profile['timeout'], initial=previous,
+                                                 settle=profile.get('scroll_settle', profile['settle']))
+
+        elapsed = time.monotonic() - start
+        with self._lock:
+            self.history.append({
+                'source': source,
+                'ready': ready,
+                'reason': f'scroll_{reason}',
+                'cards': cards,
+                'elapsed': round(elapsed, 3),
+            })
+        STAGE_SECONDS.observe(elapsed, stage='scroll_wait', source=source)
+        return cards
+
+    def summary(self):
+        """Average and worst wait time per source over the recorded history"""
+        with self._lock:
+            records = list(self.history)
+
+        summary = {}
+        for record in records:
+            entry = summary.setdefault(record['source'], {'count': 0, 'total': 0.0, 'max': 0.0, 'timeouts': 0})
+            entry['count'] += 1
+            entry['total'] += record['elapsed']
+            entry['max'] = max(entry['max'], record['elapsed'])
+            if not record['ready']:
+                entry['timeouts'] += 1
+
+        for entry in summary.values():
+            entry['avg'] = round(entry.pop('total') / entry['count'], 3)
+        return summary
+
+    def _wait_stable(self, driver, profile, timeout, initial=None, settle=None):
+        """Poll until cards settle or the network goes idle; returns (ready, reason, cards)"""
+        settle = profile['settle'] if settle is None else settle
+        deadline = time.monotonic() + timeout
+        last_cards, cards_since = initial, time.monotonic()
+        last_resources, resources_since = None, time.monotonic()
+        cards = initial or 0
+
+        while True:
+            now = time.monotonic()
+            try:
+                cards, ready_state, resources = driver.execute_script(_PROBE_SCRIPT, profile['selector'])
+            except WebDriverException:
+                # e.g. the page is mid-navigation; probe again next poll
+                cards, ready_state, resources = 0, 'loading', None
+
+            if cards != last_cards:
+                last_cards, cards_since = cards, now
+            if resources != last_resources:
+                last_resources, resources_since = resources, now
+
+            if cards and now - cards_since >= settle:
+                return True, 'cards_stable', cards
+
+            if ready_state == 'complete' and resources is not None \
+                    and now - resources_since >= profile['network_idle']:
+                return True, 'network_idle', cards
+
+            if now >= deadline:
+                return False, 'timeout', cards
+
+            time.sleep(profile['poll'])
@@ -0,0 +1,33 @@
+# persian_text.py
+import re
+
+# Arabic code points that Iranian sites mix with their Persian equivalents
+_CHAR_MAP = {
+    'ي': 'ی',  # Arabic yeh
+    'ى': 'ی',  # Alef maksura
+    'ك': 'ک',  # Arabic kaf
+    'ة': 'ه',  # Teh marbuta
+    'ۀ': 'ه',  # Heh with yeh above
+    'أ': 'ا',
+    'إ': 'ا',
+    'ٱ': 'ا',
+    '\u200c': ' ',  # ZWNJ: "برنامه‌نویس" and "برنامه نویس" should match
+    '\u200d': '',  # ZWJ
+    '\u0640': '',  # Tatweel
+}
+for _digit in range(10):
+    _CHAR_MAP[chr(0x06F0 + _digit)] = str(_digit)  # Persian digits
+    _CHAR_MAP[chr(0x0660 + _digit)] = str(_digit)  # Arabic-Indic digits
+
+_TRANSLATION = str.maketrans(_CHAR_MAP)
+
+# Harakat and other combining marks that don't change the word
+_DIACRITICS = re.compile(r'[\u064b-\u065f\u0670]')
+
+
+def normalize_persian(text):
+    """Canonical form of Persian/English text for indexing and comparison"""
+    if not text:
+        return ''
+    text = _DIACRITICS.sub('', text.translate(_TRANSLATION))
+    return ' '.join(text.lower().split())
@@ -0,0 +1,219 @@
+# recrawl_scheduler.py
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from log_setup import log_context
+from metrics import STAGE_SECONDS
+from models import Session as DBSession, TrackedSearch
+from result_cache import normalize_keyword
+
+logger = logging.getLogger(__name__)
+
+
+def tracked_session_id(keyword):
+    """Session that holds the jobs of every tracked search for a keyword"""
+    return f'tracked:{normalize_keyword(keyword)}'
+
+
+class RecrawlScheduler:
+    """Re-crawls tracked keyword/source pairs on an interval in a background thread.
+
+    Most runs are delta crawls: the scraper is given the links already stored
+    for the search and stops paginating (or scrolling) once it reaches them,
+    so only the newest listings are fetched. A listing that disappeared can
+    only be noticed by looking at everything, so every ``full_crawl_every``-th
+    run (and the first) crawls up to max_results and marks stored listings it
+    no longer sees as inactive.
+    """
+
+    def __init__(self, job_scraper, session_manager, poll_interval=60):
+        self.job_scraper = job_scraper
+        self.session_manager = session_manager
+        self.poll_interval = poll_interval
+
+        self._thread = None
+        self._stop = threading.Event()
+        self._run_lock = threading.Lock()  # One pass over due searches at a time
+
+    def track(self, keyword, source, max_results=200, interval_minutes=60, full_crawl_every=6, session_id=None):
+        """Start tracking a search, or update and re-enable an existing one; returns its dict
+
+        "Python" and "python" are one search: the keyword is stored, crawled
+        and matched against saved jobs in its normalized form.
+        """
+        keyword = normalize_keyword(keyword)
+        session_id = session_id or tracked_session_id(keyword)
+        db = DBSession()
+        try:
+            # Rows stored before keywords were normalized match too, and are normalized now
+            matches = [row for row in db.query(TrackedSearch).filter_by(session_id=session_id, source=source)
+                       .order_by(TrackedSearch.id) if normalize_keyword(row.keyword) == keyword]
+            tracked = next((row for row in matches if row.keyword == keyword), matches[0] if matches else None)
+            if tracked is None:
+                tracked = TrackedSearch(session_id=session_id, keyword=keyword, source=source, runs=0)
+                db.add(tracked)
+            tracked.keyword = keyword
+            tracked.max_results = max_results
+            tracked.interval_minutes = interval_minutes
+            tracked.full_crawl_every = max(1, full_crawl_every)
+            tracked.is_active = True
+            if tracked.next_run_at is None:
+                tracked.next_run_at = datetime.now()
+            db.commit()
+            return self._to_dict(tracked)
+        finally:
+            db.close()
+
+    def untrack(self, tracked_id):
+        """Stop re-crawling a search; its stored jobs are kept. Returns False if unknown"""
+        db = DBSession()
+        try:
+            tracked = db.get(TrackedSearch, tracked_id)
+            if tracked is None:
+                return False
+            tracked.is_active = False
+            db.commit()
+            return True
+        finally:
+            db.close()
+
+    def get(self, tracked_id):
+        db = DBSession()
+        try:
+            tracked = db.get(TrackedSearch, tracked_id)
+            return self._to_dict(tracked) if tracked is not None else None
+        finally:
+            db.close()
+
+    def list(self, include_inactive=False):
+        db = DBSession()
+        try:
+            query = db.query(TrackedSearch)
+            if not include_inactive:
+                query = query.filter(TrackedSearch.is_active == True)
+            return [self._to_dict(tracked) for tracked in query.order_by(TrackedSearch.id)]
+        finally:
+            db.close()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='recrawl-scheduler', daemon=True)
+            self._thread.start()
+        return self
+
+    def shutdown(self):
+        """Stop polling; a crawl in progress finishes first"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_due()
+            except Exception as e:
+                logger.exception("Re-crawl pass failed: %s", e)
+            finally:
+                DBSession.remove()
+            self._stop.wait(self.poll_interval)
+
+    def run_due(self, now=None):
+        """Re-crawl every active tracked search whose next run is due; returns how many ran"""
+        with self._run_lock:
+            now = now or datetime.now()
+            db = DBSession()
+            try:
+                due = [tracked.id for tracked in db.query(TrackedSearch).filter(
+                    TrackedSearch.is_active == True,
+                    TrackedSearch.next_run_at <= now
+                ).order_by(TrackedSearch.next_run_at)]
+            finally:
+                db.close()
+
+            for tracked_id in due:
+                if self._stop.is_set():
+                    break
+                self.run_once(tracked_id)
+            return len(due)
+
+    def run_once(self, tracked_id):
+        """Re-crawl one tracked search now and record the outcome; returns its dict"""
+        # SessionManager closes the thread's scoped session, so work from a snapshot
+        tracked = self.get(tracked_id)
+        if tracked is None:
+            return None
+
+        full = tracked['runs'] % tracked['full_crawl_every'] == 0
+        error = None
+        with log_context(job_id=f"tracked-{tracked_id}", source=tracked['source']), \
+                STAGE_SECONDS.time(stage='recrawl', source=tracked['source']):
+            try:
+                new, deactivated = self._crawl(tracked, full)
+            except Exception as e:
+                logger.exception("Re-crawl of %s on %s failed: %s", tracked['keyword'], tracked['source'], e)
+                new, deactivated, error = 0, 0, str(e)
+
+        db = DBSession()
+        try:
+            row = db.get(TrackedSearch, tracked_id)
+            if row is None:
+                return None
+            now = datetime.now()
+            row.runs += 1
+            row.last_run_at = now
+            row.next_run_at = now + timedelta(minutes=row.interval_minutes)
+            row.last_new = new
+            row.last_deactivated = deactivated
+            row.last_error = error
+            db.commit()
+            return self._to_dict(row)
+        finally:
+            db.close()
+
+    def _crawl(self, tracked, full):
+        """Run one full or delta crawl and save it; returns (new jobs, deactivated jobs)"""
+        session_id, keyword, source = tracked['session_id'], tracked['keyword'], tracked['source']
+        # Keeps the tracked session clear of session expiry
+        self.session_manager.get_or_create_session(session_id)
+        known_links = self.session_manager.get_known_links(session_id, keyword, source)
+
+        jobs = self.job_scraper.scrape_source(
+            source, keyword, tracked['max_results'],
+            known_links=None if full or not known_links else known_links
+        )
+        new_jobs = [job for job in jobs if job.get('link') and job['link'] not in known_links]
+        if jobs:
+            self.job_scraper.save_jobs(jobs, keyword, session_id)
+
+        deactivated = 0
+        # Scrapers return [] on errors, and a capped crawl didn't see the tail
+        # of the listing, so only a complete, non-empty crawl can deactivate
+        if full and jobs and len(jobs) < tracked['max_results']:
+            deactivated = self.session_manager.deactivate_missing(
+                session_id, keyword, source, {job.get('link') for job in jobs})
+
+        logger.info("Re-crawled %s on %s", keyword, source, extra={'fields': {
+            'mode': 'full' if full else 'delta', 'found': len(jobs), 'new': len(new_jobs),
+            'deactivated': deactivated}})
+        return len(new_jobs), deactivated
+
+    @staticmethod
+    def _to_dict(tracked):
+        return {
+            'id': tracked.id,
+            'session_id': tracked.session_id,
+            'keyword': tracked.keyword,
+            'source': tracked.source,
+            'max_results': tracked.max_results,
+            'interval_minutes': tracked.interval_minutes,
+            'full_crawl_every': tracked.full_crawl_every,
+            'is_active': tracked.is_active,
+            'runs': tracked.runs,
+            'last_run_at': tracked.last_run_at.isoformat() if tracked.last_run_at else None,
+            'next_run_at': tracked.next_run_at.isoformat() if tracked.next_run_at else None,
+            'last_new': tracked.last_new,
+            'last_deactivated': tracked.last_deactivated,
+            'last_error': tracked.last_error,
+        }
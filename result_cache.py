@@ -0,0 +1,69 @@
+# result_cache.py
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_keyword(keyword):
+    """Case- and whitespace-insensitive form of a search keyword"""
+    return ' '.join((keyword or '').lower().split())
+
+
+class ResultCache:
+    """In-memory TTL + LRU cache of scraped results shared across sessions.
+
+    Entries are keyed by (source, normalized keyword, max_results) and expire
+    ``ttl`` seconds after they were stored; beyond ``max_entries`` the least
+    recently used entry is evicted. Lookups return copies so callers can't
+    mutate the cached job dicts.
+    """
+
+    def __init__(self, ttl=900, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()  # key -> (stored_at, jobs)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(source, keyword, max_results):
+        return source, normalize_keyword(keyword), int(max_results)
+
+    def get(self, source, keyword, max_results):
+        """Cached jobs for this search, or None on a miss or expired entry"""
+        key = self.make_key(source, keyword, max_results)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return [dict(job) for job in entry[1]]
+
+    def put(self, source, keyword, max_results, jobs):
+        key = self.make_key(source, keyword, max_results)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), [dict(job) for job in jobs])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, keyword=None):
+        """Drop every entry, or only those for one keyword"""
+        with self._lock:
+            if keyword is None:
+                self._entries.clear()
+                return
+            normalized = normalize_keyword(keyword)
+            for key in [key for key in self._entries if key[1] == normalized]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,74 @@
+# scrape_batch.py
+"""Scrape many keywords in one run from the command line.
+
+    python scrape_batch.py dba python devops --sources jobinja jobvision
+    python scrape_batch.py --file roles.txt --max-results 60 --session my-session
+
+Keywords come from the arguments and/or a file with one keyword per line.
+All searches share one driver pool and HTTP connection pool, links found
+under several keywords are stored once, and results are written with one
+bulk upsert. Jobs are saved under --session (visible in the web UI for
+that session id) or without a session.
+"""
+import argparse
+import json
+import os
+import sys
+
+from driver_pool import DriverPool
+from http_client import close_http_session
+from job_scraper import JobScraper, parse_source_urls
+from log_setup import configure_logging, stop_logging
+
+
+def read_keywords(args):
+    keywords = list(args.keywords)
+    if args.file:
+        with open(args.file, encoding='utf-8') as f:
+            keywords += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    return keywords
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Scrape many keywords across job sites in one batch')
+    parser.add_argument('keywords', nargs='*', help='keywords to search')
+    parser.add_argument('--file', help='file with one keyword per line')
+    parser.add_argument('--sources', nargs='+', default=list(JobScraper.SOURCE_NAMES),
+                        choices=list(JobScraper.SOURCE_NAMES))
+    parser.add_argument('--max-results', type=int, default=30, help='results per keyword and source')
+    parser.add_argument('--session', help='session id to save jobs under (its previous jobs are replaced)')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('SCRAPE_WORKERS', 3)),
+                        help='searches run at the same time')
+    parser.add_argument('--drivers', type=int, default=int(os.environ.get('DRIVER_POOL_SIZE', 3)),
+                        help='Chrome drivers shared by the batch')
+    args = parser.parse_args(argv)
+
+    keywords = read_keywords(args)
+    if not keywords:
+        parser.error('no keywords given')
+
+    configure_logging(os.environ.get('LOG_LEVEL', 'INFO'), os.environ.get('LOG_FORMAT', 'text'), stream=sys.stderr)
+
+    scraper = JobScraper(
+        max_workers=args.workers,
+        source_timeout=int(os.environ.get('SOURCE_TIMEOUT', 120)),
+        base_urls=parse_source_urls(os.environ.get('SOURCE_BASE_URLS')),
+        block_resources=os.environ.get('BLOCK_RESOURCES', '1') != '0'
+    )
+    scraper.driver_pool = DriverPool(scraper.setup_selenium, size=args.drivers)
+
+    try:
+        if args.session:
+            scraper.session_manager.get_or_create_session(args.session)
+        summary = scraper.scrape_batch(keywords, args.sources, args.max_results, session_id=args.session)
+    finally:
+        scraper.driver_pool.close()
+        close_http_session()
+        stop_logging()
+
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 1 if summary['failed'] and not summary['saved'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
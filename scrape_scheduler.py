@@ -0,0 +1,322 @@
+# scrape_scheduler.py
+import logging
+import threading
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+
+from log_setup import log_context
+from models import Session as DBSession
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeJob:
+    """One queued or running search (or batch of keywords) and its status"""
+
+    def __init__(self, session_id, keyword, sources, max_results=30, force_refresh=False, keywords=None):
+        self.job_id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.keywords = list(keywords) if keywords else None  # Set for batch jobs
+        self.keyword = keyword or ', '.join(self.keywords or [])
+        self.sources = list(sources)
+        self.max_results = max_results
+        self.force_refresh = force_refresh
+
+        self.status = 'queued'  # queued -> running -> done | failed | cancelled
+        self.message = 'Queued'
+        self.progress = 0
+        self.total_jobs = 0
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.summary = None  # scrape_batch result for batch jobs
+
+        # Progress events for streaming clients; an event's id is its index
+        self.events = []
+        self._event_condition = threading.Condition()
+
+    def add_event(self, event, data):
+        with self._event_condition:
+            if event == 'done':
+                # Listings were only needed live; finished jobs stay in history with counts
+                self.events = [(name, {key: value for key, value in payload.items() if key != 'jobs'})
+                               for name, payload in self.events]
+            self.events.append((event, data))
+            self._event_condition.notify_all()
+
+    def events_since(self, index, timeout=15):
+        """Events from index on, waiting up to timeout for new ones
+
+        Returns (events, finished); finished means no more events will come.
+        """
+        with self._event_condition:
+            if index >= len(self.events) and not self._events_finished():
+                self._event_condition.wait(timeout)
+            return self.events[index:], self._events_finished()
+
+    def _events_finished(self):
+        # The terminal 'done' event is always the last one added
+        return bool(self.events) and self.events[-1][0] == 'done'
+
+    @property
+    def is_active(self):
+        return self.status in ('queued', 'running')
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'keyword': self.keyword,
+            'sources': self.sources,
+            'status': self.status,
+            'is_scraping': self.is_active,
+            'message': self.message,
+            'progress': self.progress,
+            'total_jobs': self.total_jobs,
+            'keywords': self.keywords,
+            'summary': self.summary,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class ScrapeScheduler:
+    """Runs scrape jobs on a bounded set of worker threads.
+
+    Jobs wait in a FIFO queue and at most ``max_concurrent`` run at once.
+    Each session may have one queued or running job; status is tracked per
+    job id and per session, and a job can be cancelled while queued (it is
+    dropped) or running (its scrape stops at the next source boundary).
+    """
+
+    def __init__(self, job_scraper, max_concurrent=2, history_size=100):
+        self.job_scraper = job_scraper
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.history_size = history_size
+
+        self._jobs = OrderedDict()  # job_id -> ScrapeJob, oldest first
+        self._latest = {}  # session_id -> job_id of its most recent job
+        self._queue = deque()
+        self._running = 0
+        self._workers = []
+        self._shutdown = False
+        self._condition = threading.Condition()
+
+    def submit(self, session_id, keyword, sources, max_results=30, force_refresh=False, keywords=None):
+        """Queue a scrape; raises RuntimeError if the session already has one active
+
+        Pass keywords (and keyword=None) to queue a batch over several keywords.
+        """
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError('Scheduler is shut down')
+
+            current = self._jobs.get(self._latest.get(session_id))
+            if current is not None and current.is_active:
+                raise RuntimeError('Scraping already in progress')
+
+            job = ScrapeJob(session_id, keyword, sources, max_results, force_refresh, keywords)
+            self._jobs[job.job_id] = job
+            self._latest[session_id] = job.job_id
+            self._queue.append(job)
+            self._update_queue_messages()
+            self._trim_history()
+            self._start_workers()
+            self._condition.notify()
+            return job
+
+    def get(self, job_id):
+        with self._condition:
+            return self._jobs.get(job_id)
+
+    def latest_for_session(self, session_id):
+        with self._condition:
+            return self._jobs.get(self._latest.get(session_id))
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns False if it already finished"""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or not job.is_active:
+                return False
+
+            job.cancel_event.set()
+            if job.status == 'queued':
+                self._queue.remove(job)
+                self._finish(job, 'cancelled', 'Cancelled')
+                self._update_queue_messages()
+            else:
+                job.message = 'Cancelling...'
+            return True
+
+    def stats(self):
+        with self._condition:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'running': self._running,
+                'queued': len(self._queue),
+            }
+
+    def shutdown(self):
+        """Stop the workers once running jobs finish; queued jobs are cancelled"""
+        with self._condition:
+            self._shutdown = True
+            while self._queue:
+                job = self._queue.popleft()
+                job.cancel_event.set()
+                self._finish(job, 'cancelled', 'Cancelled')
+            self._condition.notify_all()
+
+    def _start_workers(self):
+        """Start worker threads lazily; caller holds the lock"""
+        while len(self._workers) < self.max_concurrent:
+            worker = threading.Thread(target=self._worker, name=f'scrape-worker-{len(self._workers)}')
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._shutdown:
+                    self._condition.wait()
+                if self._shutdown:
+                    return
+
+                job = self._queue.popleft()
+                job.status = 'running'
+                job.message = 'Scraping jobs...'
+                job.progress = 20
+                job.started_at = datetime.now()
+                self._running += 1
+                self._update_queue_messages()
+                job.add_event('status', job.to_dict())
+
+            try:
+                with log_context(job_id=job.job_id):
+                    self._run(job)
+            finally:
+                # Drop this worker's scoped session so its connection returns to the pool
+                DBSession.remove()
+                with self._condition:
+                    self._running -= 1
+
+    def _run(self, job):
+        if job.keywords:
+            return self._run_batch(job)
+
+        finished_sources = []
+
+        def on_source_done(source, jobs):
+            # Push each source's listings to streaming clients before the save
+            finished_sources.append(source)
+            with self._condition:
+                job.progress = 20 + int(75 * len(finished_sources) / max(len(job.sources), 1))
+                job.message = f'Finished {len(finished_sources)} of {len(job.sources)} sources'
+            job.add_event('source', {
+                'source': source,
+                'ok': jobs is not None,
+                'count': len(jobs or []),
+                'progress': job.progress,
+                'message': job.message,
+                'jobs': [self._job_summary(item) for item in jobs or []],
+            })
+
+        logger.info("Starting scrape", extra={'fields': {
+            'keyword': job.keyword, 'sources': ','.join(job.sources), 'max_results': job.max_results}})
+        try:
+            total_jobs = self.job_scraper.scrape_all(
+                job.keyword, job.sources, job.max_results,
+                session_id=job.session_id,
+                cancel_event=job.cancel_event,
+                on_source_done=on_source_done,
+                force_refresh=job.force_refresh
+            )
+            with self._condition:
+                job.total_jobs = total_jobs
+                if job.cancel_event.is_set():
+                    self._finish(job, 'cancelled', 'Cancelled')
+                else:
+                    self._finish(job, 'done', f'Successfully found {total_jobs} jobs')
+        except Exception as e:
+            logger.exception("Scrape job failed: %s", e)
+            with self._condition:
+                self._finish(job, 'failed', f'Error: {str(e)}', progress=0)
+
+    def _run_batch(self, job):
+        searches = len(job.keywords) * len(job.sources)
+        finished = []
+
+        def on_search_done(keyword, source, jobs):
+            finished.append((keyword, source))
+            with self._condition:
+                job.progress = 20 + int(75 * len(finished) / max(searches, 1))
+                job.message = f'Finished {len(finished)} of {searches} searches'
+            # Counts only: a batch can return thousands of listings
+            job.add_event('source', {
+                'keyword': keyword,
+                'source': source,
+                'ok': jobs is not None,
+                'count': len(jobs or []),
+                'progress': job.progress,
+                'message': job.message,
+            })
+
+        logger.info("Starting batch scrape", extra={'fields': {
+            'keywords': len(job.keywords), 'sources': ','.join(job.sources), 'max_results': job.max_results}})
+        try:
+            summary = self.job_scraper.scrape_batch(
+                job.keywords, job.sources, job.max_results,
+                session_id=job.session_id,
+                cancel_event=job.cancel_event,
+                on_search_done=on_search_done,
+                force_refresh=job.force_refresh
+            )
+            with self._condition:
+                job.summary = summary
+                job.total_jobs = summary['unique_jobs']
+                if job.cancel_event.is_set():
+                    self._finish(job, 'cancelled', 'Cancelled')
+                else:
+                    self._finish(job, 'done', f"Successfully found {summary['unique_jobs']} unique jobs "
+                                              f"for {summary['keywords']} keywords")
+        except Exception as e:
+            logger.exception("Batch scrape job failed: %s", e)
+            with self._condition:
+                self._finish(job, 'failed', f'Error: {str(e)}', progress=0)
+
+    def _finish(self, job, status, message, progress=100):
+        job.status = status
+        job.message = message
+        job.progress = progress
+        job.finished_at = datetime.now()
+        job.add_event('done', job.to_dict())
+        logger.info("Scrape job %s: %s", status, message, extra={'job_id': job.job_id})
+
+    @staticmethod
+    def _job_summary(item):
+        """Scraped job dict in the shape /api/jobs returns"""
+        return {
+            'title': item.get('title', 'نامشخص'),
+            'company': item.get('company', 'نامشخص'),
+            'city': item.get('city') or item.get('location') or 'نامشخص',
+            'link': item.get('link', ''),
+            'source': item.get('source', ''),
+            'date_posted': item.get('date') or item.get('date_posted') or 'نامشخص',
+        }
+
+    def _update_queue_messages(self):
+        for position, job in enumerate(self._queue, start=1):
+            job.message = f'Queued (position {position})'
+
+    def _trim_history(self):
+        """Forget the oldest finished jobs beyond history_size; caller holds the lock"""
+        while len(self._jobs) > self.history_size:
+            job_id, job = next(iter(self._jobs.items()))
+            if job.is_active:
+                break
+            del self._jobs[job_id]
+            if self._latest.get(job.session_id) == job_id:
+                del self._latest[job.session_id]
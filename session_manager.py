@@ -1,12 +1,58 @@
 # session_manager.py
-from models import Session as DBSession, JobListing, UserSession
+import base64
+import json
+import logging
+import threading
+from collections import OrderedDict
+from models import Session as DBSession, JobListing, JobDedupKey, UserSession, engine
+from dedup import NearDuplicateDetector
+from metrics import STAGE_SECONDS, JOBS_SAVED
+from persian_text import normalize_persian
 from datetime import datetime, timedelta
-from sqlalchemy import and_, or_, distinct
+from sqlalchemy import and_, or_, distinct, exists, func, select, text, Integer, Float
+from sqlalchemy.orm import aliased
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
 
 
 class SessionManager:
-    def __init__(self, db_session):
+    def __init__(self, db_session, cache_size=1000, duplicate_detector=None):
         self.db_session = db_session
+        self.duplicate_detector = duplicate_detector or NearDuplicateDetector()
+
+        # Per-session aggregates (filters, job count), dropped on every write
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._generation = 0
+
+    def _cached(self, session_id, kind, compute):
+        """Return a cached per-session aggregate, computing it on a miss"""
+        key = (session_id, kind)
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            generation = self._generation
+
+        value = compute()
+
+        with self._cache_lock:
+            # Don't store a value computed while a write was invalidating it
+            if generation != self._generation:
+                return value
+            self._cache[key] = value
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return value
+
+    def invalidate_cache(self, *session_ids):
+        """Forget cached aggregates for the given sessions"""
+        with self._cache_lock:
+            self._generation += 1
+            for key in [key for key in self._cache if key[0] in session_ids]:
+                del self._cache[key]
 
     def parse_persian_date(self, date_text):
         """Convert Persian date text to a sortable value"""
@@ -38,133 +84,427 @@ class SessionManager:
         else:
             return 999
 
-    def get_session_jobs(self, session_id, source=None, city=None, company=None, sort_by='newest'):
-        """Get jobs with sorting options using Persian date parsing"""
+    def posted_at_from_text(self, date_text, reference=None):
+        """Absolute (posted_at, age_days) for a Persian relative date; (None, None) if unknown"""
+        age_days = self.parse_persian_date(date_text)
+        if age_days >= 999:
+            return None, None
+
+        reference = reference or datetime.now()
+        return reference - timedelta(days=age_days), age_days
+
+    def _session_jobs_query(self, db, session_id, source=None, city=None, company=None, collapse=False):
+        """Active jobs of a session with exact-match filters (index friendly)
+
+        With collapse, only the first job (lowest id) of each duplicate
+        cluster is kept. Clusters only join postings from different sources,
+        so a single-source listing is never collapsed.
+        """
+        query = db.query(JobListing).filter_by(
+            session_id=session_id,
+            is_active=True
+        )
+
+        if source:
+            query = query.filter_by(source=source)
+
+        if collapse and not source:
+            # Index lookup on (session_id, cluster_id, id) per row
+            other = aliased(JobListing)
+            earlier = select(other.id).where(
+                other.session_id == session_id,
+                other.is_active == True,
+                other.cluster_id == JobListing.cluster_id,
+                other.id < JobListing.id,
+                other.source != JobListing.source
+            )
+            query = query.filter(~exists(earlier))
+
+        # Filter values come from the /api/filters dropdowns, so match exactly
+        # instead of LIKE '%x%' scans
+        if city:
+            query = query.filter(JobListing.city == city)
+
+        if company:
+            query = query.filter(JobListing.company == company)
+
+        return query
+
+    def get_session_jobs(self, session_id, source=None, city=None, company=None, sort_by='newest', collapse=False):
+        """Get jobs ordered in SQL by their stored posting time"""
         db = DBSession()
         try:
-            query = db.query(JobListing).filter_by(
-                session_id=session_id,
-                is_active=True
-            )
+            query = self._session_jobs_query(db, session_id, source, city, company, collapse)
 
-            if source:
-                query = query.filter_by(source=source)
-
-            if city:
-                query = query.filter(JobListing.city.contains(city))
-
-            if company:
-                query = query.filter(JobListing.company.contains(company))
-
-            jobs = query.all()
-
-            # Convert to dict with date info
-            jobs_data = []
-            for job in jobs:
-                jobs_data.append({
-                    'id': job.id,
-                    'title': job.title,
-                    'company': job.company,
-                    'city': job.city,
-                    'link': job.link,
-                    'source': job.source,
-                    'search_keyword': job.search_keyword,
-                    'date_posted': job.date_posted if hasattr(job, 'date_posted') else 'نامشخص',
-                    'created_at': job.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                    'date_sort_value': self.parse_persian_date(
-                        job.date_posted if hasattr(job, 'date_posted') else 'نامشخص')
-                })
-
-            # Sort by Persian date
+            # Unknown dates go to the end either way
             if sort_by == 'oldest':
-                jobs_data.sort(key=lambda x: x['date_sort_value'], reverse=True)
+                query = query.order_by(JobListing.posted_at.is_(None), JobListing.posted_at.asc(),
+                                       JobListing.id.asc())
             else:  # Default to newest
-                jobs_data.sort(key=lambda x: x['date_sort_value'])
+                query = query.order_by(JobListing.posted_at.is_(None), JobListing.posted_at.desc(),
+                                       JobListing.id.desc())
 
-            return jobs_data
+            now = datetime.now()
+            return [self._job_to_dict(job, now) for job in query.all()]
         finally:
             db.close()
 
-    def save_session_jobs(self, session_id, jobs, search_keyword):
-        """Save jobs for a specific session with proper duplicate handling"""
-        db = DBSession()
-        saved_count = 0
-        updated_count = 0
+    def get_session_jobs_page(self, session_id, source=None, city=None, company=None, sort_by='newest',
+                              limit=50, cursor=None, collapse=False):
+        """One page of a session's jobs using keyset pagination
+
+        Jobs with a known posted_at come first, ordered by (posted_at, id),
+        then jobs with an unknown date ordered by id in the same direction. Each part is a range scan
+        on the composite indexes, so page N costs the same as page 1. Returns
+        {'jobs', 'total', 'next_cursor'}; pass next_cursor back to continue.
+        """
+        position = self.decode_cursor(cursor)
+        if 'id' not in position:
+            position = {}  # e.g. a search cursor: start from the top
+        oldest = sort_by == 'oldest'
 
+        db = DBSession()
         try:
-            for job in jobs:
-                try:
-                    city_value = job.get('city') or job.get('location') or 'نامشخص'
-                    date_value = job.get('date', '') or job.get('date_posted', '') or 'نامشخص'
-
-                    # Check if job exists for ANY session (not just this one)
-                    existing = db.query(JobListing).filter_by(
-                        link=job.get('link', '')
-                    ).first()
-
-                    if existing:
-                        # Update existing job
-                        existing.title = job.get('title', existing.title)
-                        existing.company = job.get('company', existing.company)
-                        existing.city = city_value
-                        existing.date_posted = date_value
-                        existing.search_keyword = search_keyword
-                        existing.session_id = session_id  # Update to current session
-                        existing.is_active = True
-                        db.commit()
-                        updated_count += 1
-                        print(f"Updated existing job: {existing.title}")
+            base = self._session_jobs_query(db, session_id, source, city, company, collapse)
+            total = base.order_by(None).count()
+
+            rows = []
+            if not position.get('null_part'):
+                dated = base.filter(JobListing.posted_at.isnot(None))
+                if position:
+                    posted_at = position['posted_at']
+                    if oldest:
+                        dated = dated.filter(or_(JobListing.posted_at > posted_at,
+                                                 and_(JobListing.posted_at == posted_at,
+                                                      JobListing.id > position['id'])))
                     else:
-                        # Create new job
-                        job_listing = JobListing(
-                            session_id=session_id,
-                            title=job.get('title', 'نامشخص'),
-                            company=job.get('company', 'نامشخص'),
-                            city=city_value,
-                            link=job.get('link', ''),
-                            source=job.get('source', ''),
-                            search_keyword=search_keyword,
-                            date_posted=date_value
-                        )
-                        db.add(job_listing)
-                        db.commit()
-                        saved_count += 1
-                        print(f"Saved new job: {job_listing.title}")
-
-                except Exception as e:
-                    db.rollback()
-                    print(f"Error saving job: {e}")
-                    print(f"Job data: {job}")
-                    continue
+                        dated = dated.filter(or_(JobListing.posted_at < posted_at,
+                                                 and_(JobListing.posted_at == posted_at,
+                                                      JobListing.id < position['id'])))
+
+                if oldest:
+                    dated = dated.order_by(JobListing.posted_at.asc(), JobListing.id.asc())
+                else:
+                    dated = dated.order_by(JobListing.posted_at.desc(), JobListing.id.desc())
+                rows = dated.limit(limit + 1).all()
+                position = {}
+
+            if len(rows) <= limit:
+                # Dated jobs are exhausted; continue with the unknown-date tail
+                undated = base.filter(JobListing.posted_at.is_(None))
+                if oldest:
+                    if position.get('null_part'):
+                        undated = undated.filter(JobListing.id > position['id'])
+                    undated = undated.order_by(JobListing.id.asc())
+                else:
+                    if position.get('null_part'):
+                        undated = undated.filter(JobListing.id < position['id'])
+                    undated = undated.order_by(JobListing.id.desc())
+                rows += undated.limit(limit + 1 - len(rows)).all()
+
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                last = rows[-1]
+                if last.posted_at is not None:
+                    next_cursor = self.encode_cursor({'posted_at': last.posted_at.isoformat(), 'id': last.id})
+                else:
+                    next_cursor = self.encode_cursor({'null_part': True, 'id': last.id})
+
+            now = datetime.now()
+            return {
+                'jobs': [self._job_to_dict(job, now) for job in rows],
+                'total': total,
+                'next_cursor': next_cursor
+            }
+        finally:
+            db.close()
 
-        except Exception as e:
-            db.rollback()
-            print(f"Error in save_session_jobs: {e}")
+    def search_session_jobs(self, session_id, q, source=None, city=None, company=None, limit=50, cursor=None,
+                            collapse=False):
+        """Full-text search over a session's jobs, best matches first
+
+        Uses the SQLite jobs_fts index (BM25, title weighted over company and
+        city) on Persian-normalized text. Returns the same shape as
+        get_session_jobs_page; the cursor holds an offset because the rank is
+        computed per query.
+        """
+        match = self.build_fts_query(q)
+        if not match:
+            return self.get_session_jobs_page(session_id, source, city, company, limit=limit, cursor=cursor,
+                                              collapse=collapse)
+
+        offset = self.decode_cursor(cursor).get('offset', 0)
+
+        db = DBSession()
+        try:
+            query = self._session_jobs_query(db, session_id, source, city, company, collapse)
+
+            if engine.dialect.name == 'sqlite':
+                # Only the session's rows are ranked, however large the table grows
+                fts = text(
+                    "SELECT rowid, bm25(jobs_fts, 10.0, 5.0, 1.0) AS rank "
+                    "FROM jobs_fts WHERE jobs_fts MATCH :match AND session_id = :session_id"
+                ).bindparams(match=match, session_id=session_id).columns(rowid=Integer, rank=Float).subquery('fts')
+                query = query.join(fts, JobListing.id == fts.c.rowid)
+                ordering = (fts.c.rank, JobListing.id.desc())
+            else:
+                # No FTS5 on server databases; fall back to substring matching
+                for term in normalize_persian(q).split():
+                    query = query.filter(or_(JobListing.title.ilike(f'%{term}%'),
+                                             JobListing.company.ilike(f'%{term}%')))
+                ordering = (JobListing.posted_at.is_(None), JobListing.posted_at.desc(), JobListing.id.desc())
+
+            total = query.count()
+            rows = query.order_by(*ordering).offset(offset).limit(limit + 1).all()
+
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = self.encode_cursor({'offset': offset + limit})
+
+            now = datetime.now()
+            return {
+                'jobs': [self._job_to_dict(job, now) for job in rows],
+                'total': total,
+                'next_cursor': next_cursor
+            }
         finally:
             db.close()
 
-        print(f"Successfully saved {saved_count} new jobs and updated {updated_count} existing jobs")
+    @staticmethod
+    def build_fts_query(q, max_terms=10):
+        """FTS5 MATCH expression: every normalized term must match as a prefix"""
+        terms = normalize_persian(q).replace('"', ' ').split()[:max_terms]
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    @staticmethod
+    def encode_cursor(position):
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Decode a next_cursor value; an empty or malformed cursor starts from the top
+
+        Returns {'posted_at': datetime, 'id': int} or {'null_part': True, 'id': int}
+        for listing pages, {'offset': int} for search pages, and {} for
+        anything else.
+        """
+        if not cursor:
+            return {}
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            return {}
+        if not isinstance(position, dict):
+            return {}
+
+        def whole(value):
+            return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+        if set(position) == {'offset'} and whole(position['offset']):
+            return {'offset': position['offset']}
+        if not whole(position.get('id')):
+            return {}
+        if set(position) == {'null_part', 'id'} and position['null_part'] is True:
+            return {'null_part': True, 'id': position['id']}
+        if set(position) == {'posted_at', 'id'} and isinstance(position['posted_at'], str):
+            try:
+                return {'posted_at': datetime.fromisoformat(position['posted_at']), 'id': position['id']}
+            except ValueError:
+                return {}
+        return {}
+
+    def _job_to_dict(self, job, now):
+        if job.posted_at is not None:
+            date_sort_value = round((now - job.posted_at).total_seconds() / 86400, 2)
+        else:
+            date_sort_value = 999
+
+        return {
+            'id': job.id,
+            'title': job.title,
+            'company': job.company,
+            'city': job.city,
+            'link': job.link,
+            'source': job.source,
+            'search_keyword': job.search_keyword,
+            'cluster_id': job.cluster_id,
+            'date_posted': job.date_posted or 'نامشخص',
+            'posted_at': job.posted_at.strftime('%Y-%m-%d %H:%M:%S') if job.posted_at else None,
+            'created_at': job.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'date_sort_value': date_sort_value
+        }
+
+    def save_session_jobs(self, session_id, jobs, search_keyword):
+        """Save jobs for a specific session with proper duplicate handling"""
+        with STAGE_SECONDS.time(stage='save', source='all'):
+            saved_count, updated_count = self.bulk_save_jobs(session_id, jobs, search_keyword)
+        JOBS_SAVED.inc(saved_count, operation='insert')
+        JOBS_SAVED.inc(updated_count, operation='update')
         return saved_count + updated_count
 
+    def bulk_save_jobs(self, session_id, jobs, search_keyword, chunk_size=500):
+        """Upsert a batch of jobs by (session, link) in a single transaction
+
+        Existing links of the session are pre-fetched with chunked IN (...)
+        queries, then updates and inserts are issued as bulk statements and
+        committed once. Other sessions keep their own row for the same link.
+        Returns (saved_count, updated_count).
+        """
+        # Last occurrence wins when the batch repeats a link
+        rows = {}
+        now = datetime.now()
+        for job in jobs:
+            link = job.get('link', '')
+            if not link:
+                continue
+
+            date_value = job.get('date', '') or job.get('date_posted', '') or 'نامشخص'
+            posted_at, age_days = self.posted_at_from_text(date_value, now)
+
+            row = {
+                'title': job.get('title', 'نامشخص'),
+                'company': job.get('company', 'نامشخص'),
+                'city': job.get('city') or job.get('location') or 'نامشخص',
+                'link': link,
+                'source': job.get('source', ''),
+                'search_keyword': job.get('search_keyword') or search_keyword,  # Batches tag each job
+                'date_posted': date_value,
+                'posted_at': posted_at,
+                'age_days': age_days,
+                'is_active': True,
+            }
+            if session_id:
+                row['session_id'] = session_id
+            rows[link] = row
+
+        if not rows:
+            return 0, 0
+
+        # A concurrent writer can insert one of our links between the pre-fetch
+        # and the commit; retry once with a fresh pre-fetch in that case.
+        for attempt in range(2):
+            db = DBSession()
+            try:
+                links = list(rows)
+                existing = {}
+                for start in range(0, len(links), chunk_size):
+                    chunk = links[start:start + chunk_size]
+                    for link, job_id in db.query(JobListing.link, JobListing.id).filter(
+                            JobListing.session_id == (session_id or None), JobListing.link.in_(chunk)):
+                        existing[link] = job_id
+
+                updates = [{**row, 'id': existing[link]} for link, row in rows.items() if link in existing]
+                inserts = [row for link, row in rows.items() if link not in existing]
+
+                if updates:
+                    db.bulk_update_mappings(JobListing, updates)
+                if inserts:
+                    db.bulk_insert_mappings(JobListing, [{**row, 'created_at': now} for row in inserts])
+
+                db.commit()
+                self.invalidate_cache(session_id)
+                logger.info("Saved %d new jobs and updated %d existing jobs", len(inserts), len(updates))
+
+                self._assign_clusters(db, session_id, links, chunk_size)
+                return len(inserts), len(updates)
+
+            except IntegrityError as e:
+                db.rollback()
+                logger.warning("Conflict saving jobs (attempt %d): %s", attempt + 1, e)
+            except Exception as e:
+                db.rollback()
+                logger.exception("Error in save_session_jobs: %s", e)
+                break
+            finally:
+                db.close()
+
+        return 0, 0
+
+    def _assign_clusters(self, db, session_id, links, chunk_size=500):
+        """Group the saved jobs with their near-duplicates; failures leave cluster_id unset"""
+        try:
+            job_ids = []
+            for start in range(0, len(links), chunk_size):
+                job_ids += [row[0] for row in db.query(JobListing.id).filter(
+                    JobListing.session_id == (session_id or None),
+                    JobListing.link.in_(links[start:start + chunk_size]))]
+
+            with STAGE_SECONDS.time(stage='dedup', source='all'):
+                changed = self.duplicate_detector.assign_clusters(db, job_ids)
+                db.commit()
+            logger.info("Assigned duplicate clusters to %d jobs", changed)
+        except Exception as e:
+            db.rollback()
+            logger.exception("Error assigning duplicate clusters: %s", e)
+
+    @staticmethod
+    def _delete_jobs(db, condition):
+        """Delete jobs matching condition along with their dedup keys"""
+        job_ids = select(JobListing.id).where(condition)
+        db.query(JobDedupKey).filter(JobDedupKey.job_id.in_(job_ids)).delete(synchronize_session=False)
+        return db.query(JobListing).filter(condition).delete(synchronize_session=False)
+
     def clear_session_jobs(self, session_id):
-        """Clear all jobs for a specific session"""
+        """Clear all jobs for a specific session with a single DELETE (plus their dedup keys)"""
         db = DBSession()
         try:
-            jobs_to_delete = db.query(JobListing).filter_by(session_id=session_id).all()
-            count = len(jobs_to_delete)
+            count = self._delete_jobs(db, JobListing.session_id == session_id)
+            db.commit()
+            self.invalidate_cache(session_id)
+            logger.info("Cleared %d jobs for session %s", count, session_id)
+            return count
+        except Exception as e:
+            db.rollback()
+            logger.exception("Error clearing session jobs: %s", e)
+            return 0
+        finally:
+            db.close()
+
+    def get_known_links(self, session_id, keyword, source):
+        """Links already stored in a session for one keyword and source, active or not"""
+        db = DBSession()
+        try:
+            return {row[0] for row in db.query(JobListing.link).filter(
+                JobListing.session_id == session_id,
+                JobListing.search_keyword == keyword,
+                JobListing.source == source
+            )}
+        finally:
+            db.close()
 
-            for job in jobs_to_delete:
-                db.delete(job)
+    def deactivate_missing(self, session_id, keyword, source, seen_links, chunk_size=500):
+        """Mark a keyword/source's active jobs whose link isn't in seen_links as inactive
 
+        Only meaningful after a crawl that saw every current listing; returns
+        the number of jobs deactivated.
+        """
+        db = DBSession()
+        try:
+            active = [row[0] for row in db.query(JobListing.id, JobListing.link).filter(
+                JobListing.session_id == session_id,
+                JobListing.search_keyword == keyword,
+                JobListing.source == source,
+                JobListing.is_active == True
+            ) if row[1] not in seen_links]
+
+            for start in range(0, len(active), chunk_size):
+                db.query(JobListing).filter(
+                    JobListing.id.in_(active[start:start + chunk_size])
+                ).update({'is_active': False}, synchronize_session=False)
             db.commit()
-            print(f"Cleared {count} jobs for session {session_id}")
+            self.invalidate_cache(session_id)
+            if active:
+                logger.info("Deactivated %d jobs no longer listed for %s on %s", len(active), keyword, source)
+            return len(active)
         except Exception as e:
             db.rollback()
-            print(f"Error clearing session jobs: {e}")
+            logger.exception("Error deactivating missing jobs: %s", e)
+            return 0
         finally:
             db.close()
 
-
     def get_or_create_session(self, session_id):
         """Get or create a session record"""
         db = DBSession()
@@ -183,7 +523,24 @@ class SessionManager:
             db.close()
 
     def get_session_filters(self, session_id):
-        """Get available filter options for a session"""
+        """Get available filter options for a session (cached until the session changes)"""
+        return self._cached(session_id, 'filters', lambda: self._query_session_filters(session_id))
+
+    def count_session_jobs(self, session_id):
+        """Number of active jobs in a session (cached until the session changes)"""
+        return self._cached(session_id, 'count', lambda: self._query_session_count(session_id))
+
+    def _query_session_count(self, session_id):
+        db = DBSession()
+        try:
+            return db.query(func.count(JobListing.id)).filter(
+                JobListing.session_id == session_id,
+                JobListing.is_active == True
+            ).scalar()
+        finally:
+            db.close()
+
+    def _query_session_filters(self, session_id):
         db = DBSession()
         try:
             # Get unique cities
@@ -211,25 +568,38 @@ class SessionManager:
         finally:
             db.close()
 
-    def cleanup_old_sessions(self, days=7):
-        """Clean up sessions older than specified days"""
+    def cleanup_old_sessions(self, days=7, chunk_size=500):
+        """Clean up sessions older than specified days
+
+        Expired sessions are removed in chunks of chunk_size: one DELETE for
+        their jobs and one for the sessions per chunk, each in its own short
+        transaction so a large expiry never holds the write lock for long.
+        """
         db = DBSession()
         try:
             cutoff_date = datetime.now() - timedelta(days=days)
+            count = 0
 
-            # Get old sessions
-            old_sessions = db.query(UserSession).filter(
-                UserSession.last_accessed < cutoff_date
-            ).all()
+            while True:
+                session_ids = [row[0] for row in db.query(UserSession.session_id).filter(
+                    UserSession.last_accessed < cutoff_date
+                ).limit(chunk_size)]
 
-            count = len(old_sessions)
+                if not session_ids:
+                    break
 
-            # Delete old session jobs and sessions
-            for session in old_sessions:
-                db.query(JobListing).filter_by(session_id=session.session_id).delete()
-                db.delete(session)
+                self._delete_jobs(db, JobListing.session_id.in_(session_ids))
+                db.query(UserSession).filter(
+                    UserSession.session_id.in_(session_ids)
+                ).delete(synchronize_session=False)
+                db.commit()
+                self.invalidate_cache(*session_ids)
+
+                count += len(session_ids)
 
-            db.commit()
             return count
+        except Exception:
+            db.rollback()
+            raise
         finally:
-            db.close()
\ No newline at end of file
+            db.close()
@@ -0,0 +1,331 @@
+# source_adapters.py
+"""Per-site knowledge behind a common interface, plus the registry of sites.
+
+A SourceAdapter says how to build a site's search URL, how its listing is
+fetched ('http' or 'browser') and paginated ('pages', 'scroll' or a single
+'page'), how many requests may hit the host at once, its timeouts, and how
+to turn a page into job dicts: ``parse`` for an HTML snapshot (job_parsers.py
+with the adapter's own compiled selectors) and ``extract_live`` for WebDriver
+extraction, and how long Chrome waits for its cards to render (``readiness``).
+JobScraper drives every registered adapter the same way, so adding a site
+means writing one adapter and decorating it with @register. Adapters can
+also list URL patterns headless Chrome should skip or keep loading on
+their site (see resource_blocking.py).
+"""
+import logging
+from functools import cached_property
+
+from selenium.webdriver.common.by import By
+
+from job_parsers import (DATE_WORDS, SELECTORS, compile_selectors, has_listing, parse_irantalent, parse_jobinja,
+                         parse_jobvision)
+
+logger = logging.getLogger(__name__)
+
+ADAPTERS = {}
+
+
+def register(adapter_class):
+    """Class decorator adding one instance of the adapter to ADAPTERS"""
+    adapter = adapter_class()
+    ADAPTERS[adapter.name] = adapter
+    return adapter_class
+
+
+def _date_text(elements):
+    """Text of the first element holding a relative date, e.g. ۲ روز پیش"""
+    return next((text for text in (element.text.strip() for element in elements)
+                 if any(word in text for word in DATE_WORDS)), "")
+
+
+class SourceAdapter:
+    name = None
+    display_name = None
+    base_url = None
+    fetch = 'browser'  # 'http': plain GET first, Chrome only as a fallback
+    pagination = 'page'  # 'pages' (numbered URLs), 'scroll' (infinite scroll) or 'page'
+    max_concurrency = 3  # Pages in flight against this host across all scrapes
+    http_timeout = 15
+    source_timeout = None  # Overrides JobScraper.source_timeout when set
+    # PageReadiness tuning on top of page_readiness.DEFAULT_PROFILE; the selector it
+    # waits for is selectors['card']
+    readiness = None
+    # URL patterns Chrome skips on this site, on top of resource_blocking.DEFAULT_BLOCKED_URLS,
+    # and default patterns this site needs loaded after all
+    blocked_urls = ()
+    allowed_urls = ()
+    # CSS selectors by field; 'card' is one job (readiness waits for it) and 'listing'
+    # marks a server-rendered results container
+    selectors = {}
+
+    @cached_property
+    def compiled_selectors(self):
+        """selectors compiled once, for the job_parsers.py parsers"""
+        return compile_selectors(self.selectors)
+
+    def search_url(self, base_url, keyword, page=1):
+        raise NotImplementedError
+
+    def parse(self, html, max_results, base_url):
+        """Jobs from one listing page's HTML"""
+        raise NotImplementedError
+
+    def is_rendered_listing(self, html):
+        """True if card-less HTML is a real, empty result page rather than a JavaScript shell"""
+        return 'listing' in self.selectors and has_listing(html, self.selectors['listing'])
+
+    def extract_live(self, driver, max_results, base_url):
+        """Jobs read card by card through WebDriver (extraction_mode='live')"""
+        raise NotImplementedError
+
+
+@register
+class JobinjaAdapter(SourceAdapter):
+    name = 'jobinja'
+    display_name = 'Jobinja'
+    base_url = 'https://jobinja.ir'
+    fetch = 'http'  # Rendered server-side
+    pagination = 'pages'
+    max_concurrency = 4
+    selectors = SELECTORS['jobinja']
+    readiness = {
+        'timeout': 20,
+        'poll': 0.2,
+        'settle': 0.5,
+        'network_idle': 1.0,
+        'scroll': False,
+    }
+
+    def search_url(self, base_url, keyword, page=1):
+        return f"{base_url}/jobs?filters%5Bkeywords%5D%5B%5D={keyword}&page={page}"
+
+    def parse(self, html, max_results, base_url):
+        return parse_jobinja(html, max_results, base_url, css=self.compiled_selectors)
+
+    def extract_live(self, driver, max_results, base_url):
+        css = self.selectors
+        jobs = []
+        job_cards = driver.find_elements(By.CSS_SELECTOR, css['card'])
+        logger.info("Found %d job cards on Jobinja", len(job_cards))
+
+        for card in job_cards[:max_results]:
+            try:
+                # Extract title and date together
+                title_elem = card.find_element(By.CSS_SELECTOR, css['title'])
+                title_link = title_elem.find_element(By.CSS_SELECTOR, css['title_link'])
+                title = title_link.text.strip()
+                link = title_link.get_attribute("href")
+
+                date = ""
+                try:
+                    # Remove parentheses
+                    date = title_elem.find_element(By.CSS_SELECTOR, css['date']).text
+                    date = date.replace('(', '').replace(')', '').strip()
+                except Exception:
+                    pass
+
+                # Company and city are the first two items of the complement list
+                company = "نامشخص"
+                try:
+                    company = card.find_element(By.CSS_SELECTOR, css['company']).text.strip()
+                except Exception:
+                    pass
+
+                location = "unknown"
+                try:
+                    location = card.find_element(By.CSS_SELECTOR, css['location']).text.strip()
+                except Exception:
+                    pass
+
+                jobs.append({
+                    'title': title,
+                    'company': company,
+                    'location': location,
+                    'link': link,
+                    'date': date,
+                    'source': 'jobinja'
+                })
+                logger.debug("Found job", extra={'fields': {'title': title, 'company': company, 'date': date}})
+
+            except Exception as e:
+                logger.warning("Error extracting job from card: %s", e)
+
+        return jobs
+
+
+@register
+class JobvisionAdapter(SourceAdapter):
+    name = 'jobvision'
+    display_name = 'Jobvision'
+    base_url = 'https://jobvision.ir'
+    pagination = 'scroll'
+    selectors = SELECTORS['jobvision']
+    readiness = {
+        'timeout': 20,
+        'poll': 0.25,
+        'settle': 1.0,
+        'scroll_settle': 2.0,
+        'network_idle': 1.5,
+        'scroll': True,
+    }
+
+    def search_url(self, base_url, keyword, page=1):
+        return f"{base_url}/jobs/keyword/{keyword}"
+
+    def parse(self, html, max_results, base_url):
+        return parse_jobvision(html, max_results, base_url, css=self.compiled_selectors)
+
+    def extract_live(self, driver, max_results, base_url):
+        css = self.selectors
+        jobs = []
+        job_elements = driver.find_elements(By.TAG_NAME, css['card'])
+        logger.info("Found %d job elements", len(job_elements))
+
+        for card in job_elements[:max_results]:
+            try:
+                href = card.find_element(By.CSS_SELECTOR, css['link']).get_attribute('href')
+                if not href or '/jobs/' not in href:
+                    continue
+
+                # Make sure we have full URL
+                if not href.startswith('http'):
+                    href = base_url + href
+
+                title = "نامشخص"
+                company = "نامشخص"
+                date = ""
+
+                try:
+                    title = card.find_element(By.CSS_SELECTOR, css['title']).text.strip()
+                except Exception:
+                    pass
+
+                try:
+                    company = card.find_element(By.CSS_SELECTOR, css['company']).text.strip()
+                except Exception:
+                    pass
+
+                location = "unknown"
+                try:
+                    location_div = card.find_element(By.CSS_SELECTOR, css['location_box'])
+                    full_location = location_div.find_element(By.CSS_SELECTOR, css['location']).text.strip()
+                    # Keep just the city, e.g. "اصفهان ، مارنان" -> "اصفهان"
+                    location = full_location.split('،')[0].strip()
+                except Exception as e:
+                    # Structure changed or the card has no location
+                    logger.debug("Error extracting location: %s", e)
+
+                try:
+                    # Gray spans first, then any span
+                    date = (_date_text(card.find_elements(By.CSS_SELECTOR, css['date']))
+                            or _date_text(card.find_elements(By.TAG_NAME, "span")))
+                except Exception:
+                    pass
+
+                if title != "نامشخص":
+                    jobs.append({
+                        'title': title,
+                        'company': company,
+                        'location': location,
+                        'link': href,
+                        'date': date,
+                        'source': 'jobvision'
+                    })
+                    logger.debug("Found job", extra={'fields': {'title': title, 'company': company, 'date': date}})
+
+            except Exception as e:
+                logger.warning("Error extracting job: %s", e)
+
+        return jobs
+
+
+@register
+class IranTalentAdapter(SourceAdapter):
+    name = 'irantalent'
+    display_name = 'IranTalent'
+    base_url = 'https://www.irantalent.com'
+    pagination = 'scroll'
+    selectors = SELECTORS['irantalent']
+    readiness = {
+        'timeout': 20,
+        'poll': 0.25,
+        'settle': 1.0,
+        'scroll_settle': 2.0,
+        'network_idle': 1.5,
+        'scroll': True,
+    }
+    # Google sign-in widget and the first-party ad loader
+    blocked_urls = ('*accounts.google.com/gsi/*', '*/assets/js/yektanet.js*')
+
+    def search_url(self, base_url, keyword, page=1):
+        keyword = keyword.strip()
+        if ' ' in keyword:
+            # Multiple words - use search format with dashes
+            return f"{base_url}/jobs/search?keyword={keyword.replace(' ', '-')}&language=persian"
+        return f"{base_url}/jobs/{keyword}"
+
+    def parse(self, html, max_results, base_url):
+        return parse_irantalent(html, max_results, base_url, css=self.compiled_selectors)
+
+    def extract_live(self, driver, max_results, base_url):
+        css = self.selectors
+        jobs = []
+        job_elements = driver.find_elements(By.CSS_SELECTOR, css['card'])
+        logger.info("Found %d job elements", len(job_elements))
+
+        for element in job_elements[:max_results]:
+            try:
+                href = element.get_attribute('href')
+                if not href or '/job/' not in href:
+                    continue
+
+                # Climb at most 5 levels to the element wrapping the posting
+                card = element
+                for _ in range(5):
+                    card = card.find_element(By.XPATH, '..')
+                    classes = card.get_attribute('class') or ''
+                    if 'card' in classes or 'position' in classes:
+                        break
+
+                title = "نامشخص"
+                company = "نامشخص"
+                location = "تهران"
+                date = ""
+
+                try:
+                    title = card.find_element(By.CSS_SELECTOR, css['title']).text.strip()
+                except Exception:
+                    pass
+
+                try:
+                    company = card.find_element(By.CSS_SELECTOR, css['company']).text.strip()
+                except Exception:
+                    pass
+
+                # Extract location and date from job-info div
+                try:
+                    job_info = card.find_element(By.CSS_SELECTOR, css['job_info'])
+                    spans = job_info.find_elements(By.CSS_SELECTOR, css['info_span'])
+                    if spans:
+                        location = spans[0].text.strip()
+                    # The date is usually the last span with "روز پیش" or similar
+                    date = _date_text(reversed(spans))
+                except Exception:
+                    pass
+
+                if title != "نامشخص":
+                    jobs.append({
+                        'title': title,
+                        'company': company,
+                        'location': location,
+                        'link': href,
+                        'salary': "",
+                        'date': date,
+                        'source': 'irantalent'
+                    })
+                    logger.debug("Found job", extra={'fields': {'title': title, 'company': company, 'date': date}})
+
+            except Exception as e:
+                logger.warning("Error extracting job: %s", e)
+
+        return jobs
@@ -0,0 +1,122 @@
+# test_app.py
+import os
+
+import pytest
+
+# No background re-crawls while the app module is imported for tests
+os.environ.setdefault('RECRAWL_POLL_SECONDS', '0')
+
+import app as app_module
+from scrape_scheduler import ScrapeJob
+
+
+@pytest.fixture
+def client():
+    app_module.app.config['TESTING'] = True
+    return app_module.app.test_client()
+
+
+def test_sessions_are_written_to_the_configured_directory(client):
+    session_dir = os.environ['SESSION_FILE_DIR']
+    assert os.path.abspath(app_module.app.session_interface.cache._path) == os.path.abspath(session_dir)
+
+    before = set(os.listdir(session_dir))
+    with client.session_transaction() as flask_session:
+        flask_session['session_id'] = 's1'
+    assert set(os.listdir(session_dir)) - before
+
+
+@pytest.mark.parametrize('max_results', ['abc', None, [30], 2.5, '1e3'])
+def test_scrape_rejects_non_integer_max_results(client, max_results):
+    response = client.post('/api/scrape', json={'keyword': 'python', 'sources': ['jobinja'],
+                                                'max_results': max_results})
+    assert response.status_code == 400
+    assert 'max_results' in response.get_json()['error']
+
+
+def test_batch_scrape_rejects_non_integer_max_results(client):
+    response = client.post('/api/scrape/batch', json={'keywords': ['python', 'go'], 'sources': ['jobinja'],
+                                                      'max_results': 'abc'})
+    assert response.status_code == 400
+    assert 'max_results' in response.get_json()['error']
+
+
+@pytest.mark.parametrize('field', ['max_results', 'interval_minutes', 'full_crawl_every'])
+def test_track_rejects_non_integer_settings(client, field):
+    response = client.post('/api/tracked', json={'keyword': 'python', 'sources': ['jobinja'], field: 'hourly'})
+    assert response.status_code == 400
+    assert field in response.get_json()['error']
+
+
+@pytest.mark.parametrize('path', ['/api/scrape', '/api/scrape/batch'])
+def test_scrape_rejects_non_boolean_force_refresh(client, path):
+    response = client.post(path, json={'keyword': 'python', 'keywords': ['python'], 'sources': ['jobinja'],
+                                       'force_refresh': 'maybe'})
+    assert response.status_code == 400
+    assert 'force_refresh' in response.get_json()['error']
+
+
+@pytest.mark.parametrize('value, expected', [
+    (True, True), (False, False), (0, False), (1, True), ('false', False), ('0', False), ('True', True), ('yes', True),
+])
+def test_bool_field_parses_json_and_string_booleans(value, expected):
+    assert app_module.bool_field({'force_refresh': value}, 'force_refresh') is expected
+    assert app_module.bool_field({}, 'force_refresh') is False
+
+
+@pytest.mark.parametrize('value', ['maybe', 2, None, [], 0.5])
+def test_bool_field_rejects_other_values(value):
+    with pytest.raises(ValueError):
+        app_module.bool_field({'force_refresh': value}, 'force_refresh')
+
+
+def test_int_field_clamps_and_accepts_numeric_strings():
+    assert app_module.int_field({'n': '40'}, 'n', 30, 1, 500) == 40
+    assert app_module.int_field({'n': 9000}, 'n', 30, 1, 500) == 500
+    assert app_module.int_field({'n': -3}, 'n', 30, 1) == 1
+    assert app_module.int_field({}, 'n', 30, 1, 500) == 30
+
+
+def test_jobs_with_malformed_cursor_returns_first_page(client, db):
+    app_module.session_manager.bulk_save_jobs('s1', [
+        {'title': f'Developer {n}', 'link': f'https://jobinja.ir/jobs/{n}', 'source': 'jobinja'}
+        for n in range(3)
+    ], 'python')
+    with client.session_transaction() as flask_session:
+        flask_session['session_id'] = 's1'
+
+    # {"id": 3}
+    response = client.get('/api/jobs?limit=2&dedupe=0&cursor=eyJpZCI6IDN9')
+    assert response.status_code == 200
+    page = response.get_json()
+    assert page['total'] == 3
+    assert len(page['jobs']) == 2
+    assert page['next_cursor']
+
+
+@pytest.mark.parametrize('last_event_id, first_id', [(None, 0), ('0', 1), ('abc', 0), ('-7', 0)])
+def test_events_resume_after_last_event_id(client, monkeypatch, last_event_id, first_id):
+    job = ScrapeJob('s1', 'python', ['jobinja'])
+    job.add_event('status', {'message': 'Scraping'})
+    job.add_event('done', {'message': 'Done'})
+    monkeypatch.setitem(app_module.scrape_scheduler._jobs, job.job_id, job)
+    with client.session_transaction() as flask_session:
+        flask_session['session_id'] = 's1'
+
+    headers = {'Last-Event-ID': last_event_id} if last_event_id is not None else {}
+    response = client.get(f'/api/scrape/{job.job_id}/events', headers=headers)
+    assert response.status_code == 200
+    ids = [int(line[4:]) for line in response.get_data(as_text=True).splitlines() if line.startswith('id: ')]
+    assert ids == list(range(first_id, 2))
+
+
+def test_metrics_are_served_in_the_prometheus_format(client):
+    client.get('/api/jobs')
+    response = client.get('/api/metrics')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    body = response.get_data(as_text=True)
+    assert '# TYPE jobscraper_stage_seconds histogram' in body
+    assert 'jobscraper_scheduler_jobs{state="max_concurrent"} 2' in body
+    assert 'jobscraper_http_request_seconds_count{endpoint="/api/jobs",method="GET",status="200"}' in body
@@ -0,0 +1,132 @@
+import itertools
+
+import pytest
+
+from dedup import company_keys, is_duplicate
+from mock_sites import SOURCES, mock_job
+from models import JobListing
+from session_manager import SessionManager
+
+
+def posting(title, company, source):
+    return {'title': title, 'company': company, 'source': source}
+
+
+@pytest.mark.parametrize('a, b', [
+    # Near misses that score high on character similarity
+    (posting('Senior Python Developer', 'Snapp', 'jobinja'), posting('Junior Python Developer', 'Snapp', 'jobvision')),
+    (posting('Python Developer', 'Tapsi', 'jobinja'), posting('Python Developer', 'Tapsell', 'jobvision')),
+    (posting('Backend Developer (Python)', 'Digikala', 'jobinja'),
+     posting('Backend Developer (Java)', 'Digikala', 'irantalent')),
+    (posting('برنامه‌نویس پایتون', 'سپیدار سیستم', 'jobinja'), posting('برنامه‌نویس پایتون', 'همکاران سیستم', 'jobvision')),
+    # One site lists two openings with the same title
+    (posting('Python Developer', 'Snapp', 'jobinja'), posting('Python Developer', 'Snapp', 'jobinja')),
+    # Unknown company or title never matches
+    (posting('Python Developer', 'نامشخص', 'jobinja'), posting('Python Developer', 'نامشخص', 'jobvision')),
+    (posting('نامشخص', 'Snapp', 'jobinja'), posting('نامشخص', 'Snapp', 'jobvision')),
+])
+def test_near_misses_are_not_duplicates(a, b):
+    assert not is_duplicate(a, b)
+
+
+@pytest.mark.parametrize('a, b', [
+    (posting('برنامه‌نویس پایتون', 'شرکت اسنپ', 'jobinja'), posting('برنامه نويس پايتون', 'اسنپ', 'jobvision')),
+    (posting('Python Developer', 'Snapp | اسنپ', 'jobinja'), posting('python developer', 'Snapp', 'irantalent')),
+    (posting('Back-end Developer', 'Digikala Co.', 'jobvision'), posting('Backend Developer', 'Digikala', 'jobinja')),
+    (posting('استخدام Developer Python', 'دیجی‌کالا', 'jobinja'), posting('Python Developer', 'دیجی کالا', 'irantalent')),
+])
+def test_same_position_on_two_sites_is_a_duplicate(a, b):
+    assert is_duplicate(a, b)
+
+
+def test_company_keys_split_names_and_drop_legal_words():
+    assert company_keys('شرکت اسنپ | Snapp (اسنپ)') == {'اسنپ', 'snapp'}
+    assert company_keys('Digikala Co. - دیجی‌کالا') == {'digikala', 'دیجیکالا'}
+    assert company_keys('نامشخص') == set()
+
+
+_links = itertools.count()
+
+
+def save(manager, session_id, *jobs):
+    """Save (title, company, source) postings, each under a new link; returns the links"""
+    batch = [{'link': f'https://{source}.example/{next(_links)}', 'title': title, 'company': company,
+              'source': source} for title, company, source in jobs]
+    manager.bulk_save_jobs(session_id, batch, 'python')
+    return [job['link'] for job in batch]
+
+
+def clusters(db, session_id):
+    """{cluster_id: [(source, title, company), ...]} for a session"""
+    result = {}
+    for job in db().query(JobListing).filter_by(session_id=session_id).order_by(JobListing.id):
+        result.setdefault(job.cluster_id, []).append((job.source, job.title, job.company))
+    db.remove()
+    return result
+
+
+def test_one_position_on_three_sites_forms_one_cluster(db, manager):
+    links = save(manager, 's1',
+         ('Python Developer', 'Snapp', 'jobinja'),
+         ('Senior Python Developer', 'Snapp', 'jobvision'),
+         ('python developer', 'Snapp | اسنپ', 'jobvision'),
+         ('Python Developer', 'Snapp', 'irantalent'),
+         ('Python Developer', 'Tapsell', 'irantalent'))
+    # A second opening with the same title on a site already in the cluster stays apart
+    save(manager, 's1', ('Python Developer', 'Snapp', 'jobinja'))
+
+    groups = sorted(clusters(db, 's1').values(), key=len, reverse=True)
+    assert [len(group) for group in groups] == [3, 1, 1, 1]
+    assert {source for source, _, _ in groups[0]} == set(SOURCES)
+
+    collapsed = manager.get_session_jobs('s1', collapse=True)
+    assert len(collapsed) == 4
+    assert len(manager.get_session_jobs('s1', source='jobinja', collapse=True)) == 2
+
+    # Re-saving the cluster's first job keeps it together
+    manager.bulk_save_jobs('s1', [{'link': links[0], 'title': 'Python Developer', 'company': 'Snapp',
+                                   'source': 'jobinja'}], 'python')
+    assert sorted(len(group) for group in clusters(db, 's1').values()) == [1, 1, 1, 3]
+
+
+def test_clusters_match_their_representative_not_any_member(db, manager):
+    # "Snapp | اسنپ" matches both neighbours, but "اسنپ" doesn't match the first job
+    save(manager, 's1',
+         ('Python Developer', 'Snapp', 'jobinja'),
+         ('Python Developer', 'Snapp | اسنپ', 'jobvision'),
+         ('Python Developer', 'اسنپ', 'irantalent'))
+    assert sorted(len(group) for group in clusters(db, 's1').values()) == [1, 2]
+
+
+def test_sessions_are_clustered_separately(db, manager):
+    save(manager, 's1', ('Python Developer', 'Snapp', 'jobinja'))
+    save(manager, 's2', ('Python Developer', 'Snapp', 'jobvision'))
+    assert len(manager.get_session_jobs('s2', collapse=True)) == 1
+    assert list(clusters(db, 's2')) != list(clusters(db, 's1'))
+
+
+def test_mock_listings_only_collapse_identical_positions(db, manager):
+    # Few titles x companies: plenty of similar but different postings
+    jobs = [{**mock_job(source, 'Python', index), 'link': f'https://{source}.example/{index}'}
+            for source in SOURCES for index in range(40)]
+    manager.bulk_save_jobs('s1', jobs, 'Python')
+
+    for group in clusters(db, 's1').values():
+        assert len({(title, company) for _, title, company in group}) == 1
+        assert len({source for source, _, _ in group}) == len(group)
+
+    positions = {(job['title'], job['company']) for job in jobs}
+    collapsed = manager.get_session_jobs('s1', collapse=True)
+    assert {(job['title'], job['company']) for job in collapsed} == positions
+    # Every index is posted on all three sites
+    assert len(collapsed) <= 40
+
+
+def test_candidates_are_bounded_per_dedup_key(db):
+    detector_manager = SessionManager(db)
+    detector_manager.duplicate_detector.max_candidates = 3
+    save(detector_manager, 's1', *[('Python Developer', 'Snapp', 'jobinja')] * 10)
+    # The newest jobinja postings fill the dedup keys; the new posting still finds one of them
+    save(detector_manager, 's1', ('Python Developer', 'Snapp', 'jobvision'))
+    groups = clusters(db, 's1')
+    assert sorted(len(group) for group in groups.values())[-1] == 2
@@ -0,0 +1,64 @@
+import time
+
+from driver_pool import DriverPool
+
+
+class FakeDriver:
+    window_handles = ['main']
+
+    def __init__(self):
+        self.quit_called = False
+        self.cdp_commands = []
+
+    def execute_cdp_cmd(self, command, params):
+        self.cdp_commands.append((command, params))
+
+    def execute_script(self, script):
+        return 1
+
+    def delete_all_cookies(self):
+        pass
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+    @property
+    def switch_to(self):
+        return self
+
+    def window(self, handle):
+        pass
+
+
+def test_released_driver_is_reused():
+    pool = DriverPool(FakeDriver, size=1, idle_timeout=None)
+    driver = pool.acquire()
+    pool.release(driver)
+    assert pool.acquire() is driver
+    pool.close()
+
+
+def test_reaper_quits_idle_drivers_without_an_acquire():
+    pool = DriverPool(FakeDriver, size=2, idle_timeout=0.1, reap_interval=0.05)
+    driver = pool.acquire()
+    pool.release(driver)
+
+    deadline = time.monotonic() + 2
+    while not driver.quit_called and time.monotonic() < deadline:
+        time.sleep(0.02)
+
+    assert driver.quit_called
+    assert pool.stats()['created'] == 0
+    pool.close()
+
+
+def test_release_clears_every_origin():
+    pool = DriverPool(FakeDriver, size=1, idle_timeout=None)
+    driver = pool.acquire()
+    pool.release(driver)
+    assert ('Network.clearBrowserCookies', {}) in driver.cdp_commands
+    assert ('Storage.clearDataForOrigin', {'origin': '*', 'storageTypes': 'all'}) in driver.cdp_commands
+    pool.close()
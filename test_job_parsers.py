@@ -0,0 +1,31 @@
+from job_parsers import SELECTORS, parse_jobvision
+from source_adapters import JobvisionAdapter
+
+CARD = '''
+<job-card>
+  <a href="/jobs/123/python-developer"><div class="job-card-title">Python Developer</div></a>
+  <a href="/companies/1/snapp">Snapp</a>
+  <span style="color: #8E9CB2">تمام وقت</span>
+  <span>۲ روز پیش</span>
+</job-card>
+'''
+
+
+def test_jobvision_date_falls_back_to_any_span_when_gray_spans_hold_no_date():
+    jobs = parse_jobvision(CARD, base_url='https://jobvision.ir')
+    assert jobs[0]['date'] == '۲ روز پیش'
+    assert jobs[0]['link'] == 'https://jobvision.ir/jobs/123/python-developer'
+
+
+def test_jobvision_date_prefers_gray_span():
+    html = CARD.replace('تمام وقت', '۱ ساعت پیش')
+    assert parse_jobvision(html)[0]['date'] == '۱ ساعت پیش'
+
+
+def test_adapter_parses_with_its_own_selectors():
+    class RenamedCardAdapter(JobvisionAdapter):
+        selectors = {**SELECTORS['jobvision'], 'card': 'job-item'}
+
+    html = CARD.replace('<job-card>', '<job-item>').replace('</job-card>', '</job-item>')
+    assert RenamedCardAdapter().parse(html, 30, 'https://jobvision.ir')[0]['title'] == 'Python Developer'
+    assert JobvisionAdapter().parse(html, 30, 'https://jobvision.ir') == []
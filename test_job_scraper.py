@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+
+from job_scraper import JobScraper
+from mock_sites import MockConfig, MockSites
+from source_adapters import ADAPTERS, SourceAdapter
+
+
+class NoChromePool:
+    """Fails the test if a scrape falls back to Chrome"""
+
+    def __init__(self):
+        self.acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+        raise AssertionError('Chrome was requested')
+
+    def release(self, driver):
+        pass
+
+
+@pytest.fixture
+def mock_sites():
+    sites = MockSites(MockConfig(total_jobs=30, page_size=20, server_render=True), port=0).start()
+    yield sites
+    sites.stop()
+
+
+def make_scraper(sites):
+    pool = NoChromePool()
+    scraper = JobScraper(session_manager=object(), driver_pool=pool, base_urls=sites.base_urls,
+                         fetch_strategies={source: 'http' for source in sites.base_urls})
+    return scraper, pool
+
+
+def test_page_past_the_last_result_does_not_launch_chrome(mock_sites):
+    scraper, pool = make_scraper(mock_sites)
+    jobs = scraper.scrape_source('jobinja', 'python', max_results=60)
+    assert len(jobs) == 30
+    assert pool.acquired == 0
+
+
+def test_server_rendered_page_without_matches_returns_empty(mock_sites):
+    mock_sites.config.total_jobs = 0
+    scraper, pool = make_scraper(mock_sites)
+    for source in ('jobinja', 'jobvision', 'irantalent'):
+        assert scraper.scrape_source(source, 'nomatch', max_results=30) == []
+    assert pool.acquired == 0
+
+
+def test_javascript_shell_still_falls_back_to_chrome(mock_sites):
+    mock_sites.config.server_render = False
+    scraper, pool = make_scraper(mock_sites)
+    # The scraper logs the failed Chrome checkout and returns no jobs
+    assert scraper.scrape_source('jobvision', 'python', max_results=30) == []
+    assert pool.acquired == 1
+
+
+def test_readiness_waits_for_each_adapters_cards():
+    class BoardAdapter(SourceAdapter):
+        name = 'board'
+        pagination = 'scroll'
+        selectors = {'card': 'div.posting'}
+        readiness = {'settle': 0.1}
+
+    scraper = JobScraper(session_manager=object(), adapters=[*ADAPTERS.values(), BoardAdapter()],
+                         readiness_profiles={'jobinja': {'timeout': 5}})
+    for name, adapter in ADAPTERS.items():
+        assert scraper.readiness.profile(name)['selector'] == adapter.selectors['card']
+    assert scraper.readiness.profile('jobinja')['timeout'] == 5
+    assert scraper.readiness.profile('jobinja')['settle'] == ADAPTERS['jobinja'].readiness['settle']
+    assert scraper.readiness.profile('jobvision')['scroll']
+    assert scraper.readiness.profile('board')['selector'] == 'div.posting'
+    assert scraper.readiness.profile('board')['settle'] == 0.1
+
+
+class CountingSessionManager:
+    def save_session_jobs(self, session_id, jobs, search_keyword):
+        return len(jobs)
+
+
+@pytest.fixture
+def hanging_scraper():
+    """A scraper whose jobvision search hangs until the test ends"""
+    release = threading.Event()
+    scraper = JobScraper(session_manager=CountingSessionManager(), source_timeout=0.3)
+
+    def scrape_source(source, keyword, max_results=30, known_links=None):
+        if source == 'jobvision':
+            release.wait(10)
+        return [{'title': 'Python Developer', 'link': f'https://{source}.example/1', 'source': source}]
+
+    scraper.scrape_source = scrape_source
+    yield scraper
+    release.set()
+
+
+@pytest.mark.parametrize('sources, parallel', [
+    (['jobvision'], True),
+    (['jobvision', 'jobinja', 'irantalent'], False),
+    (['jobvision', 'jobinja', 'irantalent'], True),
+])
+def test_hanging_source_misses_its_deadline(hanging_scraper, sources, parallel):
+    results = {}
+    started = time.monotonic()
+    total = hanging_scraper.scrape_all('python', sources, parallel=parallel,
+                                       on_source_done=lambda source, jobs: results.setdefault(source, jobs))
+
+    assert time.monotonic() - started < 2
+    assert results.pop('jobvision') is None
+    assert all(jobs for jobs in results.values())
+    assert total == len(sources) - 1
@@ -0,0 +1,58 @@
+import pytest
+
+from metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_counter_and_gauge_render_one_sample_per_label_set():
+    registry = Registry()
+    results = registry.register(Counter('results_total', 'Results', ['source', 'outcome']))
+    drivers = registry.register(Gauge('drivers', 'Drivers', ['state']))
+    results.inc(source='jobinja', outcome='ok')
+    results.inc(2, source='jobinja', outcome='ok')
+    results.inc(source='jobvision', outcome='failed')
+    drivers.set(3, state='idle')
+    drivers.set(1, state='idle')
+
+    assert registry.render() == (
+        '# HELP results_total Results\n'
+        '# TYPE results_total counter\n'
+        'results_total{source="jobinja",outcome="ok"} 3\n'
+        'results_total{source="jobvision",outcome="failed"} 1\n'
+        '# HELP drivers Drivers\n'
+        '# TYPE drivers gauge\n'
+        'drivers{state="idle"} 1\n'
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('stage_seconds', 'Stage time', ['stage'], buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 5):
+        histogram.observe(value, stage='save')
+
+    assert histogram.render()[2:] == [
+        'stage_seconds_bucket{stage="save",le="0.1"} 1',
+        'stage_seconds_bucket{stage="save",le="1"} 3',
+        'stage_seconds_bucket{stage="save",le="+Inf"} 4',
+        'stage_seconds_sum{stage="save"} 6.05',
+        'stage_seconds_count{stage="save"} 4',
+    ]
+
+
+def test_histogram_times_a_failing_block():
+    histogram = Histogram('stage_seconds', 'Stage time', ['stage'])
+    with pytest.raises(KeyError):
+        with histogram.time(stage='save'):
+            raise KeyError('job')
+    assert histogram.render()[-1] == 'stage_seconds_count{stage="save"} 1'
+
+
+def test_label_values_are_escaped():
+    counter = Counter('results_total', 'Results', ['keyword'])
+    counter.inc(keyword='say "hi"\\\n')
+    assert counter.render()[-1] == 'results_total{keyword="say \\"hi\\"\\\\\\n"} 1'
+
+
+def test_labels_must_match_the_declared_names():
+    counter = Counter('results_total', 'Results', ['source'])
+    with pytest.raises(ValueError):
+        counter.inc(outcome='ok')
@@ -0,0 +1,47 @@
+import pytest
+from selenium.common.exceptions import JavascriptException
+
+from page_readiness import DEFAULT_PROFILE, PageReadiness
+
+
+class FakeDriver:
+    """Answers the readiness probe with a fixed card count after a few polls"""
+
+    def __init__(self, cards=3, fail_first=0):
+        self.cards = cards
+        self.fail_first = fail_first
+        self.selectors = []
+
+    def execute_script(self, script, selector):
+        self.selectors.append(selector)
+        if len(self.selectors) <= self.fail_first:
+            raise JavascriptException('document is not ready')
+        return [self.cards, 'complete', 10]
+
+
+def test_standalone_wait_probes_with_the_default_selector():
+    readiness = PageReadiness({'jobinja': {'settle': 0.05, 'poll': 0.01, 'timeout': 2}})
+    driver = FakeDriver()
+
+    record = readiness.wait(driver, 'jobinja')
+    assert record['ready'] and record['reason'] == 'cards_stable'
+    assert record['cards'] == 3
+    assert record['elapsed'] < 1
+    assert set(driver.selectors) == {DEFAULT_PROFILE['selector']}
+
+
+def test_webdriver_errors_are_retried():
+    readiness = PageReadiness({'board': {'selector': 'div.posting', 'settle': 0.05, 'poll': 0.01, 'timeout': 2}})
+    driver = FakeDriver(fail_first=3)
+
+    assert readiness.wait(driver, 'board')['ready']
+    assert driver.selectors[0] == 'div.posting'
+
+
+def test_other_errors_surface():
+    class BrokenDriver:
+        def execute_script(self, script, selector):
+            raise KeyError('selector')
+
+    with pytest.raises(KeyError):
+        PageReadiness().wait(BrokenDriver(), 'jobinja')
@@ -0,0 +1,65 @@
+from recrawl_scheduler import RecrawlScheduler, tracked_session_id
+
+
+def listing(*numbers):
+    return [{'title': f'Python Developer {n}', 'company': f'Company {n}', 'link': f'https://jobinja.ir/jobs/{n}',
+             'date': 'امروز', 'source': 'jobinja'} for n in numbers]
+
+
+class FakeScraper:
+    """Returns a fixed listing and saves like JobScraper.save_jobs"""
+
+    def __init__(self, session_manager, jobs):
+        self.session_manager = session_manager
+        self.jobs = jobs
+        self.known_links = []
+
+    def scrape_source(self, source, keyword, max_results, known_links=None):
+        self.known_links.append(known_links)
+        return self.jobs[:max_results]
+
+    def save_jobs(self, jobs, search_keyword, session_id=None):
+        return self.session_manager.save_session_jobs(session_id, jobs, search_keyword)
+
+
+def test_tracked_crawl_leaves_user_sessions_their_jobs(manager):
+    manager.save_session_jobs('user', listing(1, 2, 3, 4, 5), 'python')
+    scheduler = RecrawlScheduler(FakeScraper(manager, listing(1, 2, 3, 4, 5)), manager)
+
+    tracked = scheduler.track('python', 'jobinja', max_results=10)
+    assert scheduler.run_once(tracked['id'])['last_new'] == 5
+
+    assert manager.count_session_jobs('user') == 5
+    assert manager.count_session_jobs(tracked_session_id('python')) == 5
+
+
+def test_user_search_keeps_tracked_known_links(manager):
+    scraper = FakeScraper(manager, listing(1, 2, 3))
+    scheduler = RecrawlScheduler(scraper, manager)
+    tracked = scheduler.track('python', 'jobinja', max_results=10, full_crawl_every=2)
+    scheduler.run_once(tracked['id'])
+
+    # A user search for the same keyword stores the same links in its own session
+    manager.save_session_jobs('user', listing(1, 2, 3), 'python')
+
+    scraper.jobs = listing(1, 2, 3, 4)
+    result = scheduler.run_once(tracked['id'])
+    # The second run is a delta crawl that stops at the stored links
+    assert scraper.known_links[-1] == {job['link'] for job in listing(1, 2, 3)}
+    assert result['last_new'] == 1
+    assert manager.count_session_jobs('user') == 3
+
+
+def test_keyword_case_and_spacing_name_one_tracked_search(manager):
+    scraper = FakeScraper(manager, listing(1, 2))
+    scheduler = RecrawlScheduler(scraper, manager)
+
+    first = scheduler.track('Python', 'jobinja', max_results=10)
+    second = scheduler.track('  python ', 'jobinja', max_results=20)
+    assert second['id'] == first['id']
+    assert second['keyword'] == 'python'
+    assert second['session_id'] == tracked_session_id('PYTHON')
+    assert [tracked['id'] for tracked in scheduler.list()] == [first['id']]
+
+    scheduler.run_once(first['id'])
+    assert manager.get_known_links(second['session_id'], 'python', 'jobinja') == {j['link'] for j in listing(1, 2)}
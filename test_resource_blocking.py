@@ -0,0 +1,62 @@
+from resource_blocking import DEFAULT_BLOCKED_URLS, ResourceBlocker
+from source_adapters import SourceAdapter
+
+
+class BoardAdapter(SourceAdapter):
+    name = 'board'
+    blocked_urls = ('*/ads/*',)
+    allowed_urls = ('*fonts.gstatic.com/*',)
+
+
+class FakeDriver:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.commands = []
+
+    def execute_cdp_cmd(self, command, params):
+        if self.fail:
+            raise RuntimeError('no DevTools')
+        self.commands.append((command, params))
+
+
+def blocked_urls(driver):
+    return [params['urls'] for command, params in driver.commands if command == 'Network.setBlockedURLs']
+
+
+def test_adapter_patterns_extend_and_trim_the_defaults():
+    patterns = ResourceBlocker({'board': BoardAdapter()}).patterns['board']
+    assert '*/ads/*' in patterns
+    assert '*fonts.gstatic.com/*' not in patterns
+    assert set(patterns) == (set(DEFAULT_BLOCKED_URLS) - {'*fonts.gstatic.com/*'}) | {'*/ads/*'}
+
+
+def test_rules_override_adapter_lists():
+    blocker = ResourceBlocker({'board': BoardAdapter()},
+                              rules={'board': {'block': ['*.svg*', '*.woff*'], 'allow': ['*/ads/*']}})
+    patterns = blocker.patterns['board']
+    assert '*.svg*' in patterns and '*/ads/*' not in patterns
+    assert patterns.count('*.woff*') == 1
+
+
+def test_block_list_is_sent_again_only_when_it_changes():
+    class OtherAdapter(SourceAdapter):
+        name = 'other'
+
+    blocker = ResourceBlocker({'board': BoardAdapter(), 'other': OtherAdapter()})
+    driver = FakeDriver()
+    blocker.apply(driver, 'board')
+    blocker.apply(driver, 'board')
+    blocker.apply(driver, 'other')
+    blocker.apply(driver, 'unknown')  # Unregistered sources get the defaults, as 'other' already has
+
+    assert blocked_urls(driver) == [list(blocker.patterns['board']), list(DEFAULT_BLOCKED_URLS)]
+    assert ('Network.enable', {}) in driver.commands
+
+
+def test_drivers_without_devtools_are_left_alone():
+    blocker = ResourceBlocker({'board': BoardAdapter()})
+    blocker.apply(FakeDriver(fail=True), 'board')
+
+    driver = FakeDriver()
+    blocker.apply(driver, 'board')
+    assert driver.commands == []
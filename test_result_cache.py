@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+import pytest
+
+import result_cache
+from result_cache import ResultCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(result_cache, 'time', SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResultCache(ttl=60)
+    cache.put('jobinja', 'python', 30, [{'title': 'Python Developer'}])
+
+    clock.now += 60
+    assert cache.get('jobinja', 'python', 30) == [{'title': 'Python Developer'}]
+    clock.now += 1
+    assert cache.get('jobinja', 'python', 30) is None
+    assert cache.stats() == {'entries': 0, 'hits': 1, 'misses': 1}
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ResultCache(max_entries=2)
+    cache.put('jobinja', 'python', 30, [])
+    cache.put('jobinja', 'devops', 30, [])
+    assert cache.get('jobinja', 'python', 30) == []  # devops is now the least recently used
+
+    cache.put('jobinja', 'dba', 30, [])
+    assert cache.get('jobinja', 'devops', 30) is None
+    assert cache.get('jobinja', 'python', 30) == []
+    assert cache.get('jobinja', 'dba', 30) == []
+
+
+def test_keywords_match_regardless_of_case_and_spacing(clock):
+    cache = ResultCache()
+    cache.put('jobinja', '  Python   Developer ', 30, [{'title': 'a'}])
+    assert cache.get('jobinja', 'python developer', 30) == [{'title': 'a'}]
+    assert cache.get('jobvision', 'python developer', 30) is None
+    assert cache.get('jobinja', 'python developer', 50) is None
+
+
+def test_cached_jobs_are_copies(clock):
+    cache = ResultCache()
+    jobs = [{'title': 'a'}]
+    cache.put('jobinja', 'python', 30, jobs)
+    jobs[0]['title'] = 'changed'
+    cache.get('jobinja', 'python', 30)[0]['title'] = 'changed'
+    assert cache.get('jobinja', 'python', 30) == [{'title': 'a'}]
+
+
+def test_invalidate_one_keyword(clock):
+    cache = ResultCache()
+    cache.put('jobinja', 'python', 30, [])
+    cache.put('jobvision', 'Python', 30, [])
+    cache.put('jobinja', 'devops', 30, [])
+
+    cache.invalidate('PYTHON')
+    assert cache.get('jobinja', 'python', 30) is None
+    assert cache.get('jobvision', 'python', 30) is None
+    assert cache.get('jobinja', 'devops', 30) == []
@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pytest
+
+from scrape_scheduler import ScrapeJob, ScrapeScheduler
+
+
+class FakeScraper:
+    """Runs each search until released or cancelled, recording the order searches start in"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = []
+
+    def scrape_all(self, keyword, sources, max_results, session_id=None, cancel_event=None,
+                   on_source_done=None, force_refresh=False):
+        self.started.append(keyword)
+        while not self.release.is_set() and not cancel_event.is_set():
+            time.sleep(0.01)
+        return 0
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def scraper():
+    scraper = FakeScraper()
+    yield scraper
+    scraper.release.set()
+
+
+@pytest.fixture
+def scheduler(scraper):
+    scheduler = ScrapeScheduler(scraper, max_concurrent=1)
+    yield scheduler
+    scheduler.shutdown()
+
+
+def test_finished_job_keeps_counts_not_listings():
+    job = ScrapeJob('s1', 'python', ['jobinja'])
+    job.add_event('source', {'source': 'jobinja', 'ok': True, 'count': 2, 'jobs': [{'title': 'a'}, {'title': 'b'}]})
+    assert job.events[0][1]['jobs']
+
+    job.add_event('done', {'status': 'done'})
+    assert job.events == [('source', {'source': 'jobinja', 'ok': True, 'count': 2}), ('done', {'status': 'done'})]
+
+
+def test_jobs_beyond_the_limit_wait_in_fifo_order(scheduler, scraper):
+    jobs = [scheduler.submit(f's{n}', f'keyword {n}', ['jobinja']) for n in range(3)]
+    wait_for(lambda: jobs[0].status == 'running')
+
+    assert [job.message for job in jobs[1:]] == ['Queued (position 1)', 'Queued (position 2)']
+    assert scheduler.stats() == {'max_concurrent': 1, 'running': 1, 'queued': 2}
+
+    scraper.release.set()
+    wait_for(lambda: all(job.status == 'done' for job in jobs))
+    assert scraper.started == ['keyword 0', 'keyword 1', 'keyword 2']
+
+
+def test_a_session_has_one_active_job(scheduler, scraper):
+    scheduler.submit('s1', 'python', ['jobinja'])
+    with pytest.raises(RuntimeError):
+        scheduler.submit('s1', 'devops', ['jobinja'])
+
+    scraper.release.set()
+    wait_for(lambda: scheduler.latest_for_session('s1').status == 'done')
+    assert scheduler.submit('s1', 'devops', ['jobinja']).status in ('queued', 'running')
+
+
+def test_cancelled_queued_job_never_runs(scheduler, scraper):
+    running = scheduler.submit('s1', 'python', ['jobinja'])
+    queued = scheduler.submit('s2', 'devops', ['jobinja'])
+    last = scheduler.submit('s3', 'dba', ['jobinja'])
+    wait_for(lambda: running.status == 'running')
+
+    assert scheduler.cancel(queued.job_id)
+    assert queued.status == 'cancelled'
+    assert queued.events[-1][0] == 'done'
+    assert last.message == 'Queued (position 1)'
+
+    scraper.release.set()
+    wait_for(lambda: last.status == 'done')
+    assert scraper.started == ['python', 'dba']
+
+
+def test_cancelled_running_job_stops(scheduler, scraper):
+    job = scheduler.submit('s1', 'python', ['jobinja'])
+    wait_for(lambda: job.status == 'running')
+
+    assert scheduler.cancel(job.job_id)
+    wait_for(lambda: job.status == 'cancelled')
+    assert not scheduler.cancel(job.job_id)
+    assert scheduler.stats()['running'] == 0
@@ -0,0 +1,179 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import JobListing
+from session_manager import SessionManager
+
+
+def job(n, **fields):
+    return {'title': f'Python Developer {n}', 'company': f'Company {n}', 'location': 'تهران',
+            'link': f'https://jobinja.ir/jobs/{n}', 'date': '۲ روز پیش', 'source': 'jobinja', **fields}
+
+
+def stored(db, session_id):
+    rows = db().query(JobListing).filter_by(session_id=session_id).order_by(JobListing.link).all()
+    db.remove()
+    return rows
+
+
+def test_bulk_save_inserts_then_updates_by_link(db, manager):
+    assert manager.bulk_save_jobs('s1', [job(1), job(2)], 'python') == (2, 0)
+
+    saved, updated = manager.bulk_save_jobs('s1', [job(2, title='Senior Python Developer'), job(3)], 'python')
+    assert (saved, updated) == (1, 1)
+
+    rows = stored(db, 's1')
+    assert [row.link for row in rows] == [job(n)['link'] for n in (1, 2, 3)]
+    assert rows[1].title == 'Senior Python Developer'
+    assert rows[1].city == 'تهران'
+    assert rows[1].search_keyword == 'python'
+
+
+def test_bulk_save_keeps_last_duplicate_and_skips_missing_links(db, manager):
+    batch = [job(1), job(1, title='Backend Developer'), job(2, link=''), {'title': 'No link'}]
+    assert manager.bulk_save_jobs('s1', batch, 'python') == (1, 0)
+
+    rows = stored(db, 's1')
+    assert len(rows) == 1
+    assert rows[0].title == 'Backend Developer'
+
+
+def test_bulk_save_in_chunks(db, manager):
+    jobs = [job(n) for n in range(25)]
+    assert manager.bulk_save_jobs('s1', jobs, 'python', chunk_size=7) == (25, 0)
+    assert manager.bulk_save_jobs('s1', jobs, 'python', chunk_size=7) == (0, 25)
+    assert len(stored(db, 's1')) == 25
+
+
+def test_bulk_save_drops_cached_counts(db, manager):
+    manager.bulk_save_jobs('s1', [job(1)], 'python')
+    assert manager.count_session_jobs('s1') == 1
+
+    manager.bulk_save_jobs('s1', [job(2)], 'python')
+    assert manager.count_session_jobs('s1') == 2
+
+
+def test_batch_jobs_keep_their_own_keyword(db, manager):
+    manager.bulk_save_jobs('s1', [job(1, search_keyword='django'), job(2)], None)
+    assert [row.search_keyword for row in stored(db, 's1')] == ['django', None]
+
+
+@pytest.mark.parametrize('date_text, age_days', [
+    ('امروز', 0),
+    ('دیروز', 1),
+    ('۳ ساعت پیش', 3 / 24),
+    ('۲ روز پیش', 2),
+    ('12 روز پیش', 12),
+    ('۲ هفته پیش', 14),
+    ('هفته گذشته', 7),
+    ('۱ ماه پیش', 30),
+])
+def test_posted_at_from_relative_persian_dates(date_text, age_days):
+    reference = datetime(2024, 5, 10, 12, 0)
+    posted_at, age = SessionManager(None).posted_at_from_text(date_text, reference)
+    assert age == pytest.approx(age_days)
+    assert posted_at == reference - timedelta(days=age_days)
+
+
+@pytest.mark.parametrize('date_text', ['', None, 'نامشخص', '1403/02/20'])
+def test_unknown_dates_have_no_posted_at(date_text):
+    assert SessionManager(None).posted_at_from_text(date_text) == (None, None)
+
+
+def test_saved_jobs_sort_by_posted_at_with_unknown_dates_last(db, manager):
+    manager.bulk_save_jobs('s1', [job(1, date='۳ روز پیش'), job(2, date='نامشخص'), job(3, date='امروز'),
+                                  job(4, date='دیروز')], 'python')
+
+    rows = {row.link: row for row in stored(db, 's1')}
+    assert rows[job(1)['link']].age_days == 3
+    assert rows[job(2)['link']].posted_at is None
+    assert rows[job(4)['link']].posted_at < rows[job(3)['link']].posted_at
+
+    newest = [j['link'] for j in manager.get_session_jobs('s1')]
+    oldest = [j['link'] for j in manager.get_session_jobs('s1', sort_by='oldest')]
+    assert newest == [job(n)['link'] for n in (3, 4, 1, 2)]
+    assert oldest == [job(n)['link'] for n in (1, 4, 3, 2)]
+
+
+def page_links(manager, session_id, limit, sort_by='newest'):
+    """Every link in the session, one keyset page at a time"""
+    links, cursor, total = [], None, None
+    while True:
+        page = manager.get_session_jobs_page(session_id, sort_by=sort_by, limit=limit, cursor=cursor)
+        links += [j['link'] for j in page['jobs']]
+        total = page['total']
+        cursor = page['next_cursor']
+        if cursor is None:
+            return links, total
+
+
+@pytest.mark.parametrize('sort_by', ['newest', 'oldest'])
+@pytest.mark.parametrize('limit', [1, 3, 4, 50])
+def test_keyset_pages_match_the_full_listing(db, manager, sort_by, limit):
+    # Equal posted_at values and unknown dates exercise both tie-breaks
+    dates = ['امروز', '۲ روز پیش', '۲ روز پیش', 'نامشخص', '۱ هفته پیش', 'نامشخص', 'دیروز']
+    manager.bulk_save_jobs('s1', [job(n, date=date) for n, date in enumerate(dates)], 'python')
+
+    links, total = page_links(manager, 's1', limit, sort_by)
+    assert total == len(dates)
+    assert links == [j['link'] for j in manager.get_session_jobs('s1', sort_by=sort_by)]
+
+
+def test_keyset_pages_respect_source_filter(db, manager):
+    manager.bulk_save_jobs('s1', [job(n, source='jobinja' if n % 2 else 'jobvision') for n in range(6)], 'python')
+    page = manager.get_session_jobs_page('s1', source='jobvision', limit=2)
+    assert page['total'] == 3
+    assert {j['source'] for j in page['jobs']} == {'jobvision'}
+
+
+@pytest.mark.parametrize('position', [
+    {'id': 3},
+    {'offset': 20},
+    {'posted_at': 'yesterday', 'id': 3},
+    {'posted_at': 17, 'id': 3},
+    {'posted_at': '2024-05-01T10:00:00', 'id': '3'},
+    {'null_part': 'yes', 'id': 3},
+    [1, 2],
+])
+def test_malformed_cursor_starts_from_the_top(db, manager, position):
+    manager.bulk_save_jobs('s1', [job(n) for n in range(3)], 'python')
+    first = manager.get_session_jobs_page('s1', limit=2)
+    page = manager.get_session_jobs_page('s1', limit=2, cursor=SessionManager.encode_cursor(position))
+    assert page == first
+
+
+@pytest.mark.parametrize('cursor', ['not base64!', 'bm90IGpzb24=', ''])
+def test_undecodable_cursor_is_empty(cursor):
+    assert SessionManager.decode_cursor(cursor) == {}
+
+
+def test_cursor_round_trip():
+    posted_at = datetime(2024, 5, 1, 10, 30)
+    encode = SessionManager.encode_cursor
+    assert SessionManager.decode_cursor(encode({'posted_at': posted_at.isoformat(), 'id': 7})) == \
+        {'posted_at': posted_at, 'id': 7}
+    assert SessionManager.decode_cursor(encode({'null_part': True, 'id': 7})) == {'null_part': True, 'id': 7}
+    assert SessionManager.decode_cursor(encode({'offset': 50})) == {'offset': 50}
+
+
+def test_search_stays_within_the_session(db, manager):
+    manager.bulk_save_jobs('s1', [job(1, title='برنامه‌نویس پایتون'), job(2, title='Java Developer')], 'python')
+    manager.bulk_save_jobs('s2', [job(1, title='برنامه نویس پايتون'), job(3, title='پایتون کار')], 'python')
+
+    page = manager.search_session_jobs('s1', 'پایتون')
+    assert page['total'] == 1
+    assert [(j['link'], j['title']) for j in page['jobs']] == [(job(1)['link'], 'برنامه‌نویس پایتون')]
+    assert manager.search_session_jobs('s2', 'پایتون')['total'] == 2
+
+
+def test_search_follows_updates_and_deletes(db, manager):
+    manager.bulk_save_jobs('s1', [job(1, title='Python Developer'), job(2, title='Go Developer')], 'python')
+    assert manager.search_session_jobs('s1', 'python')['total'] == 1
+
+    manager.bulk_save_jobs('s1', [job(1, title='Rust Developer')], 'python')
+    assert manager.search_session_jobs('s1', 'python')['total'] == 0
+    assert [j['link'] for j in manager.search_session_jobs('s1', 'rust')['jobs']] == [job(1)['link']]
+
+    manager.clear_session_jobs('s1')
+    assert manager.search_session_jobs('s1', 'developer')['total'] == 0